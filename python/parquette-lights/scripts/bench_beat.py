@@ -0,0 +1,125 @@
+"""Compare the streaming beat tracker with the librosa reference path.
+
+Renders synthetic click tracks (1 kHz clicks over white noise) at a range
+of tempos and, for each, runs both beat modes the way FFTManager does:
+
+  librosa    onset_strength + beat_track over the whole 5 s window at
+             every beat-track update
+  streaming  SpectralFrontEnd + StreamingBeatTracker.push() per chunk,
+             estimate() at every update
+
+Reports the cost of one update (for streaming, the pushes of the chunks
+since the last update included), the tempo error, and how far the beat
+time each reports is from the nearest true click.
+
+Usage: poetry run poe bench-beat
+"""
+
+import time
+from functools import partial
+from typing import Tuple
+
+import numpy as np
+
+from librosa.beat import beat_track
+from librosa.onset import onset_strength
+
+from parquette.lights.audio_analysis import SpectralFrontEnd, StreamingBeatTracker
+
+# AudioCapture's default analysis rate
+RATE = 22050
+CHUNK = 512
+N_MELS = CHUNK // 8
+WINDOW_SECS = 5.0
+UPDATE_SECS = 0.2
+TRACK_SECS = 12.0
+TEMPOS = (90, 100, 120, 128, 140, 174)
+
+
+def click_track(bpm: float, *, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Samples and click times (s) of a TRACK_SECS click track at `bpm`."""
+    rng = np.random.default_rng(seed)
+    y = rng.standard_normal(int(TRACK_SECS * RATE)) * 50.0
+    width = RATE // 100
+    click = np.hanning(width) * np.sin(2 * np.pi * 1000 * np.arange(width) / RATE)
+    clicks = np.arange(0.1, TRACK_SECS - 0.1, 60.0 / bpm)
+    for t in clicks:
+        start = int(t * RATE)
+        y[start : start + width] += 8000.0 * click
+    return y.astype(np.float32), clicks
+
+
+def streaming_update(
+    y: np.ndarray,
+    stop: int,
+    per_update: int,
+    front_end: SpectralFrontEnd,
+    tracker: StreamingBeatTracker,
+) -> Tuple[float, float]:
+    """Push the chunks since the last update, up to chunk `stop`, and
+    estimate: (tempo, seconds from the latest beat to the end)."""
+    for i in range(stop - per_update, stop):
+        front_end.forward(y[i * CHUNK : (i + 1) * CHUNK])
+        tracker.push(front_end.mel)
+    estimate = tracker.estimate()
+    return estimate.tempo, (estimate.beat_frames_ago + 0.5) * CHUNK / RATE
+
+
+def reference_update(y: np.ndarray, stop: int, window: int) -> Tuple[float, float]:
+    """librosa over the window ending at chunk `stop`, same return."""
+    audio = y[(stop - window) * CHUNK : stop * CHUNK]
+    oenv = onset_strength(y=audio, sr=RATE)
+    tempo, beats = beat_track(
+        onset_envelope=oenv,
+        sr=RATE,
+        units="frames",
+        start_bpm=130,
+        tightness=200,
+    )
+    ago = (len(audio) - int(beats[-1]) * 512) / RATE
+    return float(np.atleast_1d(tempo)[0]), ago
+
+
+def main() -> None:
+    window = int(WINDOW_SECS * RATE / CHUNK)
+    per_update = int(UPDATE_SECS * RATE / CHUNK)
+    print(
+        "{} Hz, chunk {}, {} s window, an update every {} chunks".format(
+            RATE, CHUNK, WINDOW_SECS, per_update
+        )
+    )
+    print()
+    print(
+        "{:>5}  {:<10}{:>10}{:>12}{:>14}".format(
+            "bpm", "mode", "tempo", "update ms", "beat err ms"
+        )
+    )
+
+    for bpm in TEMPOS:
+        y, clicks = click_track(bpm)
+        stop = len(y) // CHUNK
+
+        front_end = SpectralFrontEnd(CHUNK, RATE, N_MELS)
+        tracker = StreamingBeatTracker(N_MELS, RATE / CHUNK, window)
+        streaming_update(y, stop - per_update, stop - per_update, front_end, tracker)
+
+        for label, update in (
+            ("librosa", partial(reference_update, y, stop, window)),
+            (
+                "streaming",
+                partial(streaming_update, y, stop, per_update, front_end, tracker),
+            ),
+        ):
+            start = time.perf_counter()
+            tempo, ago = update()
+            ms = (time.perf_counter() - start) * 1000.0
+            error = float(np.min(np.abs(clicks - (stop * CHUNK / RATE - ago)))) * 1000
+            print(
+                "{:>5}  {:<10}{:>10.2f}{:>12.2f}{:>14.1f}".format(
+                    bpm, label, tempo, ms, error
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
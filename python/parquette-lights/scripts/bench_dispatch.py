@@ -0,0 +1,146 @@
+"""Measure inbound OSC dispatch throughput, pythonosc Dispatcher vs ours.
+
+Builds the real server wiring (no audio device or DMX hardware) to get the
+address map the server actually registers, copies it onto both
+dispatchers with no-op handlers, and pushes the same packets through
+`call_handlers_for_packet` on each, so only the lookup cost differs.
+
+Usage: poetry run poe bench-dispatch
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from pythonosc.dispatcher import Dispatcher
+
+from parquette.lights.audio_analysis import AudioCapture, FFTManager
+from parquette.lights.category import Categories
+from parquette.lights.coord_system_state import CoordSystemState
+from parquette.lights.dmx import DMXManager
+from parquette.lights.envelope import EnvelopeScheduler
+from parquette.lights.generators import Mixer
+from parquette.lights.osc import ExactMatchDispatcher, OSCManager, OSCParam
+from parquette.lights.patching import create_builders
+from parquette.lights.preset_manager import PresetManager
+from parquette.lights.scene import SceneManager
+from parquette.lights.util.client_tracker import ClientTracker
+from parquette.lights.util.coord_system import default_systems
+from parquette.lights.util.session_store import SessionStore
+
+DURATION_S = 2.0
+CLIENT = ("127.0.0.1", 5006)
+
+
+def registered_map(tmp_dir: Path) -> Dict[str, int]:
+    """Address -> handler count, as registered by the real server wiring."""
+    osc = OSCManager()
+    dmx = DMXManager(osc, art_net_ip="127.0.0.1")
+    session = SessionStore(str(tmp_dir / "session.pickle"))
+    coord_state = CoordSystemState(systems=default_systems(), osc=osc, session=session)
+    categories = Categories(osc, session)
+    audio_capture = AudioCapture(osc, audio_window_secs=5.0)
+    fft_manager = FFTManager(osc, audio_capture, dmx, rms_window_secs=0.5)
+    builders = create_builders(
+        osc=osc,
+        dmx=dmx,
+        categories=categories,
+        fft_manager=fft_manager,
+        session=session,
+        coord_state=coord_state,
+        loop_max_samples=500,
+        spot_color_fade=0.1,
+        spot_mechanical_time=0.45,
+        envelopes=EnvelopeScheduler(),
+        debug=False,
+        debug_hazer=False,
+    )
+    fixtures: List[Any] = []
+    generators: List[Any] = []
+    for b in builders:
+        fixtures.extend(b.fixtures())
+        generators.extend(b.generators())
+    mixer = Mixer(
+        osc=osc,
+        dmx=dmx,
+        generators=generators,
+        fixtures=fixtures,
+        categories=categories,
+    )
+    exposed: Dict[Any, List[OSCParam]] = {}
+    for b in builders:
+        for category, params in b.build_params(mixer).items():
+            exposed.setdefault(category, []).extend(params)
+    presets = PresetManager(
+        osc, exposed, categories, str(tmp_dir / "params.pickle"), session=session
+    )
+    SceneManager(
+        osc,
+        dmx,
+        presets,
+        categories,
+        filename=str(tmp_dir / "scenes.pickle"),
+        defaults_file=str(tmp_dir / "default-scenes.pickle"),
+        default_channel_offsets={},
+    )
+    ClientTracker(osc)
+
+    # pylint: disable-next=protected-access
+    return {addr: len(handlers) for addr, handlers in osc.dispatcher._map.items()}
+
+
+def fill(dispatcher: Dispatcher, addresses: Dict[str, int]) -> Dispatcher:
+    for addr, count in addresses.items():
+        for _ in range(count):
+            dispatcher.map(addr, lambda *_args: None)
+    return dispatcher
+
+
+def messages_per_sec(dispatcher: Dispatcher, packets: List[bytes]) -> float:
+    sent = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION_S:
+        for dgram in packets:
+            dispatcher.call_handlers_for_packet(dgram, CLIENT)
+        sent += len(packets)
+    return sent / (time.perf_counter() - start)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        addresses = registered_map(Path(tmp))
+
+    exact = [a for a in addresses if "*" not in a]
+    # Mostly fader traffic plus the wildcard-routed preset and scene actions
+    incoming = exact + ["/preset/selector/reds", "/scene/all_black"]
+    packets = [OSCManager.build_message(addr, 0.5).dgram for addr in incoming]
+
+    print(
+        "{} addresses ({} handlers, {} wildcard), {} distinct messages".format(
+            len(addresses),
+            sum(addresses.values()),
+            len(addresses) - len(exact),
+            len(packets),
+        )
+    )
+    print()
+
+    for debug_label, with_debug in (("", False), (" + '*' debug handler", True)):
+        results = []
+        for label, dispatcher in (
+            ("pythonosc Dispatcher", Dispatcher()),
+            ("ExactMatchDispatcher", ExactMatchDispatcher()),
+        ):
+            fill(dispatcher, addresses)
+            if with_debug:
+                dispatcher.map("*", lambda *_args: None)
+            rate = messages_per_sec(dispatcher, packets)
+            results.append(rate)
+            print("{:<22}{:<24}{:>12,.0f} msg/s".format(label, debug_label, rate))
+        print("{:<46}{:>12.1f}x".format("speedup", results[1] / results[0]))
+        print()
+
+
+if __name__ == "__main__":
+    main()
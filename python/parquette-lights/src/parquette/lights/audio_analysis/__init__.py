@@ -1,2 +1,11 @@
 from .fft import *
 from .audio import *
+from .ring_buffer import *
+from .resample import *
+from .spectral import *
+from .beat_tracker import *
+from .hpss import *
+from .onset import *
+from .latency import *
+from .feature_bus import *
+from .process import *
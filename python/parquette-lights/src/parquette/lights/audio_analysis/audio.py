@@ -1,6 +1,6 @@
-from typing import Optional, Mapping, cast
-from collections import deque
+from typing import Dict, Optional, Mapping, Tuple, cast
 
+import math
 import time
 from threading import Thread, Event
 
@@ -10,16 +10,22 @@ from serial import SerialException
 
 from ..osc import OSCManager, UIDebugFrame
 from ..dmx import DMXManager
+from .resample import PolyphaseResampler
+from .ring_buffer import SampleRing
 
 
 class AudioCapture(object):
     stream: Optional[pyaudio.Stream] = None
+    # Analysis rate: what the ring holds, and what every stage reads at
     rate: int
     chunk: int
+    # The stream's rate and buffer size
+    device_rate: int
+    device_chunk: int
+    resampler: Optional[PolyphaseResampler] = None
     audio_thread: Optional[Thread] = None
     audio_running: bool = False
-    window: deque
-    window_ts: deque
+    ring: SampleRing
     dmx: DMXManager  # set by server.py; loop checks dmx.passthrough to skip work
 
     def __init__(
@@ -27,16 +33,47 @@ class AudioCapture(object):
         osc: OSCManager,
         chunk: int = 512,
         audio_window_secs: float = 5,
+        headroom_secs: float = 1,
         debug: bool = False,
+        *,
+        capture_mode: str = "callback",
+        late_chunks: float = 2.0,
+        analysis_rate: Optional[int] = 22050,
     ) -> None:
         self.paudio = pyaudio.PyAudio()
         self.chunk = chunk
+        # "callback" has PortAudio hand each chunk to _on_chunk, stamped
+        # with its ADC time; "blocking" reads the stream on audio_thread
+        # and stamps a chunk when the read returns
+        self.capture_mode = capture_mode
+        # A callback running more than this many chunks after its first
+        # sample was captured counts as late
+        self.late_chunks = late_chunks
+        # Capture is resampled to this rate whatever the device's, so chunk
+        # and n_mels mean the same on every interface; None keeps the
+        # device's rate
+        self.analysis_rate = analysis_rate
         self.audio_window_secs = audio_window_secs
+        # Extra ring capacity beyond the window, so a reader's view of the
+        # window (the beat tracker's) survives this long before the capture
+        # thread starts overwriting it
+        self.headroom_secs = headroom_secs
         self.debug = debug
         self.window_len = 250  # fallback until audio is configured and rate is known
-        self.window = deque()
-        self.window_ts = deque()
+        self.ring = SampleRing(self.chunk, self.window_len + 1)
         self.new_chunk_event = Event()
+        # Resampled samples not yet making up a whole chunk
+        self._pending = np.zeros(self.chunk, dtype=np.float32)
+        self._pending_len = 0
+
+        # Callback mode accounting, since the stream was opened
+        self.overflows = 0
+        self.underflows = 0
+        self.late_callbacks = 0
+        self.capture_tick = 0
+        self.latency_ms = 0.0
+        self._capture_avg_ms = 0.0
+        self._debug_interval_start = 0.0
 
         self.uidb = UIDebugFrame(osc, "/debug/audio_frame")
 
@@ -63,6 +100,17 @@ class AudioCapture(object):
         ]
         return ports
 
+    def find_input(self, name: str) -> Optional[Tuple[int, str]]:
+        """(index, name) of the first input device whose name contains
+        `name`, case-insensitive."""
+        needle = name.lower()
+        for i, port in enumerate(self.list_audio_ports()):
+            if int(port["maxInputChannels"]) <= 0:
+                continue
+            if needle in str(port["name"]).lower():
+                return i, str(port["name"])
+        return None
+
     def audio_port_refresh(self) -> None:
         port_opts = {
             port["name"]: i
@@ -80,22 +128,28 @@ class AudioCapture(object):
             port = int(port)
             port_info = self.paudio.get_device_info_by_index(port)
 
-            self.rate = int(cast(int, port_info["defaultSampleRate"]))
-            self.window_len = int(self.audio_window_secs * self.rate / self.chunk)
-            self.window = deque(self.window, maxlen=self.window_len)
-            self.window_ts = deque(self.window_ts, maxlen=self.window_len)
+            self.configure_rate(int(cast(int, port_info["defaultSampleRate"])))
 
+            callback = self._on_chunk if self.capture_mode == "callback" else None
             self.stream = self.paudio.open(
                 format=pyaudio.paInt16,
                 input_device_index=port,
                 channels=1,
-                rate=self.rate,
+                rate=self.device_rate,
                 input=True,
-                frames_per_buffer=self.chunk,
+                frames_per_buffer=self.device_chunk,
+                stream_callback=callback,
+                # started by start_audio
+                start=callback is None,
             )
+            self.overflows = 0
+            self.underflows = 0
+            self.late_callbacks = 0
+            self.capture_tick = 0
 
             self.uidb["audio_channels"] = 1
             self.uidb["audio_rate"] = self.rate
+            self.uidb["audio_device_rate"] = self.device_rate
             self.uidb["audio_chunk"] = self.chunk
             self.uidb["audio_resolution"] = self.rate / self.chunk
             self.uidb["audio_nyquist"] = self.rate / 2
@@ -106,6 +160,51 @@ class AudioCapture(object):
             print(e, flush=True)
             self.close()
 
+    def configure_rate(self, device_rate: int) -> None:
+        """Size the resampler, ring and window for a stream at `device_rate`."""
+        self.device_rate = device_rate
+        self.rate = self.analysis_rate or device_rate
+        if self.rate == device_rate:
+            self.resampler = None
+            self.device_chunk = self.chunk
+        else:
+            self.resampler = PolyphaseResampler(device_rate, self.rate)
+            # About one analysis chunk per buffer
+            self.device_chunk = round(self.chunk * device_rate / self.rate)
+        self._pending_len = 0
+
+        self.window_len = int(self.audio_window_secs * self.rate / self.chunk)
+        headroom = math.ceil(self.headroom_secs * self.rate / self.chunk)
+        self.ring = SampleRing(self.chunk, self.window_len + max(headroom, 1))
+
+    def _write(self, samples: np.ndarray, end_ts: float) -> None:
+        """Resample a buffer of device samples, whose last sample was
+        captured at `end_ts`, and append every chunk it completes to the
+        ring. Each chunk is stamped with the time of its last sample."""
+        if self.resampler is None:
+            # Converted to float32 as it's copied into the ring
+            self.ring.write(samples, end_ts)
+            self.new_chunk_event.set()
+            return
+
+        resampler = self.resampler
+        out = resampler.process(samples)
+        first = resampler.out_count - len(out)
+        last_in = resampler.in_count - 1
+        i = 0
+        while i < len(out):
+            take = min(len(out) - i, self.chunk - self._pending_len)
+            self._pending[self._pending_len : self._pending_len + take] = out[
+                i : i + take
+            ]
+            self._pending_len += take
+            i += take
+            if self._pending_len == self.chunk:
+                lag = last_in - resampler.input_position(first + i - 1)
+                self.ring.write(self._pending, end_ts - lag / self.device_rate)
+                self._pending_len = 0
+                self.new_chunk_event.set()
+
     def _run_capture(self) -> None:
         capture_tick = 0
         debug_interval_start = time.monotonic()
@@ -118,17 +217,12 @@ class AudioCapture(object):
                     continue
 
                 iter_start = time.monotonic()
-                data = self.stream.read(self.chunk, exception_on_overflow=False)
+                data = self.stream.read(self.device_chunk, exception_on_overflow=False)
 
                 if self.dmx is not None and self.dmx.passthrough:
                     continue
 
-                indata = np.frombuffer(data, dtype=np.int16).astype(np.float32)
-
-                ts = time.time()
-                self.window.append(indata)
-                self.window_ts.append(ts)
-                self.new_chunk_event.set()
+                self._write(np.frombuffer(data, dtype=np.int16), time.time())
 
                 capture_tick += 1
                 iter_ms = (time.monotonic() - iter_start) * 1000
@@ -137,7 +231,7 @@ class AudioCapture(object):
                 if self.debug and capture_tick % 500 == 0:
                     now = time.monotonic()
                     wall_avg = (now - debug_interval_start) / 500 * 1000
-                    expected_ms = self.chunk / self.rate * 1000 if self.rate else 0
+                    expected_ms = self.device_chunk / self.device_rate * 1000
                     print(
                         "DEBUG audio capture tick {}: "
                         "process_avg={:.1f}ms wall_avg={:.1f}ms "
@@ -153,7 +247,81 @@ class AudioCapture(object):
             except OSError as e:
                 print("OSError your stream died", e, flush=True)
 
+    def _on_chunk(
+        self,
+        in_data: Optional[bytes],
+        frame_count: int,
+        time_info: Dict[str, float],
+        status: int,
+    ) -> Tuple[None, int]:
+        """PortAudio stream callback: copy the chunk into the ring, stamped
+        with the wall-clock time of its last sample."""
+        now = time.time()
+        callback_start = time.monotonic()
+
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+            self.uidb["audio_overflows"] = self.overflows
+        if status & pyaudio.paInputUnderflow:
+            self.underflows += 1
+            self.uidb["audio_underflows"] = self.underflows
+
+        # time_info is on the stream's clock; some host APIs leave it 0
+        chunk_secs = frame_count / self.device_rate
+        adc_time = time_info.get("input_buffer_adc_time", 0.0)
+        stream_time = time_info.get("current_time", 0.0)
+        if adc_time > 0 and stream_time > 0:
+            latency = stream_time - adc_time
+        else:
+            latency = chunk_secs
+        if latency > self.late_chunks * chunk_secs:
+            self.late_callbacks += 1
+            self.uidb["audio_late_callbacks"] = self.late_callbacks
+        self.latency_ms = self.latency_ms * 0.9 + latency * 1000 * 0.1
+        self.uidb["audio_latency"] = self.latency_ms
+
+        if in_data is None or (self.dmx is not None and self.dmx.passthrough):
+            return None, pyaudio.paContinue
+
+        self._write(np.frombuffer(in_data, dtype=np.int16), now - latency + chunk_secs)
+
+        self.capture_tick += 1
+        callback_ms = (time.monotonic() - callback_start) * 1000
+        self._capture_avg_ms = self._capture_avg_ms * 0.9 + callback_ms * 0.1
+        self.uidb["capture_avg_time"] = self._capture_avg_ms
+        if self.debug and self.capture_tick % 500 == 0:
+            self._print_callback_debug()
+        return None, pyaudio.paContinue
+
+    def _print_callback_debug(self) -> None:
+        now = time.monotonic()
+        if self._debug_interval_start > 0:
+            wall_avg = (now - self._debug_interval_start) / 500 * 1000
+            print(
+                "DEBUG audio capture tick {}: "
+                "callback_avg={:.2f}ms wall_avg={:.1f}ms expected={:.1f}ms "
+                "latency={:.1f}ms overflows={} underflows={} late={}".format(
+                    self.capture_tick,
+                    self._capture_avg_ms,
+                    wall_avg,
+                    self.device_chunk / self.device_rate * 1000,
+                    self.latency_ms,
+                    self.overflows,
+                    self.underflows,
+                    self.late_callbacks,
+                ),
+                flush=True,
+            )
+        self._debug_interval_start = now
+
     def start_audio(self) -> None:
+        if self.capture_mode == "callback":
+            self.stop_audio()
+            self.audio_running = True
+            if self.stream is not None:
+                self.stream.start_stream()
+            return
+
         if not self.audio_thread is None:
             self.stop_audio()
 
@@ -165,6 +333,12 @@ class AudioCapture(object):
         self.audio_running = False
         if not self.audio_thread is None:
             self.audio_thread.join()
+        if self.capture_mode == "callback" and self.stream is not None:
+            try:
+                if self.stream.is_active():
+                    self.stream.stop_stream()
+            except OSError as e:
+                print("OSError stopping audio stream", e, flush=True)
 
     def close(self, deselect=True) -> None:
         self.stop_audio()
@@ -175,6 +349,7 @@ class AudioCapture(object):
                 self.stream.close()
             except:
                 pass
+            self.stream = None
 
         if deselect:
             self.osc.send_osc("/audio_config/port_name", [None])
@@ -0,0 +1,161 @@
+from typing import NamedTuple
+
+import math
+
+import numpy as np
+
+# Mel power floor before taking dB, librosa's power_to_db amin
+MEL_FLOOR = 1e-10
+
+
+class BeatEstimate(NamedTuple):
+    """One StreamingBeatTracker.estimate(): tempo, how many frames ago the
+    latest beat was, and a copy of the onset envelope window it used."""
+
+    tempo: float
+    beat_frames_ago: float
+    envelope: np.ndarray
+
+
+class StreamingBeatTracker(object):
+    """Onset envelope, tempo and beat phase, updated one frame at a time.
+
+    push() takes the mel power of each new chunk (one frame per chunk,
+    before any loudness normalisation, which would put its own steps in
+    the flux) and appends their spectral flux, the mean rise in dB across bands, to the
+    onset envelope. The envelope's autocorrelation over the last `window`
+    frames is kept as running sums: each push adds the new frame's
+    products and subtracts the leaving frame's, so an update is O(lags)
+    whatever the window length. The sums are recomputed exactly once per
+    window to stop rounding drift.
+
+    estimate() picks the tempo from the autocorrelation under a log-normal
+    prior around start_bpm (as librosa's beat_track does) and the beat
+    phase from a comb over the last few periods of the envelope.
+    """
+
+    def __init__(
+        self,
+        n_mels: int,
+        frame_rate: float,
+        window: int,
+        *,
+        min_bpm: float = 60.0,
+        max_bpm: float = 200.0,
+        start_bpm: float = 130.0,
+        std_octaves: float = 1.0,
+        trend_secs: float = 1.0,
+    ) -> None:
+        self.frame_rate = frame_rate
+        self.window = window
+        self.frames = 0
+
+        min_lag = max(1, int(60.0 * frame_rate / max_bpm))
+        max_lag = min(window - 2, int(math.ceil(60.0 * frame_rate / min_bpm)))
+        self.lags = np.arange(min_lag, max_lag + 1)
+        bpms = 60.0 * frame_rate / self.lags
+        self.prior = np.exp(-0.5 * (np.log2(bpms / start_bpm) / std_octaves) ** 2)
+        # Each lag has window - lag products in its sum
+        self._terms = (window - self.lags).astype(np.float64)
+
+        # Mirrored like SampleRing: frame i at i % cap and i % cap + cap, so
+        # the last `window` + 1 frames are one slice
+        self._cap = window + 1
+        self._envelope = np.zeros(2 * self._cap)
+        # Envelope minus its slow trend, what the autocorrelation runs on
+        self._detrended = np.zeros(2 * self._cap)
+        self._trend = 0.0
+        self._trend_alpha = 1.0 / max(1.0, trend_secs * frame_rate)
+        self._ac = np.zeros(len(self.lags))
+
+        self._db = np.zeros(n_mels)
+        self._prev_db = np.zeros(n_mels)
+        self._rise = np.zeros(n_mels)
+        self._products = np.zeros(len(self.lags))
+
+    def _recent(self, buf: np.ndarray, count: int) -> np.ndarray:
+        """Last `count` frames of a mirrored buffer, oldest first."""
+        stop = self.frames % self._cap + self._cap
+        return buf[stop - count : stop]
+
+    def push(self, mel: np.ndarray) -> float:
+        """Add one frame's mel bands, returning its onset strength."""
+        np.maximum(mel, MEL_FLOOR, out=self._db)
+        np.log10(self._db, out=self._db)
+        self._db *= 10.0
+        if self.frames == 0:
+            strength = 0.0
+        else:
+            np.subtract(self._db, self._prev_db, out=self._rise)
+            np.maximum(self._rise, 0.0, out=self._rise)
+            strength = float(self._rise.mean())
+        self._db, self._prev_db = self._prev_db, self._db
+
+        self._trend += self._trend_alpha * (strength - self._trend)
+        value = strength - self._trend
+
+        slot = self.frames % self._cap
+        self._envelope[slot] = self._envelope[slot + self._cap] = strength
+        self._detrended[slot] = self._detrended[slot + self._cap] = value
+        self.frames += 1
+
+        if self.frames % self.window == 0:
+            self._refresh()
+            return strength
+
+        # The window is now the last `window` frames; the frame that just
+        # left is the one before them
+        # recent[window] is the new frame n, recent[0] the one that left
+        recent = self._recent(self._detrended, self._cap)
+        lo, hi = self.lags[0], self.lags[-1]
+        w = self.window
+        # e[n] * e[n - lag] for every lag, as one reversed slice
+        np.multiply(recent[w - hi : w - lo + 1][::-1], recent[w], out=self._products)
+        self._ac += self._products
+        # e[n - window] * e[n - window + lag], the products that left with it
+        np.multiply(recent[lo : hi + 1], recent[0], out=self._products)
+        self._ac -= self._products
+        return strength
+
+    def _refresh(self) -> None:
+        window = self._recent(self._detrended, self.window)
+        for i, lag in enumerate(self.lags):
+            self._ac[i] = float(np.dot(window[lag:], window[:-lag]))
+
+    def tempo(self) -> float:
+        score = self._ac / self._terms
+        # Spread each lag over its neighbours: a beat period between two
+        # whole frames splits its peak across them, and would otherwise
+        # lose to a multiple of it that happens to land on one
+        score = np.convolve(score, (0.25, 0.5, 0.25), mode="same") * self.prior
+        best = int(np.argmax(score))
+        lag = float(self.lags[best])
+        # Parabolic interpolation between the neighbouring lags
+        if 0 < best < len(score) - 1:
+            left, mid, right = score[best - 1], score[best], score[best + 1]
+            curve = left - 2 * mid + right
+            if curve < 0:
+                lag += 0.5 * (left - right) / curve
+        return 60.0 * self.frame_rate / lag
+
+    def beat_phase(self, tempo: float, *, beats: int = 8) -> float:
+        """Frames since the latest beat at `tempo`: the comb offset, over
+        the last `beats` periods, that lines up with the most onset energy.
+        Recent periods weigh more so the phase follows drift."""
+        period = 60.0 * self.frame_rate / tempo
+        count = max(1, min(beats, int((self.window - 1) / period)))
+        envelope = self._recent(self._envelope, self.window)
+        offsets = np.arange(int(math.ceil(period)))
+        taps = np.rint(np.arange(count) * period).astype(np.intp)
+        index = self.window - 1 - (offsets[:, np.newaxis] + taps[np.newaxis, :])
+        weights = 0.8 ** np.arange(count)
+        score = (envelope[np.maximum(index, 0)] * (index >= 0)) @ weights
+        return float(np.argmax(score))
+
+    def envelope(self) -> np.ndarray:
+        """Copy of the onset envelope window, oldest frame first."""
+        return self._recent(self._envelope, self.window).copy()
+
+    def estimate(self) -> BeatEstimate:
+        tempo = self.tempo()
+        return BeatEstimate(tempo, self.beat_phase(tempo), self.envelope())
@@ -0,0 +1,154 @@
+from typing import List, Optional, Tuple
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+# Header slots
+FRAMES_WRITTEN = 0
+BEATS_WRITTEN = 1
+PASSTHROUGH = 2
+HEADER_LEN = 4
+
+# Per-frame fields ahead of the mel bands
+FRAME_MILLIS = 0
+FRAME_RMS = 1
+FRAME_RMS_VALID = 2
+FRAME_BPM_VALID = 3
+FRAME_VISUALIZING = 4
+FRAME_ONSET = 5
+FRAME_FIELDS = 6
+
+# Per-beat fields: the arguments of BPMGenerator.update_bpm_phase
+BEAT_BPM = 0
+BEAT_TIME_MS = 1
+BEAT_ALPHA = 2
+BEAT_FIELDS = 3
+
+
+class FeatureBus(object):
+    """Shared-memory feed of FFTManager's output from the analysis process
+    to the lighting process.
+
+    Two rings of float64 rows in one shared block: a frame per audio chunk
+    (capture time, rms, the validity flags, the onset flag and the mel
+    bands, what FFTGenerator.forward, the BPM gates and the onset
+    generators take) and a row per published
+    beat (update_bpm_phase's arguments). One process writes, the other
+    reads, with the same protocol as SampleRing: a row is published by
+    bumping its ring's count after the row is in place, and the reader
+    checks the count again after copying a row to catch one overwritten
+    under it. The header also carries the DMX passthrough flag the other
+    way, so the analysis process can idle while it's on.
+
+    The creating side (name=None) owns the block and unlink()s it; the
+    other attaches with the creator's `name` and the same sizes.
+    """
+
+    def __init__(
+        self,
+        n_mels: int,
+        *,
+        frame_capacity: int = 256,
+        beat_capacity: int = 16,
+        name: Optional[str] = None,
+    ) -> None:
+        self.n_mels = n_mels
+        self.frame_capacity = frame_capacity
+        self.beat_capacity = beat_capacity
+        frame_len = FRAME_FIELDS + n_mels
+        total = HEADER_LEN + frame_capacity * frame_len + beat_capacity * BEAT_FIELDS
+        if name is None:
+            self.shm = SharedMemory(create=True, size=total * 8)
+        else:
+            self.shm = SharedMemory(name=name)
+        self.name = self.shm.name
+
+        block: np.ndarray = np.ndarray((total,), dtype=np.float64, buffer=self.shm.buf)
+        if name is None:
+            block.fill(0.0)
+        self._header = block[:HEADER_LEN]
+        frames_end = HEADER_LEN + frame_capacity * frame_len
+        self._frames = block[HEADER_LEN:frames_end].reshape(frame_capacity, frame_len)
+        self._beats = block[frames_end:].reshape(beat_capacity, BEAT_FIELDS)
+
+        # Reader side: rows consumed so far, and rows lost to overruns
+        self.frames_read = 0
+        self.beats_read = 0
+        self.dropped = 0
+
+    @property
+    def passthrough(self) -> bool:
+        return bool(self._header[PASSTHROUGH])
+
+    @passthrough.setter
+    def passthrough(self, value: bool) -> None:
+        self._header[PASSTHROUGH] = 1.0 if value else 0.0
+
+    def write_frame(
+        self,
+        millis: float,
+        bands: np.ndarray,
+        *,
+        rms: float,
+        rms_valid: bool,
+        bpm_valid: bool,
+        onset: bool,
+        visualizing: bool,
+    ) -> None:
+        written = int(self._header[FRAMES_WRITTEN])
+        row = self._frames[written % self.frame_capacity]
+        row[FRAME_MILLIS] = millis
+        row[FRAME_RMS] = rms
+        row[FRAME_RMS_VALID] = rms_valid
+        row[FRAME_BPM_VALID] = bpm_valid
+        row[FRAME_VISUALIZING] = visualizing
+        row[FRAME_ONSET] = onset
+        row[FRAME_FIELDS:] = bands
+        self._header[FRAMES_WRITTEN] = written + 1
+
+    def write_beat(self, bpm: float, beat_time_ms: float, alpha: float) -> None:
+        written = int(self._header[BEATS_WRITTEN])
+        self._beats[written % self.beat_capacity] = (bpm, beat_time_ms, alpha)
+        self._header[BEATS_WRITTEN] = written + 1
+
+    def _read(
+        self, rows: np.ndarray, slot: int, start: int
+    ) -> Tuple[List[np.ndarray], int]:
+        """Rows from `start` up to the count at the time of the call, and
+        that count."""
+        capacity = len(rows)
+        written = int(self._header[slot])
+        # The oldest row's slot is the one the writer fills next
+        first = max(start, written - capacity + 1)
+        self.dropped += first - start
+        out = []
+        for i in range(first, written):
+            row = rows[i % capacity].copy()
+            # Lapped by the writer while copying
+            if int(self._header[slot]) - i >= capacity:
+                self.dropped += 1
+                continue
+            out.append(row)
+        return out, written
+
+    def read_frames(self) -> List[np.ndarray]:
+        """Copies of the frames written since the last call, oldest first.
+        Bands start at FRAME_FIELDS."""
+        rows, self.frames_read = self._read(
+            self._frames, FRAMES_WRITTEN, self.frames_read
+        )
+        return rows
+
+    def read_beats(self) -> List[np.ndarray]:
+        """Copies of the beats written since the last call, oldest first."""
+        rows, self.beats_read = self._read(self._beats, BEATS_WRITTEN, self.beats_read)
+        return rows
+
+    def close(self) -> None:
+        # Drop the views before the mapping goes away
+        del self._header, self._frames, self._beats
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
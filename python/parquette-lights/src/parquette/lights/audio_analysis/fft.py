@@ -2,29 +2,27 @@ import math
 import statistics
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Optional, List
+from typing import Optional, List, Protocol
 
 from threading import Thread
 import time
 from serial import SerialException
 
-from librosa import (
-    stft,  # pylint: disable=no-name-in-module
-    A_weighting,  # pylint: disable=no-name-in-module
-    mel_frequencies,  # pylint: disable=no-name-in-module
-    db_to_amplitude,  # pylint: disable=no-name-in-module
-)  # pylint: disable=no-name-in-module
-from librosa import resample  # pylint: disable=no-name-in-module
-from librosa.feature import melspectrogram  # pylint: disable=no-name-in-module
 from librosa.beat import beat_track
 from librosa.onset import onset_strength, onset_detect
-from librosa.effects import hpss
 import numpy as np
 
-from ..generators import BPMGenerator, FFTGenerator
+from ..generators import BPMGenerator, FFTGenerator, OnsetGenerator
 from ..osc import OSCManager, OSCParam, UIDebugFrame
 from ..dmx import DMXManager
 from .audio import AudioCapture
+from .beat_tracker import BeatEstimate, StreamingBeatTracker
+from .feature_bus import FeatureBus
+from .hpss import StreamingHPSS
+from .latency import LatencyCompensation
+from .onset import OnsetDetector
+from .ring_buffer import SampleRing
+from .spectral import SpectralFrontEnd
 
 
 # Empirical reference for mapping the RMS-power-normalized mel spectrum into [0, 1].
@@ -33,13 +31,57 @@ from .audio import AudioCapture
 # the debug viz against typical material and adjusting until peaks sit near 1.0.
 MEL_NORM_REF = 1.0
 
+# Empirical: the streaming envelope (one chunk-long frame, n_mels bands) runs
+# about twice librosa's onset_strength on the same audio, noise floor and
+# peaks alike. Dividing by this keeps onset_envelope_floor, tuned on
+# librosa's envelope, meaning the same in both beat modes.
+STREAMING_ONSET_REF = 2.0
+
+# Visualizer streams, only sent to front ends showing the FFT / DMX tabs
+STREAM_ADDRESSES = [
+    "/visualizer/fft",
+    "/visualizer/fftgen_1",
+    "/visualizer/fftgen_2",
+    "/visualizer/rms_history",
+    "/visualizer/bpm_history",
+    "/visualizer/raw_bpm_history",
+    "/visualizer/harmonic_percussive",
+    "/visualizer/business",
+    "/visualizer/regularity",
+    "/debug/fft_frame",
+    "/debug/latency_frame",
+]
+
+
+class FeatureSource(Protocol):
+    """What the patching builders and server need from the audio analysis:
+    FFTManager in process, or AnalysisProcess running it in a child."""
+
+    bpms: List[BPMGenerator]
+    downstream: List[FFTGenerator]
+    onsets: List[OnsetGenerator]
+    latency: LatencyCompensation
+
+    def config_params(self, osc: OSCManager) -> List[OSCParam]:
+        """Preset-saved /audio_config/... params."""
+
+    def connect_interface(self, name: str) -> None:
+        """Open the first input device matching `name` and start analysis."""
+
 
 class FFTManager(object):
     bpms: List[BPMGenerator] = []
     fft_thread: Optional[Thread] = None
     fft_running: bool = False
     downstream: List[FFTGenerator] = []
-    weighting = None
+    # Punched on every onset the OnsetDetector reports
+    onsets: List[OnsetGenerator] = []
+    spectral: Optional[SpectralFrontEnd] = None
+    beat_tracker: Optional[StreamingBeatTracker] = None
+    hpss: Optional[StreamingHPSS] = None
+    # Set when analysis runs in its own process: frames and beats are
+    # published here as well as forwarded to downstream / bpms
+    bus: Optional[FeatureBus] = None
 
     def __init__(
         self,
@@ -60,6 +102,7 @@ class FFTManager(object):
         bpm_publish_interval: float = 1,
         bpm_outlier_threshold: float = 0.15,
         bpm_outlier_min_samples: int = 10,
+        beat_mode: str = "streaming",
     ) -> None:
         self.debug = debug
         self.onset_envelope_floor = onset_envelope_floor
@@ -75,6 +118,15 @@ class FFTManager(object):
         self.phase_alpha = phase_alpha
         self.rms_window_secs = rms_window_secs
         self.current_rms: float = 0.0
+        # The BPM gates, as last pushed to bpms
+        self.rms_valid: bool = False
+        self.bpm_valid: bool = False
+        # Chunk count the spectral front end and beat tracker have seen up to
+        self.analysed_end: int = 0
+        self.onset_detector = OnsetDetector()
+        self.latency = LatencyCompensation(osc)
+        # Whether the chunks analysed last had an onset, for the bus
+        self.onset: bool = False
         self.last_beat_track_time: float = 0.0
         self.last_debug_update: float = 0.0
 
@@ -83,6 +135,10 @@ class FFTManager(object):
         self.last_bpm_publish_time: float = 0.0
         self.bpm_outlier_threshold = bpm_outlier_threshold
         self.bpm_outlier_min_samples = bpm_outlier_min_samples
+        # "streaming" follows the beat with the incremental beat tracker;
+        # "librosa" re-runs onset_strength + beat_track over the whole window
+        # every beat_track_interval, kept as the reference to compare against
+        self.beat_mode = beat_mode
         self.bpm_outlier_window: int = 30
         self.smoothed_bpm: float = 0.0
         self.clusters_valid: bool = True
@@ -119,6 +175,8 @@ class FFTManager(object):
             "/visualizer/enable_fft_spectrum",
             lambda addr, *args: self.enable_fft_debug_data(bool(args[0])),
         )
+        for addr in STREAM_ADDRESSES:
+            self.osc.route_stream(addr, "/visualizer/enable_fft_spectrum")
 
     def simple_tempo_resolve(self, tempo: float, window: List[float]) -> float:
         """Fallback: accept tempo if within threshold of window median."""
@@ -248,6 +306,22 @@ class FFTManager(object):
                 self,
                 "bpm_publish_interval",
             ),
+            OSCParam.bind(osc, "/audio_config/beat_mode", self, "beat_mode"),
+            OSCParam.bind(
+                osc,
+                "/audio_config/onset_sensitivity",
+                self.onset_detector,
+                "sensitivity",
+            ),
+            OSCParam.bind(
+                osc,
+                "/audio_config/onset_min_strength",
+                self.onset_detector,
+                "min_strength",
+            ),
+            OSCParam.bind(
+                osc, "/audio_config/onset_max_hz", self.onset_detector, "max_hz"
+            ),
         ]
 
     def enable_fft_debug_data(self, enable: bool) -> None:
@@ -266,11 +340,7 @@ class FFTManager(object):
 
         self.stop_fft()
         try:
-            self.weighting = db_to_amplitude(
-                A_weighting(
-                    mel_frequencies(self.n_mels, fmin=0, fmax=self.audio_cap.rate / 2)
-                )
-            )
+            self.setup_spectral()
 
             for d in self.downstream:
                 d.set_subdivisions_and_memory(self.n_mels, d.memory_length)
@@ -282,6 +352,25 @@ class FFTManager(object):
             print(e, flush=True)
             self.stop_fft()
 
+    def setup_spectral(self) -> SpectralFrontEnd:
+        """(Re)build the spectral front end, the streaming beat tracker and
+        HPSS, and reset the onset detector, for the capture's current rate."""
+        self.spectral = SpectralFrontEnd(
+            self.audio_cap.chunk, self.audio_cap.rate, self.n_mels
+        )
+        self.beat_tracker = StreamingBeatTracker(
+            self.n_mels,
+            self.audio_cap.rate / self.audio_cap.chunk,
+            self.audio_cap.window_len,
+        )
+        self.hpss = StreamingHPSS(self.audio_cap.chunk, self.audio_cap.rate)
+        self.onset_detector.reset(
+            self.audio_cap.rate / self.audio_cap.chunk, self.spectral.frequencies
+        )
+        # Warm the new trackers up on the whole window next analyse()
+        self.analysed_end = 0
+        return self.spectral
+
     def audio_ready(self) -> bool:
         # Require a full audio window before any FFT / beat-track work
         # runs. With a partially-filled window the RMS / beat tracker can
@@ -289,14 +378,14 @@ class FFTManager(object):
         # n_fft warnings on the too-short signal.
         if self.audio_cap is None or self.audio_cap.stream is None:
             return False
-        return len(self.audio_cap.window) >= self.audio_cap.window_len
+        return len(self.audio_cap.ring) >= self.audio_cap.window_len
 
-    def update_rms(self, win: List[np.ndarray]) -> None:
+    def update_rms(self, chunk: np.ndarray) -> None:
         if not self.audio_ready():
             return
 
         n_rms_chunks = min(
-            len(win) - 1,
+            self.audio_cap.window_len - 1,
             max(
                 1,
                 int(self.rms_window_secs * self.audio_cap.rate / self.audio_cap.chunk),
@@ -304,7 +393,7 @@ class FFTManager(object):
         )
 
         # Incremental sum-of-squares: push new chunk, trim to window, no concatenation
-        self.rms_ss.append(float(np.dot(win[-1], win[-1])))
+        self.rms_ss.append(float(np.dot(chunk, chunk)))
         while len(self.rms_ss) > n_rms_chunks:
             self.rms_ss.popleft()
         self.current_rms = math.sqrt(
@@ -317,28 +406,72 @@ class FFTManager(object):
             thres=self.energy_threshold,
         )
 
-        if self.current_rms >= self.energy_threshold:
+        self.rms_valid = self.current_rms >= self.energy_threshold
+        if self.rms_valid:
             for b in self.bpms:
                 b.rms_valid = True
         else:
+            self.bpm_valid = False
             for b in self.bpms:
                 b.rms_valid = False
                 b.bpm_valid = False
             self.uidb["reported_tempo"] = "n/a"
             self.uidb["bpm_valid"] = "n/a"
 
-    def run_beat_track(self, win: List[np.ndarray], win_ts: List[float]) -> None:
-        if not self.bpms or not self.bpms[0].rms_valid:
+    def run_beat_track(
+        self, ring: SampleRing, end: int, estimate: Optional[BeatEstimate] = None
+    ) -> None:
+        """Beat track the audio window ending at chunk count `end`.
+
+        With an `estimate` from the streaming tracker its tempo, beat phase
+        and onset envelope are used as they are; without one (beat_mode
+        "librosa") the whole window goes through librosa's onset_strength
+        and beat_track. Either way the onset metrics below run here, off the
+        FFT thread.
+
+        Reads the window as a view of the ring; if the capture thread has
+        lapped it by the time the tracker is done the result is dropped.
+        """
+        if not self.rms_valid:
             return
 
         compute_start_time = time.monotonic()
 
-        y = np.concatenate(win)
+        n_chunks = self.audio_cap.window_len
+        y = ring.samples(n_chunks, end)
+        end_ts = float(ring.timestamps(1, end)[0])
         sr = self.audio_cap.rate
-        hop_length = 512  # librosa default
 
-        # Compute onset envelope once; reuse for both beat_track and alignment score
-        oenv = onset_strength(y=y, sr=sr)
+        # Samples from the latest beat to the end of the window
+        samples_after: Optional[float] = None
+        # Frames onset_detect looks ahead of a peak; 1 is librosa's default
+        post_max = 1
+        if estimate is None:
+            hop_length = 512  # librosa default
+            # Compute onset envelope once; reuse for beat_track and the metrics
+            oenv = onset_strength(y=y, sr=sr)
+            reported_tempo, beat_frames = beat_track(
+                onset_envelope=oenv,
+                sr=sr,
+                units="frames",
+                start_bpm=130,
+                tightness=200,
+            )
+            # librosa >= 0.10 returns the tempo as a 1-element array
+            tempo = float(np.atleast_1d(reported_tempo)[0])
+            if len(beat_frames) > 0:
+                samples_after = max(0, len(y) - int(beat_frames[-1]) * hop_length)
+        else:
+            # One envelope frame per chunk; a beat lands mid frame on average
+            hop_length = self.audio_cap.chunk
+            oenv = estimate.envelope / STREAMING_ONSET_REF
+            tempo = estimate.tempo
+            samples_after = (estimate.beat_frames_ago + 0.5) * hop_length
+            # librosa's envelope is smoothed by its overlapping frames, this
+            # one isn't: look ~30 ms ahead before taking a peak, or a noise
+            # wiggle just before an onset takes its place
+            post_max = int(0.03 * sr // hop_length) + 1
+
         # Discrete onset frames, computed once and reused by the business /
         # regularity metrics below. `delta` is bumped well above the librosa
         # default (0.07) so the adaptive picker requires a larger jump above
@@ -348,18 +481,15 @@ class FFTManager(object):
             sr=sr,
             hop_length=hop_length,
             units="frames",
+            post_max=post_max,
         )
-        reported_tempo, beat_frames = beat_track(
-            onset_envelope=oenv,
-            sr=sr,
-            units="frames",
-            start_bpm=130,
-            tightness=200,
-        )
+        if not ring.intact(end, n_chunks):
+            if self.debug:
+                print("DEBUG beat track: audio window overwritten, skipped", flush=True)
+            return
 
         # reported_tempo = fold_tempo(float(reported_tempo))
 
-        tempo = float(reported_tempo)
         ema_input = self.resolve_tempo(tempo)
         self.smoothed_bpm = (
             self.tempo_alpha * ema_input + (1 - self.tempo_alpha) * self.smoothed_bpm
@@ -368,15 +498,16 @@ class FFTManager(object):
         # Compute beat time and publish to generators. The BPM generator's
         # update_bpm_phase handles reanchoring and PLL smoothing internally.
         beat_time_ms: Optional[float] = None
-        if len(beat_frames) > 0 and win_ts and self.smoothed_bpm > 0:
-            last_beat_sample = int(beat_frames[-1]) * hop_length
-            samples_after = max(0, len(y) - last_beat_sample)
-            end_ts = win_ts[-1]
+        if samples_after is not None and self.smoothed_bpm > 0:
             beat_time_ms = (end_ts - samples_after / sr) * 1000.0
 
             current_time = time.monotonic()
             if current_time - self.last_bpm_publish_time >= self.bpm_publish_interval:
                 self.last_bpm_publish_time = current_time
+                if self.bus is not None:
+                    self.bus.write_beat(
+                        self.smoothed_bpm, beat_time_ms, self.phase_alpha
+                    )
                 for b in self.bpms:
                     b.update_bpm_phase(
                         self.smoothed_bpm, beat_time_ms, self.phase_alpha
@@ -385,8 +516,10 @@ class FFTManager(object):
         self.raw_bpm_history.append(tempo)
         self.bpm_history.append(self.smoothed_bpm)
 
-        # Audio character metrics — see _compute_* helpers below.
-        hp_ratio = self.compute_harmonic_percussive_ratio(y, sr)
+        # Audio character metrics — see _compute_* helpers below. The
+        # harmonic / percussive ratio is kept up to date per chunk by
+        # StreamingHPSS on the FFT thread.
+        hp_ratio = self.hpss.ratio() if self.hpss is not None else 1.0
         business, kept_onset_frames = self.compute_business(
             onset_frames, oenv, sr, hop_length
         )
@@ -409,13 +542,13 @@ class FFTManager(object):
         regularity_pass = len(recent_regularity_vals) == gate_window and all(
             v >= self.min_regularity for v in recent_regularity_vals
         )
-        bpm_valid = business_pass and regularity_pass and self.clusters_valid
+        self.bpm_valid = business_pass and regularity_pass and self.clusters_valid
         for b in self.bpms:
-            b.bpm_valid = bpm_valid
+            b.bpm_valid = self.bpm_valid
 
         compute_time = time.monotonic() - compute_start_time
 
-        self.uidb["reported_tempo"] = reported_tempo
+        self.uidb["reported_tempo"] = tempo
         self.uidb["bpm_valid"] = "b={b:.2f}{bs} r={r:.2f}{rs} c={cs}".format(
             b=business,
             bs="✓" if business_pass else "✗",
@@ -432,37 +565,6 @@ class FFTManager(object):
             self.uidb["beat_avg_time"] * 0.9 + compute_time * 1000 * 0.1
         )
 
-    def compute_harmonic_percussive_ratio(self, y: np.ndarray, sr: int) -> float:
-        """
-        >1 means percussive energy dominates (drums, beats),
-        <1 means harmonic / sustained energy dominates (pads, vocals, ambient).
-
-        Optimised for tick-rate compute budget:
-          - operate on the last ~2 s only (local character, not whole window),
-          - downsample to 8 kHz before HPSS (kicks/snares/hats are well below
-            4 kHz; HPSS cost scales linearly with sample count),
-          - use a smaller median kernel and STFT than librosa defaults.
-        """
-        tail_secs = 2.0
-        tail_samples = int(tail_secs * sr)
-        y_tail = y[-tail_samples:] if len(y) > tail_samples else y
-
-        target_sr = 8000
-        if sr > target_sr:
-            y_tail = resample(y_tail, orig_sr=sr, target_sr=target_sr)
-
-        # Guard against too-short tails (early ticks before the audio window
-        # has filled): librosa warns when n_fft > len(y). Skip the analysis
-        # and return a neutral 1.0 ratio rather than emit the warning.
-        n_fft = 1024
-        if len(y_tail) < n_fft:
-            return 1.0
-
-        y_h, y_p = hpss(y_tail, kernel_size=17, n_fft=n_fft)
-        rms_h = float(np.sqrt(np.mean(y_h * y_h)) + 1e-9)
-        rms_p = float(np.sqrt(np.mean(y_p * y_p)) + 1e-9)
-        return rms_p / rms_h
-
     def compute_business(
         self,
         onset_frames: np.ndarray,
@@ -512,22 +614,54 @@ class FFTManager(object):
         if not self.audio_ready():
             return None
 
-        stft_mag = np.abs(stft(y=chunk, n_fft=self.audio_cap.chunk, center=False))
-        fftData = melspectrogram(
-            y=chunk,
-            S=stft_mag**2,
-            sr=self.audio_cap.rate,
-            n_fft=self.audio_cap.chunk,
-            center=False,
-            n_mels=self.n_mels,
-        )
+        spectral = self.spectral
+        if spectral is None or spectral.rate != self.audio_cap.rate:
+            # Audio was (re)configured after setup_fft
+            spectral = self.setup_spectral()
 
         # Loudness-invariant: mel bins are |STFT|² so they scale with rms²;
         # divide by rms² to remove input-loudness dependence, then by an empirical
         # reference and clip to [0, 1] for downstream consumers.
-        weighted = fftData[:, 0] * self.weighting
-        normalized = weighted / (self.current_rms**2 + 1e-12)
-        return normalized / MEL_NORM_REF
+        return spectral.forward(
+            chunk, scale=1.0 / ((self.current_rms**2 + 1e-12) * MEL_NORM_REF)
+        )
+
+    def analyse(self, ring: SampleRing, end: int) -> Optional[np.ndarray]:
+        """forward() every chunk up to `end` not analysed yet, oldest first,
+        and push each into the streaming beat tracker, onset detector and
+        HPSS; returns the newest chunk's bands. An onset in any of the chunks
+        punches the onset generators right away, ahead of the FFT
+        generators, and sets `onset`.
+
+        Usually that is just the newest chunk, but if this thread fell
+        behind the capture the skipped ones are caught up (at most a
+        window's worth) so their histories have no gaps.
+        """
+        first = max(self.analysed_end, end - self.audio_cap.window_len)
+        # A rebuilt ring restarts its count below analysed_end
+        if first >= end:
+            first = end - 1
+        fft_data = None
+        self.onset = False
+        for i in range(first, end):
+            fft_data = self.forward(ring.samples(1, i + 1))
+            spectral = self.spectral
+            if fft_data is None or spectral is None:
+                return None
+            # Unscaled mel: the rms normalisation would put its own steps in
+            # the flux
+            if self.beat_tracker is not None:
+                self.beat_tracker.push(spectral.mel)
+            if self.onset_detector.push(spectral.mel):
+                self.onset = True
+            if self.hpss is not None:
+                self.hpss.push(spectral.power)
+        self.analysed_end = end
+        if self.onset:
+            for o in self.onsets:
+                o.punch()
+            self.uidb["onsets"] = self.onset_detector.count
+        return fft_data
 
     def run_fwd(self) -> None:
         self.uidb["fft_avg_time"] = 0
@@ -554,23 +688,28 @@ class FFTManager(object):
             if not self.audio_ready():
                 continue
 
-            # Stable shallow copy of the window and timestamps for this iteration.
-            # Required for deque thread-safety and so the beat executor receives
-            # a snapshot that won't be mutated while beat_track runs.
-            win = list(self.audio_cap.window)
-            win_ts = list(self.audio_cap.window_ts)
+            # Snapshot of the capture position for this iteration. Everything
+            # below reads views of the ring up to it, no copies; the beat
+            # executor gets the same snapshot.
+            ring = self.audio_cap.ring
+            end = ring.chunks
+            chunk = ring.samples(1, end)
 
             # update_rms must run before forward() so forward() can divide by
             # the current (smoothed) rms² to make the mel output loudness-invariant.
-            self.update_rms(win)
-            fft_data = self.forward(win[-1])
+            self.update_rms(chunk)
+            fft_data = self.analyse(ring, end)
 
             now = time.monotonic()
             if now - self.last_beat_track_time >= self.beat_track_interval:
                 if self._beat_future is None or self._beat_future.done():
                     self.last_beat_track_time = now
+                    estimate = None
+                    if self.beat_mode != "librosa" and self.beat_tracker is not None:
+                        # Snapshot here: the tracker keeps moving on this thread
+                        estimate = self.beat_tracker.estimate()
                     self._beat_future = self._beat_executor.submit(
-                        self.run_beat_track, win, win_ts
+                        self.run_beat_track, ring, end, estimate
                     )
 
             if fft_data is None:
@@ -585,8 +724,22 @@ class FFTManager(object):
                         )
                 continue
 
+            # Stamped with when the chunk was captured, not when it was
+            # analysed, so latency is measured from the sound itself
+            millis = float(ring.timestamps(1, end)[0]) * 1000
             for d in self.downstream:
-                d.forward(fft_data, time.time() * 1000)
+                d.forward(fft_data, millis)
+            self.latency.frame(millis)
+            if self.bus is not None:
+                self.bus.write_frame(
+                    millis,
+                    fft_data,
+                    rms=self.current_rms,
+                    rms_valid=self.rms_valid,
+                    bpm_valid=self.bpm_valid,
+                    onset=self.onset,
+                    visualizing=self.send_fft_debug_data,
+                )
 
             if self.debug:
                 debug_fft_tick += 1
@@ -636,12 +789,10 @@ class FFTManager(object):
                 self.rms_history.append(self.current_rms)
 
                 if self.send_fft_debug_data:
-                    self.osc.send_osc(
-                        "/visualizer/fftgen_1", self.downstream[0].value()
-                    )
-                    self.osc.send_osc(
-                        "/visualizer/fftgen_2", self.downstream[1].value()
-                    )
+                    for i, d in enumerate(self.downstream[:2]):
+                        self.osc.send_osc(
+                            "/visualizer/fftgen_{}".format(i + 1), d.value()
+                        )
 
                     self.osc.send_osc("/visualizer/rms_history", list(self.rms_history))
                     self.osc.send_osc("/visualizer/bpm_history", list(self.bpm_history))
@@ -659,6 +810,8 @@ class FFTManager(object):
                         "/visualizer/regularity", list(self.regularity_history)
                     )
                     self.uidb.update_ui()
+                    # Capture latency and overflow counts
+                    self.audio_cap.uidb.update_ui()
 
             compute_time = time.monotonic() - compute_start_time
 
@@ -668,6 +821,22 @@ class FFTManager(object):
                 self.uidb["fft_avg_time"] * 0.9 + compute_time * 1000 * 0.1
             )
 
+    def connect_interface(self, name: str) -> None:
+        """Open the first input device whose name contains `name`
+        (case-insensitive) and start capture and analysis on it."""
+        found = self.audio_cap.find_input(name)
+        if found is None:
+            print("No audio input device matched '{}'".format(name), flush=True)
+            return
+        index, device = found
+        print(
+            "Auto-connecting audio interface '{}' (index {})".format(device, index),
+            flush=True,
+        )
+        self.audio_cap.setup_audio(index)
+        self.audio_cap.start_audio()
+        self.start_fft()
+
     def start_fft(self) -> None:
         if self.fft_thread is not None:
             self.stop_fft()
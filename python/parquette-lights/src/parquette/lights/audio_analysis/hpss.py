@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingHPSS(object):
+    """Harmonic / percussive energy ratio of the recent audio, updated one
+    frame at a time from the spectral front end's power spectra.
+
+    Median-filter HPSS as librosa.effects.hpss does it: a median along
+    time per bin is the harmonic estimate, a median along frequency per
+    frame the percussive one, and each frame's energy is split between
+    them by the soft masks H² / (H² + P²) and P² / (H² + P²). Medians
+    commute with squaring, so on power spectra those are just H / (H + P)
+    and P / (H + P) of the medians of power.
+
+    The time median is centred, so push() finishes the frame
+    `time_kernel // 2` frames back. Each bin keeps its window of that
+    many frames sorted: the frame leaving is swapped for the one
+    arriving and the nearly sorted rows re-sorted with timsort, which is
+    linear on them. Only the two energies per frame are kept, over the
+    last `tail_secs`, since the ratio is all the beat thread needs.
+
+    Bins above `max_hz` are left out, like the 8 kHz resample this
+    replaces: kicks, snares and hats are well below it.
+    """
+
+    def __init__(
+        self,
+        chunk: int,
+        rate: int,
+        *,
+        max_hz: float = 4000.0,
+        time_kernel_secs: float = 0.5,
+        freq_kernel: int = 17,
+        tail_secs: float = 2.0,
+    ) -> None:
+        frame_rate = rate / chunk
+        self.bins = min(chunk // 2 + 1, int(max_hz * chunk / rate) + 1)
+        # Odd kernels, so each median has a centre
+        self.time_kernel = max(3, int(time_kernel_secs * frame_rate) | 1)
+        self.freq_kernel = max(3, freq_kernel | 1)
+        self.frames = 0
+
+        # Last time_kernel frames, slot i % time_kernel, and the same values
+        # sorted per bin
+        self._frames = np.zeros((self.time_kernel, self.bins))
+        self._sorted = np.zeros((self.bins, self.time_kernel))
+        self._rows = np.arange(self.bins)
+
+        # Centre frame with `reflect` edges (scipy's median_filter default)
+        edge = self.freq_kernel // 2
+        self._padded = np.zeros(self.bins + 2 * edge)
+        self._windows = sliding_window_view(self._padded, self.freq_kernel)
+        self._neighbours = np.zeros((self.bins, self.freq_kernel))
+        # H + P and a mask, per bin
+        self._total = np.zeros(self.bins)
+        self._mask = np.zeros(self.bins)
+
+        self._tail = max(1, int(tail_secs * frame_rate))
+        self._energy_h = np.zeros(self._tail)
+        self._energy_p = np.zeros(self._tail)
+        # Parseval: summed |X|² over a frame is chunk² times its mean square
+        # sample, so this takes the tail's energies back to sample units
+        self._scale = 1.0 / (self._tail * chunk * chunk)
+
+    def push(self, power: np.ndarray) -> None:
+        """Add one frame's power spectrum (at least `bins` long)."""
+        new = power[: self.bins]
+        slot = self.frames % self.time_kernel
+        # Swap the leaving frame's value for the new one in every bin's
+        # sorted window, then restore the order
+        leaving = np.argmax(self._sorted == self._frames[slot][:, np.newaxis], axis=1)
+        self._sorted[self._rows, leaving] = new
+        self._sorted.sort(axis=1, kind="stable")
+        self._frames[slot] = new
+        self.frames += 1
+
+        harmonic = self._sorted[:, self.time_kernel // 2]
+        centre = self._frames[
+            (self.frames - 1 - self.time_kernel // 2) % self.time_kernel
+        ]
+        edge = self.freq_kernel // 2
+        self._padded[edge : edge + self.bins] = centre
+        self._padded[:edge] = centre[edge - 1 :: -1]
+        self._padded[edge + self.bins :] = centre[: -edge - 1 : -1]
+        # Median of each bin's neighbourhood, partitioned in place
+        self._neighbours[...] = self._windows
+        self._neighbours.partition(edge, axis=1)
+        percussive = self._neighbours[:, edge]
+
+        np.add(harmonic, percussive, out=self._total)
+        tail = self.frames % self._tail
+        self._energy_h[tail] = self._split(centre, harmonic)
+        self._energy_p[tail] = self._split(centre, percussive)
+
+    def _split(self, centre: np.ndarray, part: np.ndarray) -> float:
+        """Energy left in `centre` by the mask part / total, applied to its
+        magnitudes (an even split where both are zero, as librosa does)."""
+        self._mask.fill(0.5)
+        np.divide(part, self._total, out=self._mask, where=self._total > 0)
+        np.square(self._mask, out=self._mask)
+        return float(np.dot(centre, self._mask))
+
+    def ratio(self) -> float:
+        """rms(percussive) / rms(harmonic) over the tail: >1 means
+        percussive energy dominates (drums, beats), <1 harmonic /
+        sustained energy (pads, vocals, ambient)."""
+        rms_h = math.sqrt(float(self._energy_h.sum()) * self._scale) + 1e-9
+        rms_p = math.sqrt(float(self._energy_p.sum()) * self._scale) + 1e-9
+        return rms_p / rms_h
@@ -0,0 +1,98 @@
+from typing import List
+
+import time
+
+from ..generators import BPMGenerator
+from ..osc import OSCManager, OSCParam, UIDebugFrame
+
+
+class LatencyCompensation(object):
+    """Audio-to-light latency, measured and (for the beat) compensated.
+
+    Frames reach the generators stamped with their capture time, so
+    frame() gets how long capture plus analysis took, and output(),
+    called straight after the DMX submit, how long until the newest
+    frame was on the wire. `output_delay_ms` is what comes after that and
+    can't be measured from here: the interface's frame period and the
+    fixtures' own response, set by ear or with a camera.
+
+    With `mode` "compensate" the BPM generators run `output_delay_ms`
+    ahead, so the pulse is sent early enough to land on the beat. Beat
+    phase comes from capture times already, so the capture and analysis
+    part needs no lead. FFT and onset features can't be predicted: they
+    are as early as the newest frame, and are measured only.
+    """
+
+    def __init__(
+        self,
+        osc: OSCManager,
+        *,
+        mode: str = "off",
+        output_delay_ms: float = 25.0,
+        report_interval: float = 0.5,
+        smoothing: float = 0.05,
+    ) -> None:
+        self.mode = mode
+        self.output_delay_ms = output_delay_ms
+        self.report_interval = report_interval
+        self.smoothing = smoothing
+
+        # Capture time of the newest frame handed to the generators
+        self.latest_capture_ms: float = 0.0
+        # Smoothed capture -> generators and capture -> DMX submit
+        self.analysis_ms: float = 0.0
+        self.dmx_ms: float = 0.0
+        self.last_report: float = 0.0
+        self.uidb = UIDebugFrame(osc, "/debug/latency_frame")
+
+    @property
+    def lead_ms(self) -> float:
+        """How far ahead the BPM generators run."""
+        if self.mode == "compensate":
+            return self.output_delay_ms
+        return 0.0
+
+    def _smooth(self, average: float, sample: float) -> float:
+        if average == 0.0:
+            return sample
+        return average + self.smoothing * (sample - average)
+
+    def frame(self, capture_ms: float) -> None:
+        """A frame captured at `capture_ms` reached the generators."""
+        self.latest_capture_ms = capture_ms
+        self.analysis_ms = self._smooth(
+            self.analysis_ms, time.time() * 1000 - capture_ms
+        )
+
+    def output(self, bpms: List[BPMGenerator]) -> None:
+        """The mix was just submitted to DMX: measure, apply the lead and
+        report. Compute loop only."""
+        if self.latest_capture_ms > 0:
+            self.dmx_ms = self._smooth(
+                self.dmx_ms, time.time() * 1000 - self.latest_capture_ms
+            )
+
+        lead = self.lead_ms
+        for b in bpms:
+            b.lead_ms = lead
+
+        now = time.monotonic()
+        if now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+        self.uidb["latency_analysis"] = "{:.1f}ms".format(self.analysis_ms)
+        self.uidb["latency_dmx"] = "{:.1f}ms".format(self.dmx_ms)
+        self.uidb["latency_total"] = "{:.1f}ms".format(
+            self.dmx_ms + self.output_delay_ms
+        )
+        self.uidb["latency_mode"] = "{} (lead {:.0f}ms)".format(self.mode, lead)
+        self.uidb.update_ui()
+
+    def config_params(self, osc: OSCManager) -> List[OSCParam]:
+        """Preset-saved /audio_config/... binds for the compensation."""
+        return [
+            OSCParam.bind(osc, "/audio_config/latency_mode", self, "mode"),
+            OSCParam.bind(
+                osc, "/audio_config/output_delay_ms", self, "output_delay_ms"
+            ),
+        ]
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+from .beat_tracker import MEL_FLOOR
+
+
+class OnsetDetector(object):
+    """Transients from the mel frames, decided as each frame arrives.
+
+    push() takes a frame's mel power and averages the dB rise since the
+    previous frame over the bands centred below `max_hz` into an onset
+    strength: kicks and bass hits put their energy there, while
+    broadband hiss only adds small, evenly spread rises. Bands are
+    floored `range_db` below the frame's loudest, as power_to_db's
+    top_db does, so hiss far under the music doesn't count at all.
+
+    An onset is a strength that clears an adaptive threshold, the mean of
+    the last `history_secs` of strengths plus `sensitivity` of their
+    standard deviations, and never less than `min_strength` dB. There is
+    no look-ahead, so an onset is reported on the frame it starts in;
+    `min_interval_secs` then holds off the rest of the same hit, which
+    often spans two frames.
+    """
+
+    def __init__(
+        self,
+        *,
+        sensitivity: float = 3.0,
+        min_strength: float = 4.0,
+        max_hz: float = 300.0,
+        range_db: float = 60.0,
+        history_secs: float = 1.0,
+        min_interval_secs: float = 0.06,
+    ) -> None:
+        self.sensitivity = sensitivity
+        self.min_strength = min_strength
+        self.max_hz = max_hz
+        self.range_db = range_db
+        self.history_secs = history_secs
+        self.min_interval_secs = min_interval_secs
+        self.count = 0
+        self.strength = 0.0
+        self.reset(1.0, np.zeros(1))
+
+    def reset(self, frame_rate: float, frequencies: np.ndarray) -> None:
+        """Size the history for `frame_rate` frames per second and the
+        bands for mel centre `frequencies`, and forget what came before."""
+        self.frame_rate = frame_rate
+        self.frequencies = frequencies
+        self._history = np.zeros(max(2, int(self.history_secs * frame_rate)))
+        self._filled = 0
+        self._db = np.zeros(len(frequencies))
+        self._prev_db = np.zeros(len(frequencies))
+        self.frames = 0
+        self._last_onset = -math.inf
+
+    def threshold(self) -> float:
+        history = self._history[: self._filled]
+        if len(history) == 0:
+            return self.min_strength
+        level = float(history.mean()) + self.sensitivity * float(history.std())
+        return max(self.min_strength, level)
+
+    def push(self, mel: np.ndarray) -> bool:
+        """Add one frame's mel power; True if an onset starts in it."""
+        np.maximum(mel, MEL_FLOOR, out=self._db)
+        np.log10(self._db, out=self._db)
+        self._db *= 10.0
+        np.maximum(self._db, self._db.max() - self.range_db, out=self._db)
+
+        # max_hz is a live knob, so the bands are picked every frame; the
+        # lowest always counts
+        bands = max(1, int(np.searchsorted(self.frequencies, self.max_hz)))
+        if self.frames == 0:
+            self.strength = 0.0
+        else:
+            rise = self._db[:bands] - self._prev_db[:bands]
+            self.strength = float(np.maximum(rise, 0.0).mean())
+        self._db, self._prev_db = self._prev_db, self._db
+
+        onset = (
+            self.strength >= self.threshold()
+            and (self.frames - self._last_onset) / self.frame_rate
+            >= self.min_interval_secs
+        )
+        if onset:
+            self._last_onset = self.frames
+            self.count += 1
+
+        self._history[self.frames % len(self._history)] = self.strength
+        self._filled = min(self._filled + 1, len(self._history))
+        self.frames += 1
+        return onset
@@ -0,0 +1,293 @@
+from typing import Any, Dict, List, Optional, cast
+
+import copy
+import multiprocessing
+import queue
+import signal
+import time
+from multiprocessing.connection import Connection
+from threading import Lock
+
+from ..dmx import DMXManager
+from ..generators import BPMGenerator, FFTGenerator, OnsetGenerator
+from ..osc import OSCManager, OSCParam
+from .audio import AudioCapture
+from .feature_bus import (
+    BEAT_ALPHA,
+    BEAT_BPM,
+    BEAT_TIME_MS,
+    FRAME_BPM_VALID,
+    FRAME_FIELDS,
+    FRAME_MILLIS,
+    FRAME_ONSET,
+    FRAME_RMS_VALID,
+    FRAME_VISUALIZING,
+    FeatureBus,
+)
+from .fft import STREAM_ADDRESSES, FFTManager
+from .latency import LatencyCompensation
+
+
+class AnalysisProcess(object):
+    """Audio capture, FFT and beat tracking in a child process.
+
+    Stands in for FFTManager on the lighting side (see FeatureSource):
+    the child runs AudioCapture and FFTManager exactly as the server
+    would, publishing every mel frame, the RMS / BPM gates, onsets and
+    each beat to a FeatureBus, and poll() feeds those to downstream, bpms
+    and onsets once per tick. Neither the GIL nor librosa's work then holds up the mix,
+    and the capture thread can't be starved by it either.
+
+    The child's OSC goes through the parent: inbound /audio_config/...
+    and visualizer messages are forwarded down a pipe and dispatched
+    there, and what the child sends comes back on a queue that poll()
+    drains into the real OSCManager. The preset-saved tuning params are
+    proxied, so presets save and restore them as before.
+    """
+
+    def __init__(
+        self,
+        osc: OSCManager,
+        dmx: DMXManager,
+        *,
+        chunk: int = 512,
+        audio_window_secs: float = 5,
+        rms_window_secs: float = 1.0,
+        capture_mode: str = "callback",
+        analysis_rate: Optional[int] = 22050,
+        debug: bool = False,
+        startup_timeout: float = 60.0,
+    ) -> None:
+        self.osc = osc
+        self.dmx = dmx
+        self.debug = debug
+        self.downstream: List[FFTGenerator] = []
+        self.bpms: List[BPMGenerator] = []
+        self.onsets: List[OnsetGenerator] = []
+        # Compensation happens where the generators are, so it isn't proxied
+        self.latency = LatencyCompensation(osc)
+        self.last_debug_update: float = 0.0
+        self.visualizing = False
+
+        self.bus = FeatureBus(chunk // 8)
+
+        # spawn, not fork: the parent has OSC server and DMX threads running
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._send_lock = Lock()
+        self._outbox = context.Queue()
+        self.process = context.Process(
+            target=run_analysis,
+            args=(
+                child_conn,
+                self._outbox,
+                self.bus.name,
+                {
+                    "chunk": chunk,
+                    "audio_window_secs": audio_window_secs,
+                    "rms_window_secs": rms_window_secs,
+                    "capture_mode": capture_mode,
+                    "analysis_rate": analysis_rate,
+                    "debug": debug,
+                },
+            ),
+            daemon=True,
+            name="audio-analysis",
+        )
+        self.process.start()
+        # So recv() sees EOF if the child dies
+        child_conn.close()
+
+        if not self._conn.poll(startup_timeout):
+            self.close()
+            raise RuntimeError("Audio analysis process did not start")
+        hello = self._conn.recv()
+        self._params: Dict[str, Any] = hello["params"]
+
+        for addr in hello["addresses"]:
+            if addr not in self._params:
+                self.osc.dispatcher.map(addr, self._forward)
+        for addr in STREAM_ADDRESSES:
+            self.osc.route_stream(addr, "/visualizer/enable_fft_spectrum")
+
+    def _send(self, message: tuple) -> None:
+        with self._send_lock:
+            try:
+                self._conn.send(message)
+            except (BrokenPipeError, OSError) as e:
+                print("Audio analysis process gone", e, flush=True)
+
+    def _forward(self, addr: str, *args: Any) -> None:
+        self._send(("osc", addr, list(args)))
+
+    def config_params(self, osc: OSCManager) -> List[OSCParam]:
+        """The child FFTManager's config_params, proxied: the value is the
+        last one sent down, the default the child's."""
+        params = []
+        for addr, default in self._params.items():
+
+            def dispatch(a: str, *args: Any) -> None:
+                self._params[a] = args[0] if len(args) == 1 else list(args)
+                self._forward(a, *args)
+
+            params.append(
+                OSCParam(
+                    osc,
+                    addr,
+                    lambda addr=addr: self._params[addr],
+                    dispatch,
+                    default_value=default,
+                )
+            )
+        return params
+
+    def connect_interface(self, name: str) -> None:
+        self._send(("connect", name))
+
+    def poll(self) -> None:
+        """Relay the child's OSC and apply the features it published since
+        the last call. Called once per compute tick."""
+        self.bus.passthrough = self.dmx.passthrough
+
+        while True:
+            try:
+                addr, args = self._outbox.get_nowait()
+            except queue.Empty:
+                break
+            self.osc.send_osc(addr, args)
+
+        frames = self.bus.read_frames()
+        # Onsets first: they are the latency-critical part
+        if any(row[FRAME_ONSET] for row in frames):
+            for o in self.onsets:
+                o.punch()
+        for row in frames:
+            bands = row[FRAME_FIELDS:]
+            for d in self.downstream:
+                if d.subdivisions != len(bands):
+                    d.set_subdivisions_and_memory(len(bands), d.memory_length)
+                d.forward(bands, float(row[FRAME_MILLIS]))
+        if frames:
+            latest = frames[-1]
+            rms_valid = bool(latest[FRAME_RMS_VALID])
+            bpm_valid = bool(latest[FRAME_BPM_VALID])
+            for b in self.bpms:
+                b.rms_valid = rms_valid
+                b.bpm_valid = bpm_valid
+            self.visualizing = bool(latest[FRAME_VISUALIZING])
+            self.latency.frame(float(latest[FRAME_MILLIS]))
+
+        for row in self.bus.read_beats():
+            for b in self.bpms:
+                b.update_bpm_phase(
+                    float(row[BEAT_BPM]),
+                    float(row[BEAT_TIME_MS]),
+                    float(row[BEAT_ALPHA]),
+                )
+
+        # The generators live here, so their visualizer values are sent
+        # from here rather than by the child's FFTManager
+        current_time = time.monotonic()
+        if self.visualizing and current_time - self.last_debug_update >= 0.1:
+            self.last_debug_update = current_time
+            for i, d in enumerate(self.downstream[:2]):
+                self.osc.send_osc("/visualizer/fftgen_{}".format(i + 1), d.value())
+
+    def close(self) -> None:
+        self._send(("stop",))
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        if self.debug and self.bus.dropped:
+            print(
+                "DEBUG audio analysis: {} frames dropped".format(self.bus.dropped),
+                flush=True,
+            )
+        self.bus.close()
+        self.bus.unlink()
+
+
+class _ForwardingOSC(OSCManager):
+    """The child's OSCManager: everything sent is queued for the parent."""
+
+    def __init__(self, outbox: Any) -> None:
+        super().__init__()
+        self.outbox = outbox
+
+    def send_osc(self, address: str, args: Any) -> None:
+        # snapshot now, callers reuse and mutate their lists
+        self.outbox.put((address, copy.copy(args)))
+
+
+class _BusPassthrough(object):
+    """The parent's DMX passthrough flag, read from the bus, in place of
+    the DMXManager the capture and FFT loops check it on."""
+
+    def __init__(self, bus: FeatureBus) -> None:
+        self.bus = bus
+
+    @property
+    def passthrough(self) -> bool:
+        return self.bus.passthrough
+
+
+def run_analysis(
+    conn: Connection, outbox: Any, bus_name: str, options: Dict[str, Any]
+) -> None:
+    """Entry point of the analysis process."""
+    # Ctrl-C reaches the whole process group; the parent stops us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    chunk = options["chunk"]
+    bus = FeatureBus(chunk // 8, name=bus_name)
+    osc = _ForwardingOSC(outbox)
+    dmx = cast(DMXManager, _BusPassthrough(bus))
+
+    audio_capture = AudioCapture(
+        osc,
+        chunk=chunk,
+        audio_window_secs=options["audio_window_secs"],
+        debug=options["debug"],
+        capture_mode=options["capture_mode"],
+        analysis_rate=options["analysis_rate"],
+    )
+    audio_capture.dmx = dmx
+    fft_manager = FFTManager(
+        osc,
+        audio_capture,
+        dmx,
+        rms_window_secs=options["rms_window_secs"],
+        debug=options["debug"],
+    )
+    fft_manager.bus = bus
+
+    params = fft_manager.config_params(osc)
+    conn.send(
+        {
+            "addresses": osc.registered_addresses(),
+            "params": {p.addr: p.default_value for p in params},
+        }
+    )
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == "osc":
+                _, addr, args = message
+                osc.dispatcher.call_handlers_for_packet(
+                    OSCManager.build_message(addr, args).dgram, ("127.0.0.1", 0)
+                )
+            elif message[0] == "connect":
+                fft_manager.connect_interface(message[1])
+            elif message[0] == "stop":
+                break
+    finally:
+        fft_manager.stop_fft()
+        audio_capture.terminate()
+        # Don't wait on a parent that has stopped draining the queue
+        outbox.cancel_join_thread()
+        bus.close()
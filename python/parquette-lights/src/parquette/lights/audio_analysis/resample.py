@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class PolyphaseResampler(object):
+    """Streaming rational resampler from the device rate to the analysis
+    rate, fed one capture buffer at a time.
+
+    The rate ratio reduces to up / down (48 kHz to 22.05 kHz is 147 /
+    320). Conceptually the input is zero-stuffed by `up`, low-passed below
+    the lower of the two Nyquists and kept every `down`th sample; the
+    polyphase form only ever computes the kept samples, each as one short
+    dot product of recent input with the filter phase it falls on. The
+    Kaiser-windowed sinc is designed and split into its `up` phases once,
+    here.
+
+    Output starts at input sample 0 with silence before it, and lags the
+    input by the filter's group delay: input_position() gives the input
+    sample an output sample lines up with, for timestamping.
+    """
+
+    def __init__(
+        self,
+        in_rate: int,
+        out_rate: int,
+        *,
+        zero_crossings: int = 16,
+        rolloff: float = 0.9,
+        kaiser_beta: float = 8.0,
+    ) -> None:
+        g = math.gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+
+        # Prototype low-pass at the zero-stuffed rate, `zero_crossings` of
+        # the cutoff's periods either side of centre
+        cutoff = rolloff / max(self.up, self.down)
+        half = int(math.ceil(zero_crossings / cutoff))
+        m = np.arange(-half, half + 1)
+        h = self.up * cutoff * np.sinc(cutoff * m) * np.kaiser(len(m), kaiser_beta)
+        self.delay = float(half)
+
+        # Phase p holds h[p], h[p + up], ..., reversed so it lines up with
+        # input windows oldest first
+        self.taps = int(math.ceil(len(h) / self.up))
+        padded = np.zeros(self.taps * self.up)
+        padded[: len(h)] = h
+        self._phases = padded.reshape(self.taps, self.up).T[:, ::-1].copy()
+
+        self._history = np.zeros(self.taps - 1)
+        self.in_count = 0
+        self.out_count = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next input buffer; returns every output sample it
+        completes (the count varies by one buffer to the next unless the
+        buffer is a multiple of `down`)."""
+        start = self.in_count
+        buf = np.concatenate((self._history, samples))
+        self.in_count += len(samples)
+        self._history = buf[len(buf) - (self.taps - 1) :]
+
+        # Output n needs input up to (n * down) // up
+        end = (self.in_count * self.up + self.down - 1) // self.down
+        t = np.arange(self.out_count, end) * self.down
+        self.out_count = end
+        windows = sliding_window_view(buf, self.taps)[t // self.up - start]
+        return np.einsum("ij,ij->i", self._phases[t % self.up], windows)
+
+    def input_position(self, n: int) -> float:
+        """Input sample index output sample `n` is centred on."""
+        return (n * self.down - self.delay) / self.up
@@ -0,0 +1,68 @@
+from typing import Optional
+
+import numpy as np
+
+
+class SampleRing(object):
+    """Preallocated circular buffer of audio chunks and their timestamps.
+
+    Every chunk is written twice, `capacity` chunks apart, so the last n
+    chunks are always one contiguous slice: samples() and timestamps()
+    return views, never copies.
+
+    One producer (the capture thread) writes; any number of readers take
+    `chunks` as a snapshot and read up to it without locking. The
+    producer only publishes a chunk by bumping `chunks` after its samples
+    are in place. A reader holding a view for a while can check intact()
+    afterwards: the producer reuses the oldest slots first, so a view of
+    n chunks stays valid until capacity - n further chunks arrive.
+    """
+
+    def __init__(self, chunk: int, capacity: int) -> None:
+        self.chunk = chunk
+        self.capacity = capacity
+        self._samples = np.zeros(2 * capacity * chunk, dtype=np.float32)
+        self._timestamps = np.zeros(2 * capacity)
+        # Total chunks written, the only field readers synchronise on
+        self.chunks = 0
+
+    def __len__(self) -> int:
+        return min(self.chunks, self.capacity)
+
+    def write(self, samples: np.ndarray, ts: float) -> None:
+        """Append one chunk (any numeric dtype, converted in place)."""
+        if len(samples) != self.chunk:
+            raise ValueError(
+                "Expected {} samples, got {}".format(self.chunk, len(samples))
+            )
+        slot = self.chunks % self.capacity
+        lo = slot * self.chunk
+        mirror = lo + self.capacity * self.chunk
+        self._samples[lo : lo + self.chunk] = samples
+        self._samples[mirror : mirror + self.chunk] = samples
+        self._timestamps[slot] = ts
+        self._timestamps[slot + self.capacity] = ts
+        self.chunks += 1
+
+    def _end_slot(self, n_chunks: int, end: Optional[int]) -> int:
+        if n_chunks > self.capacity:
+            raise ValueError(
+                "Asked for {} chunks from a ring of {}".format(n_chunks, self.capacity)
+            )
+        return (self.chunks if end is None else end) % self.capacity + self.capacity
+
+    def samples(self, n_chunks: int, end: Optional[int] = None) -> np.ndarray:
+        """The n_chunks * chunk samples up to chunk count `end` (default
+        now), oldest first. Not yet written slots read as silence."""
+        stop = self._end_slot(n_chunks, end) * self.chunk
+        return self._samples[stop - n_chunks * self.chunk : stop]
+
+    def timestamps(self, n_chunks: int, end: Optional[int] = None) -> np.ndarray:
+        """Capture times of the same chunks as samples()."""
+        stop = self._end_slot(n_chunks, end)
+        return self._timestamps[stop - n_chunks : stop]
+
+    def intact(self, end: int, n_chunks: int) -> bool:
+        """True if a view of n_chunks up to `end` hasn't been overwritten,
+        counting the chunk the producer may be writing right now."""
+        return self.chunks - end + n_chunks < self.capacity
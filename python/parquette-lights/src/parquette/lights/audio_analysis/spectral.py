@@ -0,0 +1,54 @@
+from librosa import (
+    A_weighting,  # pylint: disable=no-name-in-module
+    mel_frequencies,  # pylint: disable=no-name-in-module
+    db_to_amplitude,  # pylint: disable=no-name-in-module
+)  # pylint: disable=no-name-in-module
+from librosa.filters import get_window, mel
+import numpy as np
+
+
+class SpectralFrontEnd(object):
+    """A-weighted mel power spectrum of one chunk.
+
+    Same result as librosa.stft(n_fft=chunk, center=False) into
+    librosa.feature.melspectrogram(S=|X|², n_mels=n_mels) scaled by the
+    A-weighting of the mel centre frequencies, but the window, filterbank
+    and weighting are built once here. Each forward() is a window multiply,
+    one rfft and one matrix-vector product into preallocated buffers.
+    """
+
+    def __init__(self, chunk: int, rate: int, n_mels: int) -> None:
+        self.chunk = chunk
+        self.rate = rate
+        self.n_mels = n_mels
+
+        self.window = get_window("hann", chunk, fftbins=True)
+        # Mel band centre frequencies, Hz
+        self.frequencies = mel_frequencies(n_mels, fmin=0, fmax=rate / 2)
+        weighting = db_to_amplitude(A_weighting(self.frequencies))
+        # Weighting folded into the filterbank: w * (M @ p) == (w * M) @ p
+        self.basis = mel(sr=rate, n_fft=chunk, n_mels=n_mels) * weighting[:, np.newaxis]
+
+        # float64 throughout so the bands come out as Python-float compatible
+        # scalars for the generators and OSC
+        self._frame = np.zeros(chunk)
+        self._spectrum = np.zeros(chunk // 2 + 1, dtype=np.complex128)
+        # Power spectrum and weighted mel power of the last chunk, and the
+        # mel power scaled
+        self.power = np.zeros(chunk // 2 + 1)
+        self.mel = np.zeros(n_mels)
+        self.bands = np.zeros(n_mels)
+
+    def forward(self, chunk: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """Mel bands of `chunk` times `scale`.
+
+        Returns the front end's own buffer (`bands`), overwritten by the next
+        call. The unscaled bands are left in `mel`.
+        """
+        np.multiply(chunk, self.window, out=self._frame)
+        np.fft.rfft(self._frame, out=self._spectrum)
+        np.abs(self._spectrum, out=self.power)
+        np.square(self.power, out=self.power)
+        np.dot(self.basis, self.power, out=self.mel)
+        np.multiply(self.mel, scale, out=self.bands)
+        return self.bands
@@ -0,0 +1,131 @@
+from typing import Callable, Dict, Optional
+
+import time
+from threading import Lock
+
+
+class Envelope(object):
+    """Fade out -> action -> hold -> fade in, as a level in 0..1.
+
+    The level is evaluated by EnvelopeScheduler.tick() on the compute loop
+    rather than by a thread per fade, so it changes in step with the output
+    frames. Fixtures multiply their output by `level`.
+    """
+
+    def __init__(self) -> None:
+        self.level: float = 1.0
+        self.active = False
+        self._start = 0.0
+        self._start_level = 1.0
+        self._fade_time = 0.0
+        self._hold = 0.0
+        self._action: Optional[Callable[[], None]] = None
+
+    def _begin(
+        self,
+        now: float,
+        fade_time: float,
+        hold: float,
+        action: Optional[Callable[[], None]],
+    ) -> None:
+        # Restart from wherever the level is now. The fade out is scaled to
+        # the starting level so interrupting a near-dark envelope still
+        # feels snappy instead of taking the full fade_time.
+        self._start = now
+        self._start_level = self.level
+        self._fade_time = fade_time
+        self._hold = hold
+        self._action = action
+        self.active = True
+
+    def _run_action(self) -> None:
+        action, self._action = self._action, None
+        if action is not None:
+            action()
+
+    def tick(self, now: float) -> bool:
+        """Advance to `now`; returns False once the envelope has finished."""
+        elapsed = now - self._start
+        fade_out = self._fade_time * self._start_level
+        if elapsed < fade_out:
+            self.level = self._start_level * (1.0 - elapsed / fade_out)
+            return True
+
+        self._run_action()
+        elapsed -= fade_out
+        if elapsed < self._hold:
+            self.level = 0.0
+            return True
+
+        elapsed -= self._hold
+        if elapsed < self._fade_time:
+            self.level = elapsed / self._fade_time
+            return True
+
+        self.level = 1.0
+        self.active = False
+        return False
+
+
+class EnvelopeScheduler(object):
+    """Runs every active Envelope once per compute tick.
+
+    start() and cancel() may be called from the OSC thread; the envelope's
+    action then runs on the compute thread at its point in the sequence.
+    """
+
+    def __init__(self) -> None:
+        self._active: Dict[int, Envelope] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def start(
+        self,
+        envelope: Envelope,
+        *,
+        fade_time: float,
+        hold: float = 0.0,
+        action: Optional[Callable[[], None]] = None,
+        from_level: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """(Re)start `envelope`, replacing any sequence it is running.
+
+        It fades out from its current level, or from `from_level` (0 skips
+        the fade out, e.g. when the fixture is already dark).
+        """
+        with self._lock:
+            if from_level is not None:
+                envelope.level = from_level
+            if fade_time <= 0:
+                self._active.pop(id(envelope), None)
+                envelope.active = False
+                envelope.level = 1.0
+                if action is not None:
+                    action()
+                return
+            envelope._begin(  # pylint: disable=protected-access
+                time.monotonic() if now is None else now, fade_time, hold, action
+            )
+            self._active[id(envelope)] = envelope
+
+    def cancel(self, envelope: Envelope, level: Optional[float] = None) -> None:
+        """Stop `envelope` without running its pending action. The level
+        stays where it is unless `level` is given."""
+        with self._lock:
+            self._active.pop(id(envelope), None)
+            envelope.active = False
+            if level is not None:
+                envelope.level = level
+
+    def tick(self, now: Optional[float] = None) -> None:
+        if not self._active:
+            return
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            for key, envelope in list(self._active.items()):
+                if not envelope.tick(now):
+                    del self._active[key]
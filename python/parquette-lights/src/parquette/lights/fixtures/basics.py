@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Callable, ClassVar, List, Optional
+from typing import Callable, ClassVar, List, Optional, Tuple
 from ..category import Category
 from ..dmx import DMXManager, DMXListOrValue, DMXValue
 from ..osc import OSCManager, OSCParam
@@ -48,6 +48,8 @@ class MixTarget:
 
 class Fixture(object):
     STANDARD_ATTRS: ClassVar[List[str]] = []
+    # Standard attrs that are steps, switched rather than crossfaded
+    DISCRETE_ATTRS: ClassVar[List[str]] = []
 
     def __init__(
         self,
@@ -67,6 +69,10 @@ class Fixture(object):
         self.osc = osc
         self.runnable: bool = False
         self.wrapped_targets: List[MixTarget] = []
+        # Room position in metres (x to the right, y from the front towards
+        # the back, z up), set by the builders. Fixtures with a position
+        # can be driven by spatial mix channels (see generators.spatial).
+        self.position: Optional[Tuple[float, float, float]] = None
 
     def run(self) -> None:
         pass
@@ -81,8 +87,13 @@ class Fixture(object):
         x_coord and y_coord values for the tick are known.
         """
 
-    def send_visualizer(self) -> None:
-        pass
+    def visualizer_dimming(self) -> Optional[float]:
+        """Level shown in the fixture visualizer, None if not shown."""
+        return None
+
+    def visualizer_pantilt(self) -> Optional[Tuple[int, int]]:
+        """Real DMX-space pan/tilt shown in the visualizer, None if not shown."""
+        return None
 
     def standard_params(self, osc: OSCManager) -> List[OSCParam]:
         """Return OSCParam binds for this fixture's standard attributes.
@@ -96,6 +107,7 @@ class Fixture(object):
                 "/fixture/{}/{}/{}".format(cls_name, self.name, attr),
                 self,
                 attr,
+                discrete=attr in self.DISCRETE_ATTRS,
             )
             for attr in self.STANDARD_ATTRS
         ]
@@ -161,11 +173,8 @@ class LightFixture(Fixture):
         self._dimming = val
         self.set(val)
 
-    def send_visualizer(self) -> None:
-        if self.osc is not None:
-            self.osc.send_osc(
-                "/visualizer/fixture/{}/dimming".format(self.name), self._dimming
-            )
+    def visualizer_dimming(self) -> Optional[float]:
+        return self._dimming
 
     def on(self) -> None:
         self.dimming(255)
@@ -1,15 +1,17 @@
 # pylint: disable=too-many-lines
 from __future__ import annotations
 
-import threading
-import time
-from typing import cast, List, Optional
+from typing import cast, Dict, List, Optional, Sequence, Tuple
 
+import math
+import time
 from enum import Enum
 
+import numpy as np
 
 from ..category import Category
 from ..coord_system_state import CoordSystemState
+from ..envelope import Envelope, EnvelopeScheduler
 from ..osc import OSCManager, OSCParam
 from ..util.coord_system import CoordSystem
 from ..util.coordinates import SpotCoordFrame
@@ -19,6 +21,12 @@ from ..dmx import DMXManager, DMXValue, DMXControlChannel, DMXControlRange
 
 
 class Spot(LightFixture):
+    # Rough full-range (16-bit) pan/tilt travel time at the fastest
+    # movement_speed, and how much slower the slowest setting is. Used to
+    # estimate how long to stay dark after a move; tune per fixture.
+    PANTILT_FULL_TRAVEL_S: float = 2.0
+    PANTILT_SLOWEST_FACTOR: float = 10.0
+
     pan_channel: DMXControlChannel
     tilt_channel: DMXControlChannel
     pan_fine_channel: DMXControlChannel
@@ -59,6 +67,16 @@ class Spot(LightFixture):
                 "/fixture/{}/reset".format(type(self).__name__),
                 lambda addr, args, s=self: s.reset(args),
             )
+            # Upcoming wheel positions, moved into place while the head is
+            # dark so the real change later needs no fade
+            self.osc.dispatcher.map(
+                "/fixture/{}/{}/cue_color".format(type(self).__name__, self.name),
+                lambda addr, args, s=self: s.cue(color=int(args)),
+            )
+            self.osc.dispatcher.map(
+                "/fixture/{}/{}/cue_pattern".format(type(self).__name__, self.name),
+                lambda addr, args, s=self: s.cue(pattern=int(args)),
+            )
 
         self.dimming_target: Optional[MixTarget] = None
 
@@ -81,10 +99,40 @@ class Spot(LightFixture):
         self.prisim_enabled_value: bool = False
         self.prisim_rotation_value: DMXValue = 0
 
-        self.color_swap_fade_multiplier: float = 1.0
         self.color_swap_fade_time: float = -1.0
         self.color_swap_mechanical_time: float = 0.0
-        self.color_swap_fade_cancel: threading.Event = threading.Event()
+        # Dims the head through a color wheel move. Runs on the compute
+        # loop's scheduler; without one color changes are immediate.
+        self.envelopes: Optional[EnvelopeScheduler] = None
+        self.color_swap_envelope = Envelope()
+        # wheel pre-positioning, see cue()
+        self.cued_color: Optional[int] = None
+        # color_index / pattern_index binds, whose crossfades are cued
+        self.wheel_params: Dict[str, OSCParam] = {}
+        self.cued_pattern: Optional[int] = None
+        self.color_settle_until: float = 0.0
+        self.color_swap_target: int = 0
+
+        # Move in dark: position jumps bigger than move_in_dark_threshold
+        # (16-bit pan/tilt units) happen with the head dimmed, and while the
+        # head is dark it travels to its next position ahead of time.
+        self.move_in_dark: bool = False
+        self.move_in_dark_threshold: int = 4096
+        self.move_fade_time: float = 0.2
+        self.position_envelope = Envelope()
+        self.cued_pantilt: Optional[Tuple[int, int]] = None
+        self.position_settle_until: float = 0.0
+        self._position_target: Tuple[int, int] = (0, 0)
+        self._position_pending = False
+
+    @property
+    def color_swap_fade_multiplier(self) -> float:
+        return self.color_swap_envelope.level
+
+    @property
+    def output_level(self) -> float:
+        """Multiplier on the requested dimming from running envelopes."""
+        return self.color_swap_envelope.level * self.position_envelope.level
 
     @property
     def color_index(self) -> int:
@@ -124,18 +172,154 @@ class Spot(LightFixture):
             return False
         return self.dimming_target.idle
 
+    def output_dark(self) -> bool:
+        """True when the head emits no light right now: idle, or the
+        dimming it was written this tick is zero (e.g. an impulse gap)."""
+        return self.is_dark() or int(self._dimming * self.output_level) == 0
+
+    def wants_dark(self) -> bool:
+        """True when the mix itself asks for no light, envelopes aside."""
+        return self.is_dark() or int(self._dimming) == 0
+
+    def cue(
+        self, *, color: Optional[int] = None, pattern: Optional[int] = None
+    ) -> None:
+        """Announce upcoming wheel positions. The wheels move there the
+        next time the head is dark, so a later color()/pattern() to the
+        same slot lands without a color swap fade."""
+        if color is not None:
+            self.cued_color = int(constrain(color, 0, len(self.colors()) - 1))
+        if pattern is not None:
+            self.cued_pattern = int(constrain(pattern, 0, len(self.patterns()) - 1))
+
+    def standard_params(self, osc: OSCManager) -> List[OSCParam]:
+        params = super().standard_params(osc)
+        self.wheel_params = {
+            attr: param
+            for attr, param in zip(self.STANDARD_ATTRS, params)
+            if attr in ("color_index", "pattern_index")
+        }
+        return params
+
+    def _fade_target(self, attr: str) -> Optional[int]:
+        param = self.wheel_params.get(attr)
+        if self.osc is None or param is None:
+            return None
+        target = self.osc.fader.target(param)
+        if target is None:
+            return None
+        return int(target[0])
+
+    def cue_fades(self) -> None:
+        """Cue the slots that running preset/scene crossfades switch the
+        wheels to, so they move while the head is dark mid-fade."""
+        self.cue(
+            color=self._fade_target("color_index"),
+            pattern=self._fade_target("pattern_index"),
+        )
+
+    def preposition_wheels(self) -> None:
+        """Move the wheels to their cued slots if the head is dark. Called
+        once per tick after the dimming has been written."""
+        if self.cued_color is None and self.cued_pattern is None:
+            return
+        if not self.output_dark():
+            return
+        if (
+            self.cued_color is not None
+            and self.cued_color != self.color_index_value
+            and not self.color_swap_envelope.active
+        ):
+            self._move_color_wheel(self.cued_color)
+        if (
+            self.cued_pattern is not None
+            and self.cued_pattern != self.pattern_index_value
+        ):
+            self.pattern(self.cued_pattern)
+
+    def post_map_output(self) -> None:
+        self.cue_fades()
+        self.preposition_wheels()
+
     def pantilt(self, pan: int, tilt: int, fine: bool = False) -> None:
         self.pan(pan, fine=fine)
         self.tilt(tilt, fine=fine)
 
+    def cue_pantilt(self, pan: int, tilt: int) -> None:
+        """Announce the next position (16-bit). With move_in_dark on, a dark
+        head travels there ahead of the preset/scene that moves it."""
+        self.cued_pantilt = (int(pan), int(tilt))
+
+    def travel_time(self, pan: int, tilt: int) -> float:
+        """Estimated seconds for the head to reach (pan, tilt) (16-bit)."""
+        distance = max(abs(pan - int(self._pan)), abs(tilt - int(self._tilt))) / 65535
+        slowdown = 1.0 + (self.PANTILT_SLOWEST_FACTOR - 1.0) * (
+            float(self._movement_speed) / 255
+        )
+        return self.PANTILT_FULL_TRAVEL_S * distance * slowdown
+
+    def place_head(self, pan: int, tilt: int) -> None:
+        """Write the tick's fine pan/tilt target, moving in dark if enabled."""
+        if not self.move_in_dark or self.envelopes is None:
+            self.pantilt(pan, tilt, fine=True)
+            return
+
+        now = time.monotonic()
+        envelope = self.position_envelope
+        if self._position_pending:
+            # dimming down for a move, land on the latest target
+            self._position_target = (pan, tilt)
+            return
+
+        if self.wants_dark():
+            dest = self.cued_pantilt or (pan, tilt)
+            if dest != (int(self._pan), int(self._tilt)):
+                self.position_settle_until = max(
+                    self.position_settle_until, now + self.travel_time(*dest)
+                )
+                self.pan(dest[0], fine=True, force=True)
+                self.tilt(dest[1], fine=True, force=True)
+            return
+
+        self.cued_pantilt = None
+        settle_left = self.position_settle_until - now
+        if settle_left > 0 and not envelope.active:
+            # lit again before a dark move finished, stay dark until it has
+            self.envelopes.start(
+                envelope,
+                fade_time=self.move_fade_time,
+                hold=settle_left,
+                from_level=0.0,
+            )
+        elif (
+            max(abs(pan - int(self._pan)), abs(tilt - int(self._tilt)))
+            > self.move_in_dark_threshold
+            and not envelope.active
+        ):
+            self._position_target = (pan, tilt)
+            self._position_pending = True
+            self.envelopes.start(
+                envelope,
+                fade_time=self.move_fade_time,
+                hold=self.travel_time(pan, tilt),
+                action=self._land_position,
+            )
+            return
+        self.pantilt(pan, tilt, fine=True)
+
+    def _land_position(self) -> None:
+        self._position_pending = False
+        self.pan(self._position_target[0], fine=True, force=True)
+        self.tilt(self._position_target[1], fine=True, force=True)
+
     def get_pan(self) -> DMXValue:
         return self._pan
 
     def get_tilt(self) -> DMXValue:
         return self._tilt
 
-    def pan(self, val: DMXValue, fine: bool = False) -> None:
-        if self.is_dark():
+    def pan(self, val: DMXValue, fine: bool = False, force: bool = False) -> None:
+        if self.is_dark() and not force:
             return
         if fine:
             int_val = int(constrain(val, 0, 65535))
@@ -151,8 +335,8 @@ class Spot(LightFixture):
             self._pan = int(mapped) << 8
             self.dmx.set_channel(self.addr + self.pan_channel.offset, mapped)
 
-    def tilt(self, val: DMXValue, fine: bool = False) -> None:
-        if self.is_dark():
+    def tilt(self, val: DMXValue, fine: bool = False, force: bool = False) -> None:
+        if self.is_dark() and not force:
             return
         if fine:
             int_val = int(constrain(val, 0, 65535))
@@ -181,7 +365,7 @@ class Spot(LightFixture):
         self._dimming = cast(DMXValue, self.dimming_channel.map(val))
         self.dmx.set_channel(
             self.addr + self.dimming_channel.offset,
-            int(self._dimming * self.color_swap_fade_multiplier),
+            int(self._dimming * self.output_level),
         )
 
     def strobe(self, enable: bool, rate: Optional[int] = None) -> None:
@@ -207,99 +391,63 @@ class Spot(LightFixture):
     def color(self, index: int, override_swap_fade: bool = False) -> None:
         clamped = int(constrain(index, 0, len(self.colors()) - 1))
 
-        if override_swap_fade or self.color_swap_fade_time < 0:
+        if self.envelopes is None or self.color_swap_fade_time < 0:
             self._color_direct(clamped)
             return
 
-        self._start_color_swap_fade(clamped)
-
-    def _color_direct(self, index: int) -> None:
-        self.color_index_value = index
-        self.dmx.set_channel(
-            self.addr + self.color_channel.offset,
-            self.color_channel.map(range_index=self.color_index_value),
-        )
+        if override_swap_fade:
+            # drop any swap in flight so it can't land its color later
+            self.envelopes.cancel(self.color_swap_envelope, level=1.0)
+            self._color_direct(clamped)
+            return
 
-    def _start_color_swap_fade(self, color_index: int) -> None:
-        # Cancel any in-flight fade. The old thread checks the event on its
-        # next 10ms tick and bails out, leaving color_swap_fade_multiplier wherever it
-        # happens to be — the new thread picks up from there.
-        self.color_swap_fade_cancel.set()
-        self.color_swap_fade_cancel = threading.Event()
-
-        thread = threading.Thread(
-            target=self._color_fade_sequence,
-            args=(color_index, self.color_swap_fade_cancel),
-            daemon=True,
-        )
-        thread.start()
+        if self.cued_color != clamped:
+            self.cued_color = None
 
-    def _color_fade_sequence(
-        self, color_index: int, cancel_event: threading.Event
-    ) -> None:
-        fade_time = self.color_swap_fade_time
-        if fade_time <= 0:
-            self._color_direct(color_index)
-            self.color_swap_fade_multiplier = 1.0
+        envelope = self.color_swap_envelope
+        if envelope.active and clamped == self.color_swap_target:
+            # already on its way there
             return
-
-        # Wall-clock driven so we don't drift when individual time.sleep
-        # calls oversleep (which they reliably do under GIL pressure on
-        # macOS). Each phase records its own start instant and computes
-        # progress as elapsed / duration; the total wall-clock time of
-        # each phase is therefore accurate to within one `tick`.
-        tick = 0.01
-
-        # ---- fade out ----
-        # Scale duration to current multiplier so that interrupting a
-        # near-bright in-progress fade still feels snappy instead of
-        # taking the full fade_time.
-        start_mult = self.color_swap_fade_multiplier
-        if start_mult > 0.0:
-            fade_out_duration = fade_time * start_mult
-            t0 = time.monotonic()
-            while True:
-                if cancel_event.is_set():
-                    return
-                elapsed = time.monotonic() - t0
-                if elapsed >= fade_out_duration:
-                    break
-                self.color_swap_fade_multiplier = start_mult * (
-                    1.0 - elapsed / fade_out_duration
+        if clamped == self.color_index_value and not envelope.active:
+            # Already in place, typically pre-positioned while dark. Only
+            # hide the wheel if it may still be travelling.
+            settle_left = self.color_settle_until - time.monotonic()
+            if settle_left > 0 and not self.is_dark():
+                self.envelopes.start(
+                    envelope,
+                    fade_time=self.color_swap_fade_time,
+                    hold=settle_left,
+                    from_level=0.0 if self.output_dark() else None,
                 )
-                time.sleep(tick)
-
-        if cancel_event.is_set():
             return
 
-        self.color_swap_fade_multiplier = 0.0
-
-        # ---- swap color while dark ----
-        self._color_direct(color_index)
-
-        # ---- mechanical settle ----
-        if self.color_swap_mechanical_time > 0:
-            t0 = time.monotonic()
-            while time.monotonic() - t0 < self.color_swap_mechanical_time:
-                if cancel_event.is_set():
-                    return
-                time.sleep(tick)
-
-        if cancel_event.is_set():
+        if self.is_dark():
+            # nothing to hide, just move the wheel
+            self.envelopes.cancel(envelope, level=1.0)
+            self._move_color_wheel(clamped)
             return
 
-        # ---- fade in ----
-        t0 = time.monotonic()
-        while True:
-            if cancel_event.is_set():
-                return
-            elapsed = time.monotonic() - t0
-            if elapsed >= fade_time:
-                break
-            self.color_swap_fade_multiplier = elapsed / fade_time
-            time.sleep(tick)
+        # Fade out, swap the wheel while dark, let it settle, fade back in.
+        # When the output is already at zero there is nothing to fade out.
+        self.color_swap_target = clamped
+        self.envelopes.start(
+            envelope,
+            fade_time=self.color_swap_fade_time,
+            hold=self.color_swap_mechanical_time,
+            action=lambda: self._move_color_wheel(clamped),
+            from_level=0.0 if self.output_dark() else None,
+        )
 
-        self.color_swap_fade_multiplier = 1.0
+    def _move_color_wheel(self, index: int) -> None:
+        self._color_direct(index)
+        self.color_settle_until = time.monotonic() + self.color_swap_mechanical_time
+
+    def _color_direct(self, index: int) -> None:
+        self.color_index_value = index
+        self.dmx.set_channel(
+            self.addr + self.color_channel.offset,
+            self.color_channel.map(range_index=self.color_index_value),
+        )
 
     def white(self, override_swap_fade: bool = False) -> None:
         self.color(0, override_swap_fade=override_swap_fade)
@@ -352,6 +500,7 @@ class YRXY200Spot(Spot):
         "prisim_enabled",
         "prisim_rotation",
     ]
+    DISCRETE_ATTRS = ["color_index", "pattern_index"]
 
     class YRXY200Channel(Enum):
         X_AXIS = 0
@@ -476,14 +625,14 @@ class YRXY200Spot(Spot):
             tilt_range=(0.0, 200.0),
         )
         # Set by the coord system state during patching wiring. Until then
-        # post_map_output is a no-op (defensive — should never be hit).
+        # place_all skips this spot (defensive — should never be hit).
         self.coord_state: Optional[CoordSystemState] = None
         # The OSCParam bound to /chan/{name}/pantilt/offset. Set by
         # SpotsBuilder after the mixer creates the virtual channel.
         # Used by rebind_coords to push refreshed UI values on toggle.
         self.pantilt_param: Optional[OSCParam] = None
         # Cached most recent mapping-space x/y values (16-bit). Mid-tick the
-        # MixTargets update one of these; post_map_output runs the paired
+        # MixTargets update one of these; place_all runs the paired
         # conversion using both. Init at 16-bit midpoint so the fixture
         # starts in a defined state if no input arrives before the first tick.
         self._x_coord: float = 32767.0
@@ -557,36 +706,78 @@ class YRXY200Spot(Spot):
             MixTarget(self.dimming, "dimming", self.category),
             # x_coord and y_coord are mapping-space (active CoordSystem)
             # 16-bit values. The setters only cache; the paired conversion
-            # to real pan/tilt happens in post_map_output once both axes
-            # have finalised for the tick.
+            # to real pan/tilt happens in place_all once both axes have
+            # finalised for the tick.
             MixTarget(self.x_coord, "x_coord", pos_cat, max_value=65535),
             MixTarget(self.y_coord, "y_coord", pos_cat, max_value=65535),
         ]
         self.dimming_target: MixTarget = self.wrapped_targets[0]
 
+        if self.osc is not None:
+            # Upcoming position in mapping space, like /chan/{name}/pantilt
+            self.osc.dispatcher.map(
+                "/fixture/{}/{}/cue_pantilt".format(type(self).__name__, self.name),
+                lambda addr, x, y, s=self: s.cue_position(float(x), float(y)),
+            )
+
     def x_coord(self, val: DMXValue) -> None:
         self._x_coord = float(val)
 
     def y_coord(self, val: DMXValue) -> None:
         self._y_coord = float(val)
 
-    def post_map_output(self) -> None:
-        """Convert the cached mapping-space (x, y) into real pan/tilt and
-        write to DMX. Called by the mixer once per tick after every
-        channel has accumulated."""
+    @staticmethod
+    def place_all(spots: Sequence[YRXY200Spot]) -> None:
+        """Convert every spot's cached mapping-space (x, y) into real
+        pan/tilt and write to DMX. Called by the mixer once per tick after
+        every channel has accumulated and the post_map_output hooks ran.
+
+        Spots on the same coord system convert in one mapping_to_real_batch
+        call, so adding heads adds array rows rather than solver calls.
+        """
+        groups: Dict[int, Tuple[CoordSystem, List[YRXY200Spot]]] = {}
+        for spot in spots:
+            if spot.coord_state is None:
+                continue
+            system = spot.coord_state.active
+            groups.setdefault(id(system), (system, []))[1].append(spot)
+
+        for system, group in groups.values():
+            # pylint: disable=protected-access
+            xy = np.array([(s._x_coord, s._y_coord) for s in group])
+            current = np.array([(float(s._pan), float(s._tilt)) for s in group])
+            real = system.mapping_to_real_batch(
+                xy, [s.coord_frame for s in group], current
+            )
+            for spot, (pan, tilt) in zip(group, real.tolist()):
+                if math.isnan(pan):
+                    # Unreachable mapping point — freeze on the last good
+                    # real values so the head doesn't jump.
+                    continue
+                spot.place_head(int(pan), int(tilt))
+
+    def cue_position(self, x: float, y: float) -> None:
+        """cue_pantilt for a mapping-space (x, y) in the active coord system."""
         if self.coord_state is None:
             return
         real = self.coord_state.active.mapping_to_real(
-            [self._x_coord, self._y_coord],
+            [x, y],
             self.coord_frame,
             current_real=[float(self._pan), float(self._tilt)],
         )
-        if real is None:
-            # Unreachable mapping point — freeze on the last good real
-            # values so the head doesn't jump.
+        if real is not None:
+            self.cue_pantilt(int(real[0]), int(real[1]))
+
+    def cue_fades(self) -> None:
+        """Also cue the position a running pantilt crossfade ends on."""
+        super().cue_fades()
+        if not self.move_in_dark or self.osc is None or self.pantilt_param is None:
+            return
+        target = self.osc.fader.target(self.pantilt_param)
+        if target is None:
             return
-        self.pan(int(real[0]), fine=True)
-        self.tilt(int(real[1]), fine=True)
+        xy = target[0] if len(target) == 1 else target
+        self.cue_position(float(xy[0]), float(xy[1]))
 
     def rebind_coords(self, old: CoordSystem, new: CoordSystem) -> None:
         """Re-express stored mapping-space offsets when the active coord
@@ -609,13 +800,8 @@ class YRXY200Spot(Spot):
             self.pantilt_param.dispatch_lambda(self.pantilt_param.addr, new_xy)
             self.pantilt_param.sync()
 
-    def send_visualizer(self) -> None:
-        super().send_visualizer()
-        if self.osc is not None:
-            self.osc.send_osc(
-                "/visualizer/fixture/{}/pantilt".format(self.name),
-                [self._pan, self._tilt],
-            )
+    def visualizer_pantilt(self) -> Optional[Tuple[int, int]]:
+        return (int(self._pan), int(self._tilt))
 
     def shutter(self, close_shutter: bool) -> None:
         self.strobe_enabled = False
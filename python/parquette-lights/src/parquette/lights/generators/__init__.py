@@ -1,9 +1,12 @@
 from .fft_generator import *
 from .generator import *
 from .impulse_generator import *
+from .onset_generator import *
 from .wave_generator import *
 from .noise_generator import *
 from .bpm_generator import *
 from .loop_generator import *
+from .modulation import *
+from .spatial import *
 from .chanmap import *
 from .mixer import *
@@ -6,6 +6,7 @@ from ..category import Category
 
 class BPMGenerator(Generator):
     STANDARD_ATTRS = ["amp", "duty", "bpm_mult", "manual_phase", "lpf_alpha"]
+    DISCRETE_ATTRS = ["bpm_mult"]
 
     duty: int
     manual_phase: float
@@ -43,6 +44,9 @@ class BPMGenerator(Generator):
         self._lpf_state = offset
         self._pulse_end: float = 0.0
         self._last_pulse_start: float = -60000.0
+        # Output latency to run ahead by, set by LatencyCompensation: value()
+        # answers for the time its output will actually land
+        self.lead_ms: float = 0.0
 
     def current_period(self) -> float:
         return 60000.0 / (self.bpm * self.bpm_mult)
@@ -86,6 +90,7 @@ class BPMGenerator(Generator):
                 self.phase_ref += math.floor(drift / new_base) * new_base
 
     def value(self, millis: float) -> float:
+        millis += self.lead_ms
         if not self.bpm_valid or not self.rms_valid:
             raw = self.offset
         else:
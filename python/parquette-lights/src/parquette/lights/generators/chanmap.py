@@ -1,15 +1,19 @@
-from collections import deque
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from . import Generator
 from ..fixtures.basics import MixTarget
 from ..category import Category
 from ..osc import OSCManager, OSCParam
-from ..util.math import constrain
+from .spatial import SpatialField
 
 TICK_MS: int = 20
 MAX_STUTTER_MS: int = 2000
 
+# Per-target delays or gains, one entry per target
+PerTarget = Union[Sequence[float], np.ndarray]
+
 
 class ChannelMapper:
     def map_output(
@@ -38,40 +42,172 @@ class NoOpMapper(ChannelMapper):
     pass
 
 
-class StutterMapper(ChannelMapper):
+DELAY_CURVES = ("linear", "exponential", "random", "mirrored")
+
+
+def delay_curve(
+    count: int, shape: str = "linear", *, sharpness: float = 3.0, seed: int = 0
+) -> np.ndarray:
+    """Delays, in stutter steps, for `count` targets in chase order.
+
+    linear       0, 1, 2, ... — the classic even stutter
+    exponential  same span, bunched at the start and stretching out
+    random       each step used once in a shuffled but fixed (seeded) order
+    mirrored     both ends first, meeting in the middle
+    """
+    if count <= 1:
+        return np.zeros(max(count, 0))
+    span = count - 1
+    position = np.arange(count, dtype=np.float64)
+    if shape == "linear":
+        return position
+    if shape == "exponential":
+        return span * np.expm1(sharpness * position / span) / np.expm1(sharpness)
+    if shape == "random":
+        return np.random.default_rng(seed).permutation(position)
+    if shape == "mirrored":
+        return np.minimum(position, span - position)
+    raise ValueError(
+        "Unknown delay curve {!r}, expected one of {}".format(
+            shape, ", ".join(DELAY_CURVES)
+        )
+    )
+
+
+class DelayMapper(ChannelMapper):
+    """Mono channel mapper that reads every target at its own delay.
+
+    `delays` are per target, in stutter steps: a target with delay d reads
+    the channel as it was d * stutter_period ms ago, scaled by its `gains`
+    entry. The reads are one gather from the channel's history, so the
+    per-tick cost doesn't depend on how the delays are shaped.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[MixTarget],
+        delays: PerTarget,
+        gains: Optional[PerTarget] = None,
+        stutter_period: int = 500,
+    ) -> None:
+        self.targets = list(targets)
+        self.stutter_period = stutter_period
+        self.delays = np.zeros(len(self.targets))
+        self.gains = np.ones(len(self.targets))
+        self.set_delays(delays, gains)
+
+    def set_delays(self, delays: PerTarget, gains: Optional[PerTarget] = None) -> None:
+        """Replace the delay map. The channel's history was sized for the
+        delays at construction; longer ones are clamped to it."""
+        steps = np.asarray(delays, dtype=np.float64)
+        if steps.shape != (len(self.targets),):
+            raise ValueError(
+                "Expected {} delays, got {}".format(len(self.targets), steps.shape)
+            )
+        self.delays = np.maximum(steps, 0.0)
+        if gains is not None:
+            self.gains = np.asarray(gains, dtype=np.float64)
+
+    def required_history_ticks(self) -> int:
+        span = float(self.delays.max()) if len(self.delays) else 0.0
+        return int(MAX_STUTTER_MS * span / TICK_MS) + 1
+
+    def map_output(
+        self, value: float, channel: "MixChannel", idle: bool = False
+    ) -> None:
+        steps = np.minimum(
+            self.delays * self.stutter_period / TICK_MS, len(channel.history) - 1
+        ).astype(np.intp)
+        values = channel.values(steps) * self.gains
+        for target, level in zip(
+            self.targets, np.clip(values, 0, 255).astype(np.intp).tolist()
+        ):
+            target(level, accumulate=True, idle=idle)
+
+
+class StutterMapper(DelayMapper):
     """Mono channel mapper that distributes a single input across fixture groups
     with time-delayed stutter offsets.
 
     Each group in fixture_groups receives the same stutter delay. Groups are
     lists of MixTargets that should fire at the same time step (e.g. a
-    left/right pair).
+    left/right pair). `curve` shapes the group delays (see delay_curve);
+    the default "linear" spaces them one stutter_period apart.
     """
 
     def __init__(
         self,
         fixture_groups: List[List[MixTarget]],
         stutter_period: int = 500,
+        curve: str = "linear",
     ) -> None:
         self.fixture_groups = fixture_groups
-        self.stutter_period = stutter_period
+        self._curve = curve
+        super().__init__(
+            [t for group in fixture_groups for t in group],
+            self._group_delays(curve),
+            stutter_period=stutter_period,
+        )
+
+    def _group_delays(self, curve: str) -> np.ndarray:
+        steps = delay_curve(len(self.fixture_groups), curve)
+        return np.repeat(steps, [len(g) for g in self.fixture_groups])
 
     def required_history_ticks(self) -> int:
-        n = len(self.fixture_groups)
-        if n <= 1:
-            return 1
-        return int(MAX_STUTTER_MS * (n - 1) / TICK_MS) + 1
+        # Every curve spans at most len(groups) - 1 steps, so sizing for
+        # that covers whichever curve is set later
+        span = max(len(self.fixture_groups) - 1, 0)
+        return int(MAX_STUTTER_MS * span / TICK_MS) + 1
 
-    def map_output(
-        self, value: float, channel: "MixChannel", idle: bool = False
+    @property
+    def curve(self) -> str:
+        return self._curve
+
+    @curve.setter
+    def curve(self, curve: str) -> None:
+        if curve not in DELAY_CURVES:
+            print("Unknown delay curve {!r}".format(curve), flush=True)
+            return
+        self._curve = curve
+        # the history is sized for the longest curve, see
+        # required_history_ticks
+        self.set_delays(self._group_delays(curve))
+
+
+class SpatialMapper(DelayMapper):
+    """Delay mapper whose per-fixture delays come from room positions.
+
+    `field` turns the fixtures' positions into a delay in metres and a
+    gain; stutter_period is then ms per metre.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[MixTarget],
+        positions: Sequence[Tuple[float, float, float]],
+        field: SpatialField,
+        stutter_period: int = 500,
     ) -> None:
-        max_timeslice = len(channel.history) - 1
-        for i, group in enumerate(self.fixture_groups):
-            stutter_index = int(
-                constrain(self.stutter_period * i / TICK_MS, 0, max_timeslice)
-            )
-            val = int(constrain(channel.value(stutter_index), 0, 255))
-            for target in group:
-                target(val, accumulate=True, idle=idle)
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        self._field = field
+        delays, gains = self._evaluate(field, len(targets))
+        super().__init__(targets, delays, gains, stutter_period=stutter_period)
+
+    def _evaluate(
+        self, field: SpatialField, count: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self.positions):
+            return np.zeros(count), np.ones(count)
+        return field.evaluate(self.positions)
+
+    @property
+    def field(self) -> SpatialField:
+        return self._field
+
+    @field.setter
+    def field(self, field: SpatialField) -> None:
+        self._field = field
+        self.set_delays(*self._evaluate(field, len(self.targets)))
 
 
 class MixChannel:
@@ -93,8 +229,10 @@ class MixChannel:
         self.category = category
         self.index = index
         self.mapper: ChannelMapper = mapper or NoOpMapper()
-        history_size = self.mapper.required_history_ticks()
-        self.history: deque = deque([0.0] * history_size, maxlen=history_size)
+        # Ring buffer of past values: the newest at _head, older ones
+        # after it, so a batch of delayed reads is a single gather
+        self.history = np.zeros(self.mapper.required_history_ticks())
+        self._head = 0
         self._offset_storage: float = 0.0
         self.impulse_generator = impulse_generator
         self.impulse_connected = impulse_generator is not None
@@ -108,19 +246,30 @@ class MixChannel:
     def offset(self, value: Any) -> None:
         self._offset_storage = float(value)
 
-    def tick(self, ts: float) -> None:
-        """Compute current value and push into history (O(1) via deque)."""
+    def tick(
+        self, ts: float, outputs: Optional[Mapping[Generator, float]] = None
+    ) -> None:
+        """Compute current value and push into history (O(1) ring buffer write).
+
+        `outputs` are this tick's generator values (ModulationGraph.outputs);
+        without them each connected generator is evaluated here.
+        """
         val = self.offset
         for gen in self.connected_generators:
-            val += gen.value(ts)
+            val += gen.value(ts) if outputs is None else outputs[gen]
         val *= self.category.master
         if self.impulse_connected and self.impulse_generator is not None:
             val += self.impulse_generator.value(ts)
-        self.history.appendleft(val)
+        self._head = (self._head - 1) % len(self.history)
+        self.history[self._head] = val
 
     def value(self, timeslice: int = 0) -> float:
         """Read value from history. timeslice=0 is current, 1 is 20ms ago, etc."""
-        return self.history[timeslice]
+        return float(self.history[(self._head + timeslice) % len(self.history)])
+
+    def values(self, timeslices: np.ndarray) -> np.ndarray:
+        """value() for an array of timeslices."""
+        return self.history[(self._head + timeslices) % len(self.history)]
 
     def is_idle(self) -> bool:
         """True when the channel cannot produce non-zero output.
@@ -155,24 +304,24 @@ class MixChannel:
 
     @property
     def stutter_period(self) -> int:
-        if isinstance(self.mapper, StutterMapper):
+        if isinstance(self.mapper, DelayMapper):
             return self.mapper.stutter_period
         return 0
 
     @stutter_period.setter
     def stutter_period(self, value: int) -> None:
-        if isinstance(self.mapper, StutterMapper):
+        if isinstance(self.mapper, DelayMapper):
             self.mapper.stutter_period = int(value)
 
     def register_stutter_period(self, osc: OSCManager) -> Optional[OSCParam]:
         """Bind /chan/{category.name}/stutter_period to this channel.
 
-        No-op for non-stutter channels. When several channels in the same
-        category register this address, pythonosc fans each incoming
-        message to every handler, so one UI slider drives all mappers in
-        the category without a central helper.
+        No-op for channels without a DelayMapper. When several channels
+        in the same category register this address, pythonosc fans each
+        incoming message to every handler, so one UI slider drives all
+        mappers in the category without a central helper.
         """
-        if not isinstance(self.mapper, StutterMapper):
+        if not isinstance(self.mapper, DelayMapper):
             return None
         return OSCParam.bind(
             osc,
@@ -181,6 +330,21 @@ class MixChannel:
             "stutter_period",
         )
 
+    def register_delay_curve(self, osc: OSCManager) -> Optional[OSCParam]:
+        """Bind /chan/{name}/delay_curve to a StutterMapper's curve.
+
+        Reshapes the chase over the same groups (see delay_curve), so new
+        chases don't need new channels. No-op for other mappers.
+        """
+        if not isinstance(self.mapper, StutterMapper):
+            return None
+        return OSCParam.bind(
+            osc,
+            "/chan/{}/delay_curve".format(self.name),
+            self.mapper,
+            "curve",
+        )
+
 
 class PantiltChannel(MixChannel):
     """Virtual channel exposing a paired offset over a single OSC address.
@@ -212,7 +376,9 @@ class PantiltChannel(MixChannel):
         self.pan_channel.offset = float(value[0])
         self.tilt_channel.offset = float(value[1])
 
-    def tick(self, ts: float) -> None:
+    def tick(
+        self, ts: float, outputs: Optional[Mapping[Generator, float]] = None
+    ) -> None:
         pass
 
     def map_output(self) -> None:
@@ -1,5 +1,4 @@
 import time
-from copy import copy
 from typing import Any, List
 import numpy as np
 from .generator import Generator
@@ -9,10 +8,18 @@ from ..util.math import constrain
 
 
 class FFTGenerator(Generator):
+    """Average of a band of the latest mel frames, above a threshold.
+
+    forward() keeps the last `memory_length` frames in a preallocated
+    ring, thresholded and with a prefix sum per frame, so value() is a
+    binary search for the frame closest to `millis` and two lookups for
+    the band sum, whatever the band width.
+    """
+
     STANDARD_ATTRS = ["amp", "thres"]
 
-    stamps: list[float]
-    memory: list[list[float]]
+    stamps: np.ndarray
+    memory: np.ndarray
     bounds: list[float]
 
     def __init__(
@@ -55,30 +62,40 @@ class FFTGenerator(Generator):
         self.memory_length = memory_length
         self.subdivisions = subdivisions
 
-        self.stamps = [0 for i in range(memory_length)]
-        self.memory = [[0 for i in range(subdivisions)] for j in range(memory_length)]
+        capacity = max(1, memory_length)
+        # Frame i goes in row i % capacity. Its stamp is mirrored like
+        # SampleRing's, at i % capacity and i % capacity + capacity, so the
+        # stored stamps are always one ascending slice to search
+        self.stamps = np.zeros(2 * capacity)
+        self.memory = np.zeros((capacity, subdivisions))
+        # Per-frame prefix sums of memory, with a leading zero: bins
+        # [start, end) sum to prefix[end] - prefix[start]
+        self._prefix = np.zeros((capacity, subdivisions + 1))
+        # Frames written; bumped after the row is in place, for value()
+        # on the mix thread
+        self.frames = 0
 
     def forward(self, values: list[float] | np.ndarray, millis: float) -> None:
-        self.stamps[1:] = self.stamps[0:-1]
-        self.stamps[0] = millis
-
-        self.memory[1:] = self.memory[0:-1]
-
-        for i in range(self.subdivisions):
-            self.memory[0][i] = copy(values[i])
-
-            if self.memory[0][i] < self.thres:
-                self.memory[0][i] = 0
-            else:
-                self.memory[0][i] -= self.thres
+        capacity = len(self.memory)
+        slot = self.frames % capacity
+        if self.frames > 0:
+            # The closest-frame search needs the stamps in order
+            millis = max(millis, float(self.stamps[(self.frames - 1) % capacity]))
+
+        row = self.memory[slot]
+        np.subtract(values[: self.subdivisions], self.thres, out=row)
+        np.maximum(row, 0.0, out=row)
+        np.cumsum(row, out=self._prefix[slot, 1:])
+        self.stamps[slot] = self.stamps[slot + capacity] = millis
+        self.frames += 1
 
         if self.debug:
             self.debug_fwd_tick += 1
             if self.debug_fwd_tick % 500 == 1:
-                mem_sum = sum(self.memory[0])
+                mem_sum = float(self._prefix[slot, -1])
                 print(
                     "DEBUG {}.forward: tick={}, millis={:.0f}, subdivisions={}, "
-                    "memory_length={}, memory[0] sum={:.4f}, thres={}".format(
+                    "memory_length={}, newest frame sum={:.4f}, thres={}".format(
                         self.name,
                         self.debug_fwd_tick,
                         millis,
@@ -90,36 +107,43 @@ class FFTGenerator(Generator):
                     flush=True,
                 )
 
+    def closest_frame(self, millis: float) -> int:
+        """Number of the stored frame stamped closest to `millis`, the
+        newer one on a tie; -1 before the first frame."""
+        count = min(self.frames, len(self.memory))
+        if count == 0:
+            return -1
+        stop = self.frames % len(self.memory) + len(self.memory)
+        recent = self.stamps[stop - count : stop]
+        i = int(np.searchsorted(recent, millis))
+        if i == count or (i > 0 and millis - recent[i - 1] < recent[i] - millis):
+            i -= 1
+        return self.frames - count + i
+
     def value(self, millis: float = -1) -> float:
         if millis == -1:
             millis = time.time() * 1000
 
-        best_index = 0
-        for i, _ in enumerate(self.stamps):
-            best = abs(self.stamps[best_index] - millis)
-            curr = abs(self.stamps[i] - millis)
-
-            if curr < best:
-                best_index = i
-
-        fft_sum = 0.0
+        frame = self.closest_frame(millis)
         start_ix = int(
             constrain(
                 int(self.fft_bounds[0] * self.subdivisions),
                 0,
-                len(self.memory[best_index]) - 1,
+                self.subdivisions - 1,
             )
         )
         end_ix = int(
             constrain(
                 max(int(self.fft_bounds[1] * self.subdivisions), start_ix + 1),
                 0,
-                len(self.memory[best_index]) - 1,
+                self.subdivisions - 1,
             )
         )
 
-        for i in range(start_ix, end_ix):
-            fft_sum += self.memory[best_index][i]
+        fft_sum = 0.0
+        if frame >= 0 and start_ix != end_ix:
+            prefix = self._prefix[frame % len(self.memory)]
+            fft_sum = float(prefix[end_ix] - prefix[start_ix])
 
         if start_ix == end_ix:
             raw = 0.0
@@ -129,10 +153,10 @@ class FFTGenerator(Generator):
         if self.debug:
             self.debug_val_tick += 1
             if self.debug_val_tick % 500 == 1:
+                # Frames back from the newest, as the stamps are stored
+                best_index = self.frames - 1 - frame
                 stamp_age = (
-                    millis - self.stamps[best_index]
-                    if self.stamps[best_index] > 0
-                    else -1
+                    millis - self.stamps[frame % len(self.memory)] if frame >= 0 else -1
                 )
                 print(
                     "DEBUG {}.value: tick={}, millis={:.0f}, best_index={}, "
@@ -152,7 +176,7 @@ class FFTGenerator(Generator):
                         self.offset,
                         self.fft_bounds,
                         self.subdivisions,
-                        len(self.memory[best_index]),
+                        self.memory_length,
                     ),
                     flush=True,
                 )
@@ -1,12 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import ClassVar, List
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, List
+
+from functools import partial
 
 from ..category import Category
 from ..osc import OSCManager, OSCParam
 
+if TYPE_CHECKING:
+    from .modulation import _Slot
+
 
 class Generator(ABC):
     STANDARD_ATTRS: ClassVar[List[str]] = []
+    # Standard attrs that are steps, switched rather than crossfaded
+    DISCRETE_ATTRS: ClassVar[List[str]] = []
 
     def __init__(
         self,
@@ -24,6 +31,8 @@ class Generator(ABC):
         self.phase = phase
         self.period = period
         self.offset = offset
+        # Attributes a ModulationGraph route drives, see unmodulated()
+        self.modulation_slots: Dict[str, "_Slot"] = {}
 
     @abstractmethod
     def value(self, millis: float) -> float:
@@ -41,10 +50,20 @@ class Generator(ABC):
                 "/gen/{}/{}/{}".format(cls_name, self.name, attr),
                 self,
                 attr,
+                discrete=attr in self.DISCRETE_ATTRS,
+                getter=partial(self.unmodulated, attr),
             )
             for attr in self.STANDARD_ATTRS
         ]
 
+    def unmodulated(self, attr: str) -> Any:
+        """`attr` without what modulation routes add onto it. This is what
+        the UI, presets and fades see, so they never capture the wobble."""
+        slot = self.modulation_slots.get(attr)
+        if slot is None:
+            return getattr(self, attr)
+        return slot.unmodulated()
+
     @staticmethod
     def reanchor_phase(
         millis: float,
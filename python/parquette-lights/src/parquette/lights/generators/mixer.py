@@ -4,7 +4,9 @@ from typing import (
     List,
     Tuple,
     Dict,
+    cast,
     Optional,
+    Sequence,
 )
 
 import time
@@ -15,12 +17,17 @@ from .chanmap import (
     MixTarget,
     FixedMapper,
     PantiltChannel,
+    SpatialMapper,
     StutterMapper,
 )
+from .modulation import ModulationGraph
+from .spatial import SPATIAL_EFFECTS, SpatialEffect
 from ..osc import OSCManager, OSCParam
 from ..dmx import DMXManager
 from ..fixtures.basics import Fixture
+from ..fixtures.spotlights import YRXY200Spot
 from ..category import Categories, Category
+from ..visualizer import VisualizerFrame
 
 
 class Mixer(object):
@@ -37,11 +44,14 @@ class Mixer(object):
         fixtures: List[Fixture],
         categories: Categories,
         debug: bool = False,
+        visualizer_ms: int = 50,
+        spatial_effects: Sequence[SpatialEffect] = SPATIAL_EFFECTS,
     ) -> None:
         self.osc = osc
         self.dmx = dmx
         self.generators = generators
         self.all_fixtures = fixtures
+        self.spots = [f for f in fixtures if isinstance(f, YRXY200Spot)]
         self.categories = categories
         self.debug = debug
 
@@ -74,29 +84,7 @@ class Mixer(object):
                 index += 1
             self.fixture_targets[fixture.name] = targets
 
-        # Stutter channels for reds — paired groups front-to-back
-        reds_fwd_groups: List[List[MixTarget]] = [
-            [
-                self.mix_target_for_fixture("front_1"),
-                self.mix_target_for_fixture("front_2"),
-            ],
-            [
-                self.mix_target_for_fixture("left_1"),
-                self.mix_target_for_fixture("right_1"),
-            ],
-            [
-                self.mix_target_for_fixture("left_2"),
-                self.mix_target_for_fixture("right_2"),
-            ],
-            [
-                self.mix_target_for_fixture("left_3"),
-                self.mix_target_for_fixture("right_3"),
-            ],
-            [
-                self.mix_target_for_fixture("left_4"),
-                self.mix_target_for_fixture("right_4"),
-            ],
-        ]
+        # Zig-zag stutter for reds — one fixture at a time, alternating sides
         reds_zig_groups: List[List[MixTarget]] = [
             [self.mix_target_for_fixture("front_1")],
             [self.mix_target_for_fixture("front_2")],
@@ -109,30 +97,8 @@ class Mixer(object):
             [self.mix_target_for_fixture("left_4")],
             [self.mix_target_for_fixture("right_4")],
         ]
-
-        self.reds_fwd_mapper = StutterMapper(reds_fwd_groups)
-        self.reds_back_mapper = StutterMapper(list(reversed(reds_fwd_groups)))
         self.reds_zig_mapper = StutterMapper(reds_zig_groups)
 
-        # Stutter channels for washes — wall washes only, ceiling excluded
-        washes_fwd_groups: List[List[MixTarget]] = [
-            [
-                self.mix_target_for_fixture("wash_fl"),
-                self.mix_target_for_fixture("wash_fr"),
-            ],
-            [
-                self.mix_target_for_fixture("wash_ml"),
-                self.mix_target_for_fixture("wash_mr"),
-            ],
-            [
-                self.mix_target_for_fixture("wash_bl"),
-                self.mix_target_for_fixture("wash_br"),
-            ],
-        ]
-
-        self.washes_fwd_mapper = StutterMapper(washes_fwd_groups)
-        self.washes_back_mapper = StutterMapper(list(reversed(washes_fwd_groups)))
-
         # Mono channels — single input drives all targets in a group equally
         all_reds_targets = [
             self.mix_target_for_fixture(n)
@@ -154,48 +120,33 @@ class Mixer(object):
             for n in ["wash_fl", "wash_fr", "wash_ml", "wash_mr", "wash_bl", "wash_br"]
         ]
 
-        special_channels: List[MixChannel] = [
-            MixChannel(
-                "reds_fwd",
-                categories.reds,
-                index,
-                mapper=self.reds_fwd_mapper,
-            ),
-            MixChannel(
-                "reds_back",
-                categories.reds,
-                index + 1,
-                mapper=self.reds_back_mapper,
-            ),
+        # Spatial channels (front-to-back sweeps, ripples, spins) are
+        # declared in generators.spatial and placed by fixture position
+        special_channels: List[MixChannel] = []
+        for effect in spatial_effects:
+            special_channels.append(
+                self.spatial_channel(effect, index + len(special_channels))
+            )
+        index += len(special_channels)
+
+        special_channels += [
             MixChannel(
                 "reds_zig",
                 categories.reds,
-                index + 2,
+                index,
                 mapper=self.reds_zig_mapper,
             ),
-            MixChannel(
-                "washes_fwd",
-                categories.washes,
-                index + 3,
-                mapper=self.washes_fwd_mapper,
-            ),
-            MixChannel(
-                "washes_back",
-                categories.washes,
-                index + 4,
-                mapper=self.washes_back_mapper,
-            ),
             # Mono channels
             MixChannel(
                 "reds_mono",
                 categories.reds,
-                index + 5,
+                index + 1,
                 mapper=FixedMapper(*all_reds_targets),
             ),
             MixChannel(
                 "washes_mono",
                 categories.washes,
-                index + 6,
+                index + 2,
                 impulse_generator=impulse_gen,
                 mapper=FixedMapper(*all_wall_wash_targets),
             ),
@@ -205,8 +156,8 @@ class Mixer(object):
         # Virtual pantilt channels — expose /chan/{spot}/pantilt/offset as a
         # single 2-vec that fans into the underlying x_coord and y_coord
         # channels. The underlying channels carry mapping-space values
-        # (active CoordSystem); the spot's post_map_output hook converts to
-        # real pan/tilt at DMX-write time. Added to mix_channels so
+        # (active CoordSystem); YRXY200Spot.place_all converts them to real
+        # pan/tilt at DMX-write time. Added to mix_channels so
         # ChannelLevelsBuilder picks them up for /chan/.../offset bindings;
         # patchbay_param filters them out because they're OSC facades, not
         # routable mixer outputs.
@@ -229,31 +180,62 @@ class Mixer(object):
         # Each stutter channel re-registers /chan/{category.name}/stutter_period
         # on the OSC dispatcher. pythonosc fans incoming messages to every
         # handler, so one slider drives every mapper in a category. The
-        # returned OSCParams are grouped by category for the preset manager.
+        # returned OSCParams, plus each StutterMapper channel's own
+        # /chan/{name}/delay_curve, are grouped by category for the preset
+        # manager.
         self.stutter_period_params_by_category: Dict[Category, List[OSCParam]] = {}
         for ch in self.mix_channels:
-            param = ch.register_stutter_period(self.osc)
-            if param is not None:
-                self.stutter_period_params_by_category.setdefault(
-                    ch.category, []
-                ).append(param)
-
-        # History buffers for FFT generator outputs, sampled once per
-        # runChannelMix tick. Only populated and broadcast while the fft_dmx
-        # modal heartbeats /visualizer/enable_fft_gen_timeseries, to avoid wasting compute
-        # otherwise.
-        self.fft_history_len = 200
-        self.fft_gen_history: Dict[str, List[float]] = {
-            "fft_1": [0.0] * self.fft_history_len,
-            "fft_2": [0.0] * self.fft_history_len,
+            for param in (
+                ch.register_stutter_period(self.osc),
+                ch.register_delay_curve(self.osc),
+            ):
+                if param is not None:
+                    self.stutter_period_params_by_category.setdefault(
+                        ch.category, []
+                    ).append(param)
+
+        # Generator to generator modulation. The graph also evaluates every
+        # patched generator once per tick for the channels to read, so its
+        # sinks follow the signal patch (see _patch_changed).
+        self.modulation = ModulationGraph(generators)
+        self.modulation_params: Dict[Category, ModulationParam] = {}
+        osc.dispatcher.map(
+            "/modulation/route",
+            lambda _a, *args: self.configureModulation(*args),
+        )
+
+        # New samples of the FFT generator outputs and the synth source
+        # since the last visualizer frame. The front end keeps the rolling
+        # history itself, so only these deltas go over the wire. Sampled
+        # once per runChannelMix tick, and only while the matching modal
+        # heartbeats (/visualizer/enable_fft_gen_timeseries,
+        # /visualizer/enable_synth), to avoid wasting compute otherwise.
+        self.visualizer_pending: Dict[str, deque] = {
+            name: deque(maxlen=VisualizerFrame.MAX_ITEMS)
+            for name, _flag in VisualizerFrame.HISTORIES
         }
+        # A rig without one of the FFT generators just has no such stream
+        self.fft_viz_generators: Dict[str, Generator] = {}
+        for stream, gen_name in (("fftgen_1", "fft_1"), ("fftgen_2", "fft_2")):
+            gen = next((g for g in generators if g.name == gen_name), None)
+            if gen is not None:
+                self.fft_viz_generators[stream] = gen
         self.fft_viz_until: float = 0.0
         self.synth_visualizer_until: float = 0.0
-        self.synth_history: deque = deque(
-            [0.0] * self.fft_history_len, maxlen=self.fft_history_len
-        )
         self.fixture_visualizer_until: float = 0.0
 
+        # Visualizer frames go out at their own rate, independent of the tick
+        self.visualizer_frame = VisualizerFrame()
+        self.visualizer_interval = visualizer_ms / 1000
+        self.last_visualizer_frame: float = 0.0
+        self.last_visualizer_names: float = 0.0
+        self.viz_dimming_fixtures = [
+            f for f in self.all_fixtures if f.visualizer_dimming() is not None
+        ]
+        self.viz_pantilt_fixtures = [
+            f for f in self.all_fixtures if f.visualizer_pantilt() is not None
+        ]
+
         # Synth visualizer mirrors the history of a selected source channel.
         # Set via /visualizer/synth_source OSC param. Empty string means off.
         self.synth_visualizer_source: str = ""
@@ -274,6 +256,15 @@ class Mixer(object):
             lambda _a, *args: self.set_fixture_visualizer(bool(args[0])),
         )
 
+        # Only send the frames to the front ends showing one of their views
+        for topic in [
+            "/visualizer/enable_fft_gen_timeseries",
+            "/visualizer/enable_synth",
+            "/visualizer/enable_fixture",
+        ]:
+            osc.route_stream("/visualizer/frame", topic)
+        osc.route_stream("/visualizer/frame/fixtures", "/visualizer/enable_fixture")
+
     def set_fft_viz(self, enable: bool) -> None:
         # Heartbeat-driven: each /visualizer/enable_fft_gen_timeseries with value=1 extends the window
         # by ~2s. "off" messages are ignored on purpose — multiple UI clients
@@ -305,6 +296,24 @@ class Mixer(object):
     def mix_target_for_fixture(self, fixture_name: str, index: int = 0) -> MixTarget:
         return self.fixture_targets[fixture_name][index]
 
+    def spatial_channel(self, effect: SpatialEffect, index: int) -> MixChannel:
+        """Build the SpatialMapper channel for `effect` over the positioned
+        fixtures of its category."""
+        category = next(c for c in self.categories.all if c.name == effect.category)
+        fixtures = [
+            f
+            for f in self.all_fixtures
+            if f.category is category
+            and f.position is not None
+            and (effect.fixtures is None or f.name in effect.fixtures)
+        ]
+        mapper = SpatialMapper(
+            [self.mix_target_for_fixture(f.name) for f in fixtures],
+            [cast(Tuple[float, float, float], f.position) for f in fixtures],
+            effect.field,
+        )
+        return MixChannel(effect.name, category, index, mapper=mapper)
+
     def all_mix_targets(self) -> List[MixTarget]:
         return [mt for targets in self.fixture_targets.values() for mt in targets]
 
@@ -314,6 +323,12 @@ class Mixer(object):
                 ch.connected_generators.clear()
         else:
             self.channel_lookup[chan_name].connected_generators.clear()
+        self._patch_changed()
+
+    def _patch_changed(self) -> None:
+        self.modulation.set_sinks(
+            {gen for ch in self.mix_channels for gen in ch.connected_generators}
+        )
 
     def configureSignalPath(
         self, target_gen: str, target_chan: str, enable: bool
@@ -324,6 +339,7 @@ class Mixer(object):
             return
         if enable and gen not in ch.connected_generators:
             ch.connected_generators.append(gen)
+            self._patch_changed()
             if self.debug:
                 print(
                     "DEBUG configureSignalPath: connected {} -> {}".format(
@@ -333,6 +349,7 @@ class Mixer(object):
                 )
         elif not enable and gen in ch.connected_generators:
             ch.connected_generators.remove(gen)
+            self._patch_changed()
             if self.debug:
                 print(
                     "DEBUG configureSignalPath: disconnected {} -> {}".format(
@@ -356,11 +373,36 @@ class Mixer(object):
                 flush=True,
             )
 
+    def configureModulation(
+        self, source: str, target: str, attr: str, depth: float, sync: bool = True
+    ) -> bool:
+        """Route generator `source` onto `attr` of generator `target`,
+        depth 0 removes the route. False if the route was rejected."""
+        source_gen = self.modulation.generator(source)
+        target_gen = self.modulation.generator(target)
+        if source_gen is None or target_gen is None:
+            print(
+                "Unknown generator in modulation {} -> {}".format(source, target),
+                flush=True,
+            )
+            return False
+        try:
+            self.modulation.connect(source_gen, target_gen, attr, float(depth))
+        except ValueError as e:
+            print("Rejected modulation: {}".format(e), flush=True)
+            return False
+        param = self.modulation_params.get(target_gen.category)
+        if sync and param is not None:
+            param.sync()
+        return True
+
     def runChannelMix(self) -> None:
         ts = time.time() * 1000
 
+        self.modulation.tick(ts)
+        outputs = self.modulation.outputs
         for ch in self.mix_channels:
-            ch.tick(ts)
+            ch.tick(ts, outputs)
 
         if self.debug:
             self.debug_tick += 1
@@ -383,26 +425,23 @@ class Mixer(object):
                     flush=True,
                 )
 
-        # Sample fft generator outputs into the rolling history buffer when
-        # the fft_dmx modal is open (heartbeat-driven). Skipped otherwise so
-        # we don't pay the per-tick cost.
+        # Sample fft generator outputs for the visualizer when the fft_dmx
+        # modal is open (heartbeat-driven). Skipped otherwise so we don't
+        # pay the per-tick cost.
         if self.fft_viz_active():
-            for name, hist in self.fft_gen_history.items():
-                gen = next((g for g in self.generators if g.name == name), None)
-                if gen is None:
-                    continue
-                hist[1:] = hist[0:-1]
-                hist[0] = gen.value(ts)
+            for name, gen in self.fft_viz_generators.items():
+                value = gen.value(ts)
+                self.visualizer_pending[name].append(value)
                 if self.debug and self.debug_tick % 500 == 1:
                     print(
-                        "DEBUG fft_gen_history: {} = {:.4f}".format(name, hist[0]),
+                        "DEBUG fft_gen_history: {} = {:.4f}".format(name, value),
                         flush=True,
                     )
 
         if self.synth_visualizer_active() and self.synth_visualizer_source:
             source = self.channel_lookup.get(self.synth_visualizer_source)
             if source is not None:
-                self.synth_history.appendleft(source.value())
+                self.visualizer_pending["synth"].append(source.value())
 
     def runOutputMix(self) -> None:
         # Clear all accumulators and zero all fixtures
@@ -412,25 +451,57 @@ class Mixer(object):
         for ch in self.mix_channels:
             ch.map_output()
         # After all channels mapped, fixtures hold their final accumulated totals.
-        # Run any per-fixture post-map hooks (e.g. spot coord-system conversion)
-        # now that x/y components are both available.
+        # Run any per-fixture post-map hooks, then convert every spot's x/y
+        # to real pan/tilt in one batch now that both components are final.
         for fixture in self.all_fixtures:
             fixture.post_map_output()
+        YRXY200Spot.place_all(self.spots)
 
-        if self.synth_visualizer_active() and self.synth_visualizer_source:
-            self.osc.send_osc("/visualizer/synth_history", list(self.synth_history))
+        self.send_visualizer_frame()
 
-        if self.fft_viz_active():
-            self.osc.send_osc(
-                "/visualizer/fftgen_1_history", list(self.fft_gen_history["fft_1"])
-            )
-            self.osc.send_osc(
-                "/visualizer/fftgen_2_history", list(self.fft_gen_history["fft_2"])
-            )
+    def send_visualizer_frame(self) -> None:
+        """Send pending visualizer data as one /visualizer/frame blob.
 
-        if self.fixture_visualizer_active():
-            for fixture in self.all_fixtures:
-                fixture.send_visualizer()
+        Rate limited to visualizer_interval. Fixture names go to
+        /visualizer/frame/fixtures as [dimming count, dimming names...,
+        pan/tilt names...], resent every second so a freshly loaded front
+        end picks them up (batching drops the unchanged repeats).
+        """
+        fixture_viz = self.fixture_visualizer_active()
+        if not fixture_viz and not any(self.visualizer_pending.values()):
+            return
+
+        now = time.monotonic()
+        if now - self.last_visualizer_frame < self.visualizer_interval:
+            return
+        self.last_visualizer_frame = now
+
+        dimming: Optional[List[float]] = None
+        pantilt: Optional[List[Tuple[int, int]]] = None
+        if fixture_viz:
+            if now - self.last_visualizer_names >= 1.0:
+                self.last_visualizer_names = now
+                self.osc.send_osc(
+                    "/visualizer/frame/fixtures",
+                    [len(self.viz_dimming_fixtures)]
+                    + [f.name for f in self.viz_dimming_fixtures]
+                    + [f.name for f in self.viz_pantilt_fixtures],
+                )
+            dimming = [f.visualizer_dimming() or 0 for f in self.viz_dimming_fixtures]
+            pantilt = [
+                f.visualizer_pantilt() or (0, 0) for f in self.viz_pantilt_fixtures
+            ]
+
+        histories: Dict[str, List[float]] = {}
+        for name, pending in self.visualizer_pending.items():
+            if pending:
+                histories[name] = list(pending)
+                pending.clear()
+
+        blob = self.visualizer_frame.encode(
+            dimming=dimming, pantilt=pantilt, histories=histories
+        )
+        self.osc.send_osc("/visualizer/frame", blob)
 
     def updateDMX(self) -> None:
         self.dmx.submit()
@@ -454,7 +525,8 @@ class Mixer(object):
         )
 
     def stutter_period_params(self, category: Category) -> List[OSCParam]:
-        """Return the stutter_period OSCParams registered by channels in `category`.
+        """Return the stutter_period and delay_curve OSCParams registered by
+        channels in `category`.
 
         Builders splat these into their build_params output so the preset
         manager tracks the values. Empty list for categories without
@@ -462,6 +534,17 @@ class Mixer(object):
         """
         return self.stutter_period_params_by_category.get(category, [])
 
+    def modulation_param(self, category: Category) -> "ModulationParam":
+        """Build the ModulationParam for routes into `category`'s generators."""
+        if category not in self.modulation_params:
+            self.modulation_params[category] = ModulationParam(
+                self.osc,
+                "/modulation/{}".format(category.name),
+                category,
+                self,
+            )
+        return self.modulation_params[category]
+
     def synth_source_param(self, osc: OSCManager) -> OSCParam:
         """Bind /visualizer/synth_source to the mixer's synth_visualizer_source."""
         return OSCParam.bind(
@@ -519,3 +602,42 @@ class SignalPatchParam(OSCParam):
                 if gen in ch.connected_generators:
                     output_val.append(ch.name)
             self.osc.send_osc(self.addr, output_val)
+
+
+class ModulationParam(OSCParam):
+    """The modulation routes into one category's generators.
+
+    The value is flat, four entries per route: source, target, attribute
+    and depth, the same layout /modulation/route takes for a single route.
+    Loading a value replaces every route into the category.
+    """
+
+    def __init__(
+        self,
+        osc: OSCManager,
+        addr: str,
+        category: Category,
+        mixer: Mixer,
+    ) -> None:
+        super().__init__(
+            osc, addr, self.value_builder, self.dispatch_routes, default_value=[]
+        )
+        self.category = category
+        self.mixer = mixer
+
+    def value_builder(self) -> List[Any]:
+        routes: List[Any] = []
+        for (source, target, attr), depth in self.mixer.modulation.routes.items():
+            if target.category is self.category:
+                routes.extend([source.name, target.name, attr, depth])
+        return routes
+
+    def dispatch_routes(self, _: str, *args: Any) -> None:
+        graph = self.mixer.modulation
+        graph.clear({g for g in graph.generators if g.category is self.category})
+        for i in range(0, len(args) - 3, 4):
+            source, target, attr, depth = args[i : i + 4]
+            target_gen = graph.generator(target)
+            if target_gen is None or target_gen.category is not self.category:
+                continue
+            self.mixer.configureModulation(source, target, attr, depth, sync=False)
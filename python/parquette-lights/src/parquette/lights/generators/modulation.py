@@ -0,0 +1,217 @@
+"""Generator to generator modulation.
+
+A route adds `depth` times one generator's output to an attribute of
+another (amp, offset, period, phase or duty), e.g. noise wobbling a sine's
+period or an FFT band scaling a wave's amp. ModulationGraph evaluates the
+generators the mix reads once per tick, in topological order, so every
+modulator is computed before the generators it drives and every channel
+reading a generator sees the same cached output.
+
+The per tick plan is rebuilt only when routes or channel patches change;
+ticking it walks prebuilt tuples and writes into a preallocated dict.
+"""
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import math
+from threading import Lock
+
+from .generator import Generator
+
+MODULATABLE_ATTRS = ("amp", "offset", "period", "phase", "duty")
+
+# Modulated values are clamped so a deep route can't stall a generator
+# (period 0) or invert its pulse width
+ATTR_LIMITS: Dict[str, Tuple[float, float]] = {
+    "period": (1.0, math.inf),
+    "duty": (0.0, math.inf),
+}
+
+Route = Tuple[Generator, Generator, str]
+
+
+class _Slot(object):
+    """One modulated attribute: the base value the routes add onto and
+    the (source, depth) pairs feeding it."""
+
+    __slots__ = ("target", "attr", "inputs", "base", "written", "lo", "hi")
+
+    def __init__(self, target: Generator, attr: str) -> None:
+        self.target = target
+        self.attr = attr
+        self.inputs: Tuple[Tuple[Generator, float], ...] = ()
+        self.base = float(getattr(target, attr))
+        # NaN never compares equal, so the first apply() reads the base
+        self.written = math.nan
+        self.lo, self.hi = ATTR_LIMITS.get(attr, (-math.inf, math.inf))
+        target.modulation_slots[attr] = self
+
+    def unmodulated(self) -> float:
+        current = getattr(self.target, self.attr)
+        if current != self.written:
+            # Written by OSC, a preset or a fade since the last tick: that
+            # is the new base
+            return current
+        return self.base
+
+    def apply(self, outputs: Dict[Generator, float]) -> None:
+        self.base = self.unmodulated()
+        value = self.base
+        for source, depth in self.inputs:
+            value += depth * outputs[source]
+        setattr(self.target, self.attr, min(max(value, self.lo), self.hi))
+        self.written = getattr(self.target, self.attr)
+
+    def restore(self) -> None:
+        del self.target.modulation_slots[self.attr]
+        if getattr(self.target, self.attr) == self.written:
+            setattr(self.target, self.attr, self.base)
+
+
+class ModulationGraph(object):
+    """Routes between generators and the per tick evaluation of them.
+
+    `outputs` holds every generator's value for the current tick. Only
+    the sinks (generators patched to a mix channel, see set_sinks) and
+    whatever modulates them are evaluated; the rest keep their last value.
+
+    The modulated value is written to the target's attribute and kept
+    between ticks, so a modulated WaveGenerator period stays phase
+    continuous. The standard params read the base instead (see
+    Generator.unmodulated), writes from elsewhere are picked up as the new
+    base, and removing the last route on an attribute puts the base back.
+
+    Routes and sinks may change from the OSC thread; they wait for a tick
+    in progress to finish, so no slot applies after it was restored.
+    """
+
+    def __init__(self, generators: Sequence[Generator]) -> None:
+        self.generators = list(generators)
+        self.routes: Dict[Route, float] = {}
+        self.outputs: Dict[Generator, float] = {g: 0.0 for g in self.generators}
+        self._slots: Dict[Tuple[Generator, str], _Slot] = {}
+        self._sinks: Set[Generator] = set()
+        self._plan: List[Tuple[Generator, Tuple[_Slot, ...]]] = []
+        self._lock = Lock()
+
+    def generator(self, name: str) -> Optional[Generator]:
+        return next((g for g in self.generators if g.name == name), None)
+
+    def connect(
+        self, source: Generator, target: Generator, attr: str, depth: float
+    ) -> None:
+        """Add or update a route; depth 0 removes it.
+
+        Raises ValueError for an attribute the target can't have modulated
+        or a route that would close a cycle, leaving the graph unchanged.
+        """
+        if depth == 0:
+            self.disconnect(source, target, attr)
+            return
+        if attr not in MODULATABLE_ATTRS or not hasattr(target, attr):
+            raise ValueError(
+                "{} has no modulatable attribute {!r}".format(target.name, attr)
+            )
+        for gen in (source, target):
+            if gen not in self.outputs:
+                raise ValueError("{} is not in the modulation graph".format(gen.name))
+
+        key = (source, target, attr)
+        with self._lock:
+            previous = self.routes.get(key)
+            self.routes[key] = float(depth)
+            try:
+                self._rebuild()
+            except ValueError:
+                if previous is None:
+                    del self.routes[key]
+                else:
+                    self.routes[key] = previous
+                self._rebuild()
+                raise
+
+    def disconnect(self, source: Generator, target: Generator, attr: str) -> None:
+        with self._lock:
+            if self.routes.pop((source, target, attr), None) is not None:
+                self._rebuild()
+
+    def clear(self, targets: Optional[Set[Generator]] = None) -> None:
+        """Remove every route, or every route into `targets`."""
+        with self._lock:
+            for key in list(self.routes):
+                if targets is None or key[1] in targets:
+                    del self.routes[key]
+            self._rebuild()
+
+    def set_sinks(self, sinks: Set[Generator]) -> None:
+        with self._lock:
+            self._sinks = set(sinks)
+            self._rebuild()
+
+    def order(self) -> List[Generator]:
+        """Every generator, modulators before the generators they drive.
+
+        Kahn's algorithm, ties broken by the order generators were given
+        in. Raises ValueError naming the generators on a cycle.
+        """
+        indegree = {g: 0 for g in self.generators}
+        edges: Dict[Generator, List[Generator]] = {g: [] for g in self.generators}
+        for source, target in dict.fromkeys((s, t) for s, t, _a in self.routes):
+            edges[source].append(target)
+            indegree[target] += 1
+
+        ready = [g for g in self.generators if indegree[g] == 0]
+        ordered: List[Generator] = []
+        while ready:
+            gen = ready.pop(0)
+            ordered.append(gen)
+            for target in edges[gen]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+
+        if len(ordered) < len(self.generators):
+            stuck = [g.name for g in self.generators if indegree[g] > 0]
+            raise ValueError(
+                "Modulation cycle through {}".format(", ".join(sorted(stuck)))
+            )
+        return ordered
+
+    def _rebuild(self) -> None:
+        ordered = self.order()
+
+        inputs: Dict[Tuple[Generator, str], List[Tuple[Generator, float]]] = {}
+        for (source, target, attr), depth in self.routes.items():
+            inputs.setdefault((target, attr), []).append((source, depth))
+
+        for key in list(self._slots):
+            if key not in inputs:
+                self._slots.pop(key).restore()
+        for key, feeds in inputs.items():
+            if key not in self._slots:
+                self._slots[key] = _Slot(*key)
+            self._slots[key].inputs = tuple(feeds)
+
+        # Sinks plus everything upstream of them
+        needed = set(self._sinks)
+        pending = list(self._sinks)
+        while pending:
+            gen = pending.pop()
+            for source, target, _attr in self.routes:
+                if target is gen and source not in needed:
+                    needed.add(source)
+                    pending.append(source)
+
+        self._plan = [
+            (gen, tuple(s for (t, _a), s in self._slots.items() if t is gen))
+            for gen in ordered
+            if gen in needed
+        ]
+
+    def tick(self, millis: float) -> None:
+        outputs = self.outputs
+        with self._lock:
+            for gen, slots in self._plan:
+                for slot in slots:
+                    slot.apply(outputs)
+                outputs[gen] = gen.value(millis)
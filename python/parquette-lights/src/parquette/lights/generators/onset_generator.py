@@ -0,0 +1,37 @@
+import math
+
+from .impulse_generator import ImpulseGenerator
+from ..category import Category
+
+
+class OnsetGenerator(ImpulseGenerator):
+    """An impulse punched by the audio analysis on every detected onset,
+    so lights hit with the transient rather than with the BPM estimate.
+
+    Holds amp + offset for `duty` ms like ImpulseGenerator, then with
+    `decay` > 0 falls back to offset exponentially, `decay` ms per 1/e.
+    """
+
+    STANDARD_ATTRS = ["amp", "duty", "decay"]
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        category: Category,
+        amp: float = 1,
+        offset: float = 0,
+        duty: float = 40,
+        decay: float = 120,
+    ):
+        super().__init__(
+            name=name, category=category, amp=amp, offset=offset, duty=duty
+        )
+        self.decay = decay
+
+    def value(self, millis: float) -> float:
+        level = super().value(millis)
+        ellapsed = millis - self.punch_point
+        if self.decay <= 0 or ellapsed < self.duty:
+            return level
+        return self.offset + self.amp * math.exp(-(ellapsed - self.duty) / self.decay)
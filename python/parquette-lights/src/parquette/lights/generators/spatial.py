@@ -0,0 +1,131 @@
+"""Spatial fields for SpatialMapper channels.
+
+Each fixture can carry a room position (Fixture.position: metres, x to
+the right, y from the front towards the back, z up). A SpatialField turns
+the positions of a channel's fixtures into a per-fixture delay, in metres
+of travel, and a gain in 0..1. SpatialMapper scales the delay by the
+category's stutter_period (ms per metre) so a single input pulse moves
+through the room.
+
+SPATIAL_EFFECTS declares which spatial channels the mixer builds. New
+effects are a field plus an entry there, not a change to the mixer.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+
+import math
+
+import numpy as np
+
+Vec3 = Tuple[float, float, float]
+
+
+class SpatialField(ABC):
+    @abstractmethod
+    def evaluate(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(N, 3) positions -> (delay in metres >= 0, gain in 0..1)."""
+
+
+class PlaneSweep(SpatialField):
+    """A plane moving along `direction`; the first fixture it meets fires
+    first. Along +y this is the front-to-back stutter."""
+
+    def __init__(self, direction: Vec3) -> None:
+        norm = math.sqrt(sum(c * c for c in direction))
+        if norm == 0:
+            raise ValueError("PlaneSweep direction must be non-zero")
+        self.direction = np.array(direction, dtype=np.float64) / norm
+
+    def evaluate(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        along = positions @ self.direction
+        return along - along.min(), np.ones(len(positions))
+
+
+class RadialRipple(SpatialField):
+    """Rings spreading out from `centre` (default: the fixtures' centroid).
+
+    `falloff` dims the outer fixtures, 0 keeps every fixture at full level
+    and 1 fades the farthest one out completely.
+    """
+
+    def __init__(self, centre: Optional[Vec3] = None, falloff: float = 0.0) -> None:
+        self.centre = centre
+        self.falloff = falloff
+
+    def evaluate(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        centre = positions.mean(axis=0) if self.centre is None else self.centre
+        radius = np.linalg.norm(positions - centre, axis=1)
+        reach = max(float(radius.max()), 1e-9)
+        gain = np.clip(1.0 - self.falloff * radius / reach, 0.0, 1.0)
+        return radius - radius.min(), gain
+
+
+class RotatingBeam(SpatialField):
+    """A beam turning about a vertical axis through `centre` (default: the
+    fixtures' centroid), so a pulse travels round the room.
+
+    Fixtures are delayed by their azimuth; one full turn is worth
+    `revolution` metres of delay, i.e. revolution * stutter_period ms.
+    The turn starts at `start_deg` (0 = +x, 90 = towards the back).
+    """
+
+    def __init__(
+        self,
+        centre: Optional[Vec3] = None,
+        *,
+        revolution: float = 4.0,
+        start_deg: float = -90.0,
+        clockwise: bool = False,
+    ) -> None:
+        self.centre = centre
+        self.revolution = revolution
+        self.start_deg = start_deg
+        self.clockwise = clockwise
+
+    def evaluate(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        centre = positions.mean(axis=0) if self.centre is None else self.centre
+        offset = positions - centre
+        angle = np.arctan2(offset[:, 1], offset[:, 0]) - math.radians(self.start_deg)
+        if self.clockwise:
+            angle = -angle
+        turn = np.mod(angle, 2 * math.pi) / (2 * math.pi)
+        return turn * self.revolution, np.ones(len(positions))
+
+
+class SpatialEffect(object):
+    """One spatial mix channel: `name`, the category whose fixtures it
+    drives and the field shaping it. `fixtures` limits it to those
+    fixture names; by default every positioned fixture in the category."""
+
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        field: SpatialField,
+        fixtures: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.name = name
+        self.category = category
+        self.field = field
+        self.fixtures = fixtures
+
+
+# Ceiling washes are excluded from the wall wash sweeps
+WALL_WASHES = ["wash_fl", "wash_fr", "wash_ml", "wash_mr", "wash_bl", "wash_br"]
+
+SPATIAL_EFFECTS: Tuple[SpatialEffect, ...] = (
+    SpatialEffect("reds_fwd", "reds", PlaneSweep((0.0, 1.0, 0.0))),
+    SpatialEffect("reds_back", "reds", PlaneSweep((0.0, -1.0, 0.0))),
+    SpatialEffect("reds_ripple", "reds", RadialRipple()),
+    SpatialEffect("reds_spin", "reds", RotatingBeam()),
+    SpatialEffect(
+        "washes_fwd", "washes", PlaneSweep((0.0, 1.0, 0.0)), fixtures=WALL_WASHES
+    ),
+    SpatialEffect(
+        "washes_back", "washes", PlaneSweep((0.0, -1.0, 0.0)), fixtures=WALL_WASHES
+    ),
+    SpatialEffect(
+        "washes_spin", "washes", RotatingBeam(revolution=2.0), fixtures=WALL_WASHES
+    ),
+)
@@ -1,23 +1,182 @@
-from typing import Optional, List, Any, Callable, Union
-
-from threading import Thread
+from typing import (
+    Optional,
+    List,
+    Any,
+    Callable,
+    Union,
+    Dict,
+    Tuple,
+    Set,
+    Generator,
+    Iterator,
+)
+from collections.abc import Iterable
+from contextlib import contextmanager
+import copy
+import re
+import socket
+import time
+
+from threading import Thread, Lock, local
 
 from pythonosc.dispatcher import Dispatcher, Handler
 from pythonosc import osc_server
+from pythonosc.osc_bundle_builder import OscBundleBuilder, IMMEDIATELY
+from pythonosc.osc_message import OscMessage
+from pythonosc.osc_message_builder import OscMessageBuilder
 from pythonosc.udp_client import SimpleUDPClient
 
+from .param_fader import ParamFader
+
+# Keep bundles under a typical Wi-Fi MTU so a datagram is never fragmented.
+OSC_BUNDLE_MAX_BYTES = 1400
+# "#bundle\0" plus the 8 byte timetag
+_BUNDLE_HEADER_BYTES = 16
+
+_MISSING = object()
+
+
+class ExactMatchDispatcher(Dispatcher):
+    """Dispatcher that resolves concrete incoming addresses with a dict lookup.
+
+    pythonosc compiles a regex from every incoming address and tests it
+    against every mapped address, which is slow with the hundreds of
+    addresses (many registered several times) the server maps. Here the
+    handler list for each concrete address is resolved once, in the same
+    order pythonosc would yield it, and cached until the next map/unmap.
+    Incoming patterns that contain OSC wildcards still go through
+    pythonosc's matcher.
+    """
+
+    PATTERN_CHARS = frozenset("*?[]{}")
+    MAX_CACHED_ADDRESSES = 4096
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._resolved: Dict[str, List[Handler]] = {}
+        self._wildcards: Dict[str, re.Pattern] = {}
+        self._generation = 0
+
+    def map(  # type: ignore[override]
+        self, address: str, handler: Callable, *args: Any, **kwargs: Any
+    ) -> Handler:
+        handler_obj = super().map(address, handler, *args, **kwargs)
+        self._invalidate()
+        return handler_obj
+
+    def unmap(  # type: ignore[override]
+        self, address: str, handler: Any, *args: Any, **kwargs: Any
+    ) -> None:
+        try:
+            super().unmap(address, handler, *args, **kwargs)
+        finally:
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._generation += 1
+        self._resolved = {}
+        self._wildcards = {}
+
+    def _resolve(self, address: str) -> List[Handler]:
+        generation = self._generation
+        wildcards = self._wildcards
+        handlers: List[Handler] = []
+        # pylint: disable-next=protected-access
+        for addr, mapped in list(self._map.items()):
+            if addr == address:
+                handlers.extend(mapped)
+            elif "*" in addr:
+                # Same wildcard registration match pythonosc uses
+                compiled = wildcards.get(addr)
+                if compiled is None:
+                    compiled = re.compile(addr.replace("*", ".*?") + "$")
+                    wildcards[addr] = compiled
+                if compiled.match(address):
+                    handlers.extend(mapped)
+
+        if generation == self._generation:
+            if len(self._resolved) >= self.MAX_CACHED_ADDRESSES:
+                self._resolved = {}
+            self._resolved[address] = handlers
+        return handlers
+
+    def handlers_for_address(
+        self, address_pattern: str
+    ) -> Generator[Handler, None, None]:
+        if not self.PATTERN_CHARS.isdisjoint(address_pattern):
+            yield from super().handlers_for_address(address_pattern)
+            return
+
+        handlers = self._resolved.get(address_pattern)
+        if handlers is None:
+            handlers = self._resolve(address_pattern)
+
+        if handlers:
+            yield from handlers
+        elif self._default_handler:
+            yield self._default_handler
+
+
+class _InvalidatingDispatcher(ExactMatchDispatcher):
+    """Dispatcher that tells the manager when an address arrives inbound.
+
+    The front end updates its own widget when the user moves it, so the
+    last value we sent for that address is no longer what it shows.
+    """
+
+    def __init__(self, on_inbound: Callable[[str], None]) -> None:
+        super().__init__()
+        self._on_inbound = on_inbound
+
+    def handlers_for_address(
+        self, address_pattern: str
+    ) -> Generator[Handler, None, None]:
+        self._on_inbound(address_pattern)
+        return super().handlers_for_address(address_pattern)
+
+
+Endpoint = Tuple[str, int]
+
 
 class OSCManager(object):
     server: osc_server.ThreadingOSCUDPServer
     server_thread: Optional[Thread] = None
+    client: Optional[SimpleUDPClient] = None
+    target: Optional[Endpoint] = None
 
     def __init__(self) -> None:
-        self.dispatcher = Dispatcher()
+        self.dispatcher = _InvalidatingDispatcher(self.forget_sent)
 
         self.debug_osc_in = False
         self.debug_osc_out = False
         self._debug_handler: Optional[Handler] = None
 
+        # When batching, send_osc only queues; flush() (called once per
+        # compute tick) packs the queue into bundles and drops messages
+        # whose payload matches the last one sent on that address.
+        self.batching = False
+        self._outbox: List[Tuple[str, Any]] = []
+        self._outbox_lock = Lock()
+        self._last_sent: Dict[Optional[Endpoint], Dict[str, Any]] = {}
+
+        # Extra front ends learned at runtime (see ClientTracker). State
+        # goes to every target; addresses registered with route_stream only
+        # go to the targets currently subscribed to that stream's topic.
+        self._learned: Dict[Endpoint, SimpleUDPClient] = {}
+        self._targets_lock = Lock()
+        self._stream_routes: Dict[str, List[str]] = {}
+        self._stream_prefixes: List[Tuple[str, str]] = []
+        self._topic_cache: Dict[str, List[str]] = {}
+        self._subscribers: Dict[str, Set[Endpoint]] = {}
+
+        # Param transactions (see ParamTransaction). With deferred_apply on,
+        # committed transactions wait for apply_pending() at the next tick.
+        self.deferred_apply = False
+        self._pending_transactions: List["ParamTransaction"] = []
+        self._transaction_lock = Lock()
+        self._transaction_local = local()
+        self.fader = ParamFader()
+
     def set_debug(self, debug_osc_in: bool, debug_osc_out: bool) -> None:
         self.debug_osc_in = debug_osc_in
         self.debug_osc_out = debug_osc_out
@@ -36,6 +195,76 @@ class OSCManager(object):
 
     def set_target(self, target_ip: str, target_port: int) -> None:
         self.client = SimpleUDPClient(target_ip, target_port)
+        # resolve so a learned reply address from the same front end
+        # compares equal and doesn't get a second copy
+        self.target = (socket.gethostbyname(target_ip), target_port)
+
+    def add_target(self, endpoint: Endpoint) -> None:
+        with self._targets_lock:
+            if endpoint == self.target or endpoint in self._learned:
+                return
+            self._learned[endpoint] = SimpleUDPClient(*endpoint)
+        print("OSC target added {}:{}".format(*endpoint), flush=True)
+
+    def remove_target(self, endpoint: Endpoint) -> None:
+        with self._targets_lock:
+            if self._learned.pop(endpoint, None) is None:
+                return
+        self._last_sent.pop(endpoint, None)
+        print("OSC target removed {}:{}".format(*endpoint), flush=True)
+
+    def route_stream(self, address: str, topic: str, *, prefix: bool = False) -> None:
+        """Send `address` (or every address under it) only to subscribers of `topic`.
+
+        An address routed under several topics goes to subscribers of any
+        of them. Until set_subscribers has been called for a topic its
+        streams go to every target, so nothing changes without a
+        ClientTracker.
+        """
+        if prefix:
+            self._stream_prefixes.append((address, topic))
+        else:
+            self._stream_routes.setdefault(address, []).append(topic)
+        self._topic_cache.clear()
+
+    def stream_topics(self) -> List[str]:
+        topics = [topic for ts in self._stream_routes.values() for topic in ts]
+        topics += [topic for _prefix, topic in self._stream_prefixes]
+        return sorted(set(topics))
+
+    def topics_for(self, address: str) -> List[str]:
+        try:
+            return self._topic_cache[address]
+        except KeyError:
+            pass
+        topics = list(self._stream_routes.get(address, []))
+        topics += [
+            topic
+            for prefix, topic in self._stream_prefixes
+            if address.startswith(prefix)
+        ]
+        self._topic_cache[address] = topics
+        return topics
+
+    def set_subscribers(self, topic: str, endpoints: Set[Endpoint]) -> None:
+        with self._targets_lock:
+            self._subscribers[topic] = set(endpoints)
+
+    def destinations(
+        self, address: str
+    ) -> List[Tuple[Optional[Endpoint], SimpleUDPClient]]:
+        topics = self.topics_for(address)
+        with self._targets_lock:
+            dests: List[Tuple[Optional[Endpoint], SimpleUDPClient]] = []
+            if self.client is not None:
+                dests.append((self.target, self.client))
+            dests += list(self._learned.items())
+            if topics and all(t in self._subscribers for t in topics):
+                subs: Set[Optional[Endpoint]] = set()
+                for topic in topics:
+                    subs |= self._subscribers[topic]
+                dests = [d for d in dests if d[0] in subs]
+        return dests
 
     def print_osc(self, label: str, address: str, *osc_arguments: List[Any]) -> None:
         print(label, address, osc_arguments, flush=True)
@@ -47,8 +276,129 @@ class OSCManager(object):
             else:
                 self.print_osc("out", address, args)
 
-        if self.client is not None:
-            self.client.send_message(address, args)
+        if self.client is None:
+            return
+
+        if self.batching:
+            with self._outbox_lock:
+                # snapshot now, callers reuse and mutate their lists
+                self._outbox.append((address, copy.copy(args)))
+            return
+
+        dests = self.destinations(address)
+        if len(dests) == 0:
+            return
+        msg = self.build_message(address, args)
+        for _endpoint, client in dests:
+            client.send(msg)
+
+    def set_batching(self, batching: bool) -> None:
+        self.batching = batching
+        if not batching:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send everything queued since the last flush as MTU-sized bundles.
+
+        Messages are kept in order and not coalesced, since some addresses
+        (the patch bay) are multiplexed and carry a different payload per
+        send. A message is only dropped for a target when its payload is
+        identical to the previous one sent to that target on that address.
+        """
+        with self._outbox_lock:
+            pending = self._outbox
+            self._outbox = []
+
+        if self.client is None or len(pending) == 0:
+            return
+
+        per_target: Dict[
+            Optional[Endpoint], Tuple[SimpleUDPClient, List[OscMessage]]
+        ] = {}
+        for address, args in pending:
+            msg: Optional[OscMessage] = None
+            for endpoint, client in self.destinations(address):
+                if self._is_duplicate(endpoint, address, args):
+                    continue
+                self._last_sent.setdefault(endpoint, {})[address] = args
+                if msg is None:
+                    msg = self.build_message(address, args)
+                per_target.setdefault(endpoint, (client, []))[1].append(msg)
+
+        for client, msgs in per_target.values():
+            self._send_bundled(client, msgs)
+
+    @classmethod
+    def _send_bundled(cls, client: SimpleUDPClient, msgs: List[OscMessage]) -> None:
+        builder: Optional[OscBundleBuilder] = None
+        first: Optional[OscMessage] = None
+        bundle_size = _BUNDLE_HEADER_BYTES
+        for msg in msgs:
+            content_size = 4 + msg.size
+            if first is not None and bundle_size + content_size > OSC_BUNDLE_MAX_BYTES:
+                cls._send_batch(client, first, builder)
+                builder, first = None, None
+                bundle_size = _BUNDLE_HEADER_BYTES
+
+            if first is None:
+                first = msg
+            else:
+                if builder is None:
+                    builder = OscBundleBuilder(IMMEDIATELY)
+                    builder.add_content(first)
+                builder.add_content(msg)
+            bundle_size += content_size
+
+        if first is not None:
+            cls._send_batch(client, first, builder)
+
+    @classmethod
+    def _send_batch(
+        cls,
+        client: SimpleUDPClient,
+        first: OscMessage,
+        builder: Optional[OscBundleBuilder],
+    ) -> None:
+        # a lone message goes out bare, no point wrapping it
+        client.send(first if builder is None else builder.build())
+
+    def _is_duplicate(
+        self, endpoint: Optional[Endpoint], address: str, args: Any
+    ) -> bool:
+        # forget_sent may clear the dict from a server thread mid-flush
+        last = self._last_sent.get(endpoint, {}).get(address, _MISSING)
+        if last is _MISSING:
+            return False
+        try:
+            return bool(last == args)
+        except ValueError:
+            # numpy arrays don't compare to a single bool
+            return False
+
+    def forget_sent(self, address: Optional[str] = None) -> None:
+        """Drop the dedup record for one address, or all of them.
+
+        Call with no address to force the next flush to resend everything,
+        e.g. when a new front end asks for a full sync.
+        """
+        if address is None:
+            self._last_sent.clear()
+        else:
+            for sent in list(self._last_sent.values()):
+                sent.pop(address, None)
+
+    @classmethod
+    def build_message(cls, address: str, args: Any) -> OscMessage:
+        # Mirrors SimpleUDPClient.send_message argument handling
+        builder = OscMessageBuilder(address=address)
+        if args is None:
+            pass
+        elif not isinstance(args, Iterable) or isinstance(args, (str, bytes)):
+            builder.add_arg(args)
+        else:
+            for val in args:
+                builder.add_arg(val)
+        return builder.build()
 
     def serve(self, threaded: bool = False) -> None:
         if self.server is None:
@@ -67,6 +417,53 @@ class OSCManager(object):
     def registered_addresses(self) -> List[str]:
         return list(self.dispatcher._map.keys())  # pylint: disable=protected-access
 
+    @contextmanager
+    def transaction(
+        self, *, fade: float = 0.0, switch_at: float = 0.0
+    ) -> Iterator["ParamTransaction"]:
+        """Stage param writes and commit them together on exit.
+
+        With `fade` > 0 numeric params are interpolated to their new values
+        over that many seconds and the rest switch at `switch_at` (0..1)
+        of the fade. Nested calls on the same thread join the outermost
+        transaction, fade included, so a scene can wrap several preset
+        selects into one commit. Nothing is committed if the block raises.
+        """
+        current = getattr(self._transaction_local, "transaction", None)
+        if current is not None:
+            yield current
+            return
+
+        transaction = ParamTransaction(fade=fade, switch_at=switch_at)
+        self._transaction_local.transaction = transaction
+        try:
+            yield transaction
+        finally:
+            self._transaction_local.transaction = None
+        self.commit(transaction)
+
+    def commit(self, transaction: "ParamTransaction") -> None:
+        if self.deferred_apply:
+            with self._transaction_lock:
+                self._pending_transactions.append(transaction)
+        else:
+            transaction.apply(self.fader)
+
+    def set_deferred_apply(self, deferred: bool) -> None:
+        self.deferred_apply = deferred
+        if not deferred:
+            self.apply_pending()
+
+    def apply_pending(self) -> None:
+        """Apply committed transactions and advance running fades. Called
+        once per compute tick."""
+        with self._transaction_lock:
+            pending = self._pending_transactions
+            self._pending_transactions = []
+        for transaction in pending:
+            transaction.apply(self.fader)
+        self.fader.tick()
+
 
 class UIDebugFrame(dict):
     def __init__(self, osc: OSCManager, target_addr: str) -> None:
@@ -83,9 +480,6 @@ class UIDebugFrame(dict):
         return str(result)
 
 
-_MISSING = object()
-
-
 class OSCParam(object):
     def __init__(
         self,
@@ -96,20 +490,28 @@ class OSCParam(object):
         *,
         on_change: Optional[Callable[[], None]] = None,
         default_value: Any = _MISSING,
+        discrete: bool = False,
     ) -> None:
         self.osc = osc
         self.addr = addr
         self.value_lambda = value_lambda
         self.on_change = on_change
+        # Indexes and other steps: crossfades switch these, never
+        # interpolate them
+        self.discrete = discrete
         self.has_default = default_value is not _MISSING
         self.default_value = default_value if self.has_default else None
 
         def handler(a: str, *osc_args: Any) -> None:
+            # a live write takes over from a running fade
+            osc.fader.cancel(self)
             dispatch_lambda(a, *osc_args)
             if self.on_change is not None:
                 self.on_change()
 
         self.dispatch_lambda = handler
+        # without on_change, for ParamTransaction
+        self.apply_lambda = dispatch_lambda
         osc.dispatcher.map(addr, handler)
 
     def load(self, addr: str, *osc_args: Any, sync: bool = True) -> None:
@@ -120,6 +522,18 @@ class OSCParam(object):
     def sync(self) -> None:
         self.osc.send_osc(self.addr, self.value_lambda())
 
+    def holds(self, *osc_args: Any) -> bool:
+        """True if loading `osc_args` would leave the value unchanged."""
+        target = osc_args[0] if len(osc_args) == 1 else list(osc_args)
+        current = self.value_lambda()
+        if isinstance(current, tuple):
+            current = list(current)
+        try:
+            return bool(current == target)
+        except ValueError:
+            # numpy arrays compare elementwise, treat them as changed
+            return False
+
     def is_at_default(self) -> bool:
         """True if this param has a default and its current value matches it."""
         return self.has_default and self.value_lambda() == self.default_value
@@ -133,18 +547,25 @@ class OSCParam(object):
         field: str,
         *,
         on_change: Optional[Callable[[], None]] = None,
+        discrete: bool = False,
+        getter: Optional[Callable[[], Any]] = None,
     ) -> "OSCParam":
         """Bind an OSC address to an attribute on one or more target objects.
 
         `target` may be a single object or a list. The first object is used
-        as the getter source; incoming values are written to every target
-        via `obj_param_setter`. The primary target's current value at bind
-        time is captured as the default so preset save/load can skip values
-        that match it.
+        as the getter source, unless `getter` is given; incoming values are
+        written to every target via `obj_param_setter`. The current value at
+        bind time is captured as the default so preset save/load can skip
+        values that match it.
         """
         targets: List[Any] = target if isinstance(target, list) else [target]
         primary = targets[0]
 
+        def read() -> Any:
+            return getattr(primary, field)
+
+        value = getter or read
+
         def dispatch(_addr: str, *args: Any) -> None:
             # OSC messages may deliver a scalar (one arg) or a vector (multi
             # positional args). Collapse to a single value the setter can
@@ -158,10 +579,11 @@ class OSCParam(object):
         return cls(
             osc,
             addr,
-            lambda: getattr(primary, field),
+            value,
             dispatch,
             on_change=on_change,
-            default_value=getattr(primary, field),
+            default_value=value(),
+            discrete=discrete,
         )
 
     @classmethod
@@ -173,3 +595,92 @@ class OSCParam(object):
                 descriptor.__set__(obj, value)
             except AttributeError:
                 obj.__dict__[field] = value
+
+
+class ParamTransaction(object):
+    """A set of param writes applied together, see OSCManager.transaction.
+
+    Each param is written once (the last staged value wins, at the position
+    it was last staged) and only if the value actually changes. Then every
+    distinct on_change hook of the changed params runs once, the changed
+    params are synced to the front end, and every distinct on_commit
+    callback runs once. With a fade, changed params are handed to the
+    ParamFader instead, which syncs them and runs their hooks as they land.
+    """
+
+    def __init__(self, *, fade: float = 0.0, switch_at: float = 0.0) -> None:
+        self.fade = fade
+        self.switch_at = switch_at
+        self._ops: List[Optional[Tuple[Optional[OSCParam], str, Any]]] = []
+        self._param_index: Dict[int, int] = {}
+        self._on_commit: Dict[Callable[[], Any], None] = {}
+        self.changed: List[OSCParam] = []
+
+    def load(self, param: OSCParam, addr: str, *osc_args: Any) -> None:
+        index = self._param_index.get(id(param))
+        if index is not None:
+            self._ops[index] = None
+        self._param_index[id(param)] = len(self._ops)
+        self._ops.append((param, addr, osc_args))
+
+    def call(self, fn: Callable[[], Any]) -> None:
+        """Stage an arbitrary write, applied in order with the params."""
+        self._ops.append((None, "", fn))
+
+    def on_commit(self, fn: Callable[[], Any]) -> None:
+        self._on_commit[fn] = None
+
+    def apply(self, fader: Optional[ParamFader] = None) -> None:
+        # Diffed here rather than when staged: with deferred apply an
+        # earlier pending transaction may still change the current values.
+        hooks: Dict[Callable[[], Any], None] = {}
+        # one start time so every param in the transaction fades in step
+        now = time.monotonic()
+        for op in self._ops:
+            if op is None:
+                continue
+            param, addr, payload = op
+            # One bad stored value skips its param instead of raising: with
+            # deferred apply this runs on the compute thread
+            try:
+                if param is None:
+                    payload()
+                    continue
+                if fader is not None:
+                    fader.cancel(param)
+                if param.holds(*payload):
+                    continue
+                if (
+                    fader is not None
+                    and self.fade > 0
+                    and fader.start(
+                        param,
+                        addr,
+                        payload,
+                        self.fade,
+                        switch_at=self.switch_at,
+                        now=now,
+                    )
+                ):
+                    self.changed.append(param)
+                    continue
+                param.apply_lambda(addr, *payload)
+                self.changed.append(param)
+                param.sync()
+                if param.on_change is not None:
+                    hooks[param.on_change] = None
+            # pylint: disable-next=broad-exception-caught
+            except Exception as e:
+                print(
+                    "Transaction skipped {} {}: {}".format(addr or "call", payload, e),
+                    flush=True,
+                )
+
+        callbacks = list(hooks)
+        callbacks += [fn for fn in self._on_commit if fn not in hooks]
+        for fn in callbacks:
+            try:
+                fn()
+            # pylint: disable-next=broad-exception-caught
+            except Exception as e:
+                print("Transaction callback failed: {}".format(e), flush=True)
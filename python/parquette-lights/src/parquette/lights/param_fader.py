@@ -0,0 +1,196 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numbers
+import time
+from threading import Lock
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .osc import OSCParam
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _continuous(values: List[Any]) -> bool:
+    """Numbers, at least one of them a float: int to int is a step."""
+    return all(_numeric(v) for v in values) and any(
+        not isinstance(v, numbers.Integral) for v in values
+    )
+
+
+def fade_vector(current: Any, osc_args: Tuple[Any, ...]) -> Optional[np.ndarray]:
+    """Flatten a param's current value for a fade towards `osc_args`.
+
+    Returns None when the pair can't be interpolated: strings, bools,
+    ints on both ends, mismatched lengths. Those params switch instead of
+    fading.
+    """
+    if len(osc_args) == 1 and _continuous([current, osc_args[0]]):
+        return np.array([current], dtype=np.float64)
+    if isinstance(current, (list, tuple, np.ndarray)) and len(current) == len(osc_args):
+        if _continuous([*current, *osc_args]):
+            return np.array(current, dtype=np.float64)
+    return None
+
+
+class _Fade(object):
+    # pylint: disable-next=too-many-positional-arguments
+    def __init__(
+        self,
+        param: "OSCParam",
+        addr: str,
+        osc_args: Tuple[Any, ...],
+        start: np.ndarray,
+        start_time: float,
+        duration: float,
+    ) -> None:
+        self.param = param
+        self.addr = addr
+        self.osc_args = osc_args
+        self.start = start
+        self.end = np.array(osc_args, dtype=np.float64)
+        self.start_time = start_time
+        self.duration = duration
+
+
+class ParamFader(object):
+    """Interpolates param values towards preset/scene targets over time.
+
+    Every running fade lives in one set of flat arrays, so advancing them
+    all is a handful of numpy ops per tick plus one write per param.
+    Params that can't be interpolated, and discrete ones such as wheel
+    indexes, switch at `switch_at` (0..1) of the fade instead. Call tick() once per compute tick.
+    """
+
+    def __init__(self) -> None:
+        self._fades: Dict[int, _Fade] = {}
+        # (when, param, addr, osc_args) for params that switch mid-fade
+        self._switches: Dict[int, Tuple[float, "OSCParam", str, Tuple[Any, ...]]] = {}
+        self._lock = Lock()
+        self._dirty = False
+        self._order: List[_Fade] = []
+        self._bounds = np.zeros(1, dtype=np.intp)
+        self._start = np.zeros(0)
+        self._delta = np.zeros(0)
+        self._start_time = np.zeros(0)
+        self._duration = np.ones(0)
+
+    def __len__(self) -> int:
+        return len(self._fades) + len(self._switches)
+
+    def fading(self, param: "OSCParam") -> bool:
+        return id(param) in self._fades or id(param) in self._switches
+
+    def target(self, param: "OSCParam") -> Optional[Tuple[Any, ...]]:
+        """The osc_args a running fade or switch on `param` ends on, None
+        if it isn't fading."""
+        fade = self._fades.get(id(param))
+        if fade is not None:
+            return fade.osc_args
+        switch = self._switches.get(id(param))
+        if switch is not None:
+            return switch[3]
+        return None
+
+    def start(
+        self,
+        param: "OSCParam",
+        addr: str,
+        osc_args: Tuple[Any, ...],
+        duration: float,
+        *,
+        switch_at: float = 0.0,
+        now: Optional[float] = None,
+    ) -> bool:
+        """Fade `param` to `osc_args` over `duration` seconds.
+
+        Returns False if the param was switched immediately (discrete or
+        non-numeric, with switch_at 0) so the caller can treat it as a plain
+        write.
+        """
+        if now is None:
+            now = time.monotonic()
+        start = None if param.discrete else fade_vector(param.value_lambda(), osc_args)
+        with self._lock:
+            self._cancel(param)
+            if start is not None:
+                self._fades[id(param)] = _Fade(
+                    param, addr, osc_args, start, now, duration
+                )
+                self._dirty = True
+                return True
+            if switch_at > 0:
+                self._switches[id(param)] = (
+                    now + duration * min(switch_at, 1.0),
+                    param,
+                    addr,
+                    osc_args,
+                )
+                return True
+        return False
+
+    def cancel(self, param: "OSCParam") -> None:
+        """Stop any fade on `param`, leaving it at its current value."""
+        if id(param) not in self._fades and id(param) not in self._switches:
+            return
+        with self._lock:
+            self._cancel(param)
+
+    def _cancel(self, param: "OSCParam") -> None:
+        if self._fades.pop(id(param), None) is not None:
+            self._dirty = True
+        self._switches.pop(id(param), None)
+
+    def _rebuild(self) -> None:
+        self._order = list(self._fades.values())
+        sizes = [len(f.start) for f in self._order]
+        self._bounds = np.concatenate(([0], np.cumsum(sizes))).astype(np.intp)
+        if self._order:
+            self._start = np.concatenate([f.start for f in self._order])
+            self._delta = np.concatenate([f.end - f.start for f in self._order])
+            self._start_time = np.repeat([f.start_time for f in self._order], sizes)
+            self._duration = np.repeat(
+                [max(f.duration, 1e-9) for f in self._order], sizes
+            )
+        self._dirty = False
+
+    def tick(self, now: Optional[float] = None) -> None:
+        if not self._fades and not self._switches:
+            return
+        if now is None:
+            now = time.monotonic()
+
+        done: List[Tuple["OSCParam", str, Tuple[Any, ...]]] = []
+        with self._lock:
+            for key, (when, param, addr, osc_args) in list(self._switches.items()):
+                if now >= when:
+                    del self._switches[key]
+                    done.append((param, addr, osc_args))
+
+            if self._fades:
+                if self._dirty:
+                    self._rebuild()
+                progress = np.clip((now - self._start_time) / self._duration, 0.0, 1.0)
+                values = self._start + self._delta * progress
+                bounds = self._bounds
+                for i, fade in enumerate(self._order):
+                    lo, hi = bounds[i], bounds[i + 1]
+                    if progress[lo] >= 1.0:
+                        del self._fades[id(fade.param)]
+                        self._dirty = True
+                        done.append((fade.param, fade.addr, fade.osc_args))
+                    else:
+                        fade.param.apply_lambda(fade.addr, *values[lo:hi].tolist())
+
+        # Land exactly on the target, then notify once per fade
+        hooks: Dict[Callable[[], Any], None] = {}
+        for param, addr, osc_args in done:
+            param.apply_lambda(addr, *osc_args)
+            param.sync()
+            if param.on_change is not None:
+                hooks[param.on_change] = None
+        for hook in hooks:
+            hook()
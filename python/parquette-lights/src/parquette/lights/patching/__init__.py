@@ -1,9 +1,10 @@
 from typing import List
 
-from ..audio_analysis import FFTManager
+from ..audio_analysis import FeatureSource
 from ..category import Categories
 from ..coord_system_state import CoordSystemState
 from ..dmx import DMXManager
+from ..envelope import EnvelopeScheduler
 from ..osc import OSCManager
 from ..util.session_store import SessionStore
 from .builder import CategoryBuilder
@@ -17,12 +18,14 @@ def create_builders(
     osc: OSCManager,
     dmx: DMXManager,
     categories: Categories,
-    fft_manager: FFTManager,
+    fft_manager: FeatureSource,
     session: SessionStore,
     coord_state: CoordSystemState,
     loop_max_samples: int,
     spot_color_fade: float,
     spot_mechanical_time: float,
+    envelopes: EnvelopeScheduler,
+    spot_move_in_dark: bool = False,
     debug: bool = False,
     debug_hazer: bool = False,
 ) -> List[CategoryBuilder]:
@@ -57,6 +60,8 @@ def create_builders(
             bpm_red=reds_b.bpm_red,
             spot_color_fade=spot_color_fade,
             spot_mechanical_time=spot_mechanical_time,
+            envelopes=envelopes,
+            spot_move_in_dark=spot_move_in_dark,
         ),
         audio.AudioBuilder(osc, categories.audio, fft_manager, debug=debug),
         strobes.StrobesBuilder(osc, categories.strobes),
@@ -1,8 +1,8 @@
 from typing import Dict, List
 
-from ..audio_analysis import FFTManager
+from ..audio_analysis import FeatureSource
 from ..category import Category
-from ..generators import FFTGenerator
+from ..generators import FFTGenerator, OnsetGenerator
 from ..generators.generator import Generator
 from ..generators.mixer import Mixer
 from ..osc import OSCManager, OSCParam
@@ -14,7 +14,7 @@ class AudioBuilder(CategoryBuilder):
         self,
         osc: OSCManager,
         category: Category,
-        fft_manager: FFTManager,
+        fft_manager: FeatureSource,
         *,
         debug: bool = False,
     ) -> None:
@@ -39,14 +39,19 @@ class AudioBuilder(CategoryBuilder):
             memory_length=20,
         )
 
+        # Punched by the analysis on every detected transient
+        self.onset = OnsetGenerator(name="onset", category=category)
+        self.onset.register_punch(osc)
+
         if debug:
             self.fft1.debug = True
             self.fft2.debug = True
 
         fft_manager.downstream = [self.fft1, self.fft2]
+        fft_manager.onsets = [self.onset]
 
     def generators(self) -> List[Generator]:
-        return [self.fft1, self.fft2]
+        return [self.fft1, self.fft2, self.onset]
 
     def build_params(self, mixer: Mixer) -> Dict[Category, List[OSCParam]]:
         osc = self.osc
@@ -56,7 +61,9 @@ class AudioBuilder(CategoryBuilder):
                 # FFTGenerator.standard_params() includes the bounds + lpf_alpha
                 *self.fft1.standard_params(osc),
                 *self.fft2.standard_params(osc),
+                *self.onset.standard_params(osc),
                 # Audio/BPM tuning binds live on FFTManager itself
                 *self.fft_manager.config_params(osc),
+                *self.fft_manager.latency.config_params(osc),
             ]
         }
@@ -53,6 +53,7 @@ class BoothBuilder(CategoryBuilder):
             self.category: [
                 # Patch params
                 mixer.patchbay_param(self.category),
+                mixer.modulation_param(self.category),
                 # Standard generator params (/gen/{type}/{name}/{attr})
                 *self.sin_booth.standard_params(osc),
             ]
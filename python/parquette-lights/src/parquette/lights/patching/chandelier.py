@@ -72,6 +72,7 @@ class ChandelierBuilder(CategoryBuilder):
         return {
             self.category: [
                 mixer.patchbay_param(self.category),
+                mixer.modulation_param(self.category),
                 *self.sin_chand_1.standard_params(osc),
                 *self.sin_chand_2.standard_params(osc),
                 *self.sin_chand_3.standard_params(osc),
@@ -86,6 +86,7 @@ class PlantsBuilder(CategoryBuilder):
             self.category: [
                 # Patch params
                 mixer.patchbay_param(self.category),
+                mixer.modulation_param(self.category),
                 # Standard generator params (/gen/{type}/{name}/{attr})
                 *self.sin_plants.standard_params(osc),
                 *self.sq1.standard_params(osc),
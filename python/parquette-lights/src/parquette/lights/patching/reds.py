@@ -1,6 +1,6 @@
 from typing import Dict, List
 
-from ..audio_analysis import FFTManager
+from ..audio_analysis import FeatureSource
 from ..category import Category
 from ..dmx import DMXManager
 from ..fixtures import LightFixture
@@ -17,7 +17,7 @@ class RedsBuilder(CategoryBuilder):
         self,
         osc: OSCManager,
         dmx: DMXManager,
-        fft_manager: FFTManager,
+        fft_manager: FeatureSource,
         category: Category,
         *,
         loop_max_samples: int,
@@ -39,6 +39,22 @@ class RedsBuilder(CategoryBuilder):
             LightFixture(name="front_1", category=category, dmx=dmx, addr=12, osc=osc),
             LightFixture(name="front_2", category=category, dmx=dmx, addr=9, osc=osc),
         ]
+        # Room positions (see Fixture.position). Rows sit 1 m apart so a
+        # front-to-back sweep steps one stutter_period per row.
+        positions = {
+            "front_1": (-1.0, 0.0, 2.5),
+            "front_2": (1.0, 0.0, 2.5),
+            "left_1": (-3.0, 1.0, 2.5),
+            "left_2": (-3.0, 2.0, 2.5),
+            "left_3": (-3.0, 3.0, 2.5),
+            "left_4": (-3.0, 4.0, 2.5),
+            "right_1": (3.0, 1.0, 2.5),
+            "right_2": (3.0, 2.0, 2.5),
+            "right_3": (3.0, 3.0, 2.5),
+            "right_4": (3.0, 4.0, 2.5),
+        }
+        for dimmer in self.dimmers:
+            dimmer.position = positions[dimmer.name]
 
         self.sin_reds = WaveGenerator(
             name="sin_red",
@@ -72,6 +88,7 @@ class RedsBuilder(CategoryBuilder):
             self.category: [
                 # Patch params
                 mixer.patchbay_param(self.category),
+                mixer.modulation_param(self.category),
                 # Per-category stutter_period — one OSCParam per stutter
                 # channel in this category, all registered on the same OSC
                 # address via MixChannel.register_stutter_period().
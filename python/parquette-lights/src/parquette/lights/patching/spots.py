@@ -3,6 +3,7 @@ from typing import Dict, List
 from ..category import Category
 from ..coord_system_state import CoordSystemState
 from ..dmx import DMXManager
+from ..envelope import EnvelopeScheduler
 from ..fixtures import LightFixture, YRXY200Spot
 from ..fixtures.spotlights import PinSpot
 from ..fixtures.basics import Fixture
@@ -27,6 +28,8 @@ class SpotsBuilder(CategoryBuilder):
         bpm_red: BPMGenerator,
         spot_color_fade: float,
         spot_mechanical_time: float,
+        envelopes: EnvelopeScheduler,
+        spot_move_in_dark: bool = False,
     ) -> None:
         self.osc = osc
         self.coord_state = coord_state
@@ -83,6 +86,8 @@ class SpotsBuilder(CategoryBuilder):
             spot.tilt(0)
             spot.color_swap_fade_time = spot_color_fade
             spot.color_swap_mechanical_time = spot_mechanical_time
+            spot.envelopes = envelopes
+            spot.move_in_dark = spot_move_in_dark
 
         self.sin_spot = WaveGenerator(
             name="sin_spot",
@@ -204,6 +209,7 @@ class SpotsBuilder(CategoryBuilder):
         osc = self.osc
         light_params: List[OSCParam] = [
             mixer.patchbay_param(self.light_category),
+            mixer.modulation_param(self.light_category),
             # Standard generator params (/gen/{ClassName}/{name}/{attr})
             *self.sin_spot.standard_params(osc),
             *self.sqr_spot.standard_params(osc),
@@ -232,6 +238,7 @@ class SpotsBuilder(CategoryBuilder):
 
         pos_params: List[OSCParam] = [
             mixer.patchbay_param(self.position_category),
+            mixer.modulation_param(self.position_category),
         ]
         for spot in self.spotlights:
             pantilt_ch = mixer.channel_lookup.get("{}/pantilt".format(spot.name))
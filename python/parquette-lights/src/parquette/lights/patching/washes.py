@@ -1,6 +1,6 @@
 from typing import Dict, List, Union
 
-from ..audio_analysis import FFTManager
+from ..audio_analysis import FeatureSource
 from ..category import Category
 from ..dmx import DMXManager
 from ..fixtures.basics import Fixture, RGBLight, RGBWLight
@@ -16,7 +16,7 @@ class WashesBuilder(CategoryBuilder):
         self,
         osc: OSCManager,
         dmx: DMXManager,
-        fft_manager: FFTManager,
+        fft_manager: FeatureSource,
         category: Category,
         *,
         color_category: Category,
@@ -57,6 +57,19 @@ class WashesBuilder(CategoryBuilder):
             self.washceilf,
             self.washceilr,
         ]
+        # Room positions (see Fixture.position), wall rows 1 m apart
+        positions = {
+            "wash_fl": (-3.0, 0.0, 2.0),
+            "wash_fr": (3.0, 0.0, 2.0),
+            "wash_ml": (-3.0, 1.0, 2.0),
+            "wash_mr": (3.0, 1.0, 2.0),
+            "wash_bl": (-3.0, 2.0, 2.0),
+            "wash_br": (3.0, 2.0, 2.0),
+            "wash_ceil_f": (0.0, 0.5, 3.0),
+            "wash_ceil_r": (0.0, 1.5, 3.0),
+        }
+        for wash in self.all_washes:
+            wash.position = positions[wash.name]
 
         self.sin_wash = WaveGenerator(
             name="sin_wash",
@@ -109,6 +122,7 @@ class WashesBuilder(CategoryBuilder):
             self.color_category: color_params,
             self.category: [
                 mixer.patchbay_param(self.category),
+                mixer.modulation_param(self.category),
                 *mixer.stutter_period_params(self.category),
                 # Standard generator params (/gen/{ClassName}/{name}/{attr})
                 *self.sin_wash.standard_params(osc),
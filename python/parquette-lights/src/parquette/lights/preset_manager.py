@@ -35,6 +35,22 @@ class PresetManager(object):
         self.enable_save_clear = enable_save_clear
         self.debug = debug
         self.session = session
+        # seconds to crossfade preset changes from the front end, see
+        # OSCManager.transaction
+        self.fade_time = 0.0
+
+        # addr -> params, per category (for preset application) and across
+        # every category plus the masters (for scenes and sync). Several
+        # params can share an address, e.g. /chan/{category}/stutter_period.
+        self.params_by_category: Dict[Category, Dict[str, List[OSCParam]]] = {}
+        self.params: Dict[str, List[OSCParam]] = {}
+        for cat, params in exposed_params.items():
+            by_addr = self.params_by_category.setdefault(cat, {})
+            for param in params:
+                by_addr.setdefault(param.addr, []).append(param)
+                self.params.setdefault(param.addr, []).append(param)
+        for cat in categories.all:
+            self.params.setdefault(cat.master_param.addr, []).append(cat.master_param)
 
         osc.dispatcher.map(
             "/preset/save/*", lambda addr, args: self.save(addr.split("/")[3])
@@ -46,10 +62,13 @@ class PresetManager(object):
             "/preset/selector/*",
             lambda addr, args: self.select(addr.split("/")[3], args),
         )
-        osc.dispatcher.map("/preset/reload", lambda _a, _args: self.sync())
+        osc.dispatcher.map("/preset/reload", lambda _a, _args: self.reload())
         osc.dispatcher.map(
             "/enable_save", lambda _a, args: self.set_enable_save_clear(args)
         )
+        osc.dispatcher.map(
+            "/preset/fade_time", lambda _a, args: self.set_fade_time(args)
+        )
         osc.dispatcher.map(
             "/preset/restore_defaults", lambda _a, _args: self.restore_defaults()
         )
@@ -64,7 +83,13 @@ class PresetManager(object):
             all_categories.add(key)
         return all_categories
 
-    def select_all(self, category_preset: str) -> None:
+    def select_all(
+        self,
+        category_preset: str,
+        *,
+        fade: Optional[float] = None,
+        switch_at: float = 0.0,
+    ) -> None:
         # Early-out only if we already have a known selection for every
         # category and they all match the target. With empty current_presets
         # (fresh launch, nothing selected yet) `all(...)` over an empty
@@ -78,36 +103,44 @@ class PresetManager(object):
 
         self.prev_current_presets = copy(self.current_presets)
 
-        for cat in self.all_categories():
-            # If this category doesn't define the requested preset (e.g.
-            # "Static" or "Class"), fall back to "Off" so the channel goes
-            # dark instead of holding its previous state.
-            if (
-                cat in self.stored_presets
-                and category_preset in self.stored_presets[cat]
-            ):
-                self.select(cat, category_preset, sync=False)
-            else:
-                self.select(cat, "Off", sync=False)
-
-        self.sync()
+        with self.osc.transaction(
+            fade=self.fade_time if fade is None else fade, switch_at=switch_at
+        ) as transaction:
+            for cat in self.all_categories():
+                # If this category doesn't define the requested preset (e.g.
+                # "Static" or "Class"), fall back to "Off" so the channel goes
+                # dark instead of holding its previous state.
+                if (
+                    cat in self.stored_presets
+                    and category_preset in self.stored_presets[cat]
+                ):
+                    self.select(cat, category_preset, sync=False)
+                else:
+                    self.select(cat, "Off", sync=False)
+
+            transaction.on_commit(self.sync_selection)
 
     def save_current_selection(self) -> Dict[str, str]:
         return dict(self.current_presets)
 
     def load_current_selection(self, data: Dict[str, str]) -> None:
-        for cat, preset_name in data.items():
-            try:
-                self.select(cat, preset_name, sync=False)
-            # pylint: disable=broad-exception-caught
-            except Exception as e:
-                print(
-                    f"  failed to restore preset {cat}={preset_name}: {e}", flush=True
-                )
+        with self.osc.transaction():
+            for cat, preset_name in data.items():
+                try:
+                    self.select(cat, preset_name, sync=False)
+                # pylint: disable=broad-exception-caught
+                except Exception as e:
+                    print(
+                        f"  failed to restore preset {cat}={preset_name}: {e}",
+                        flush=True,
+                    )
 
     def set_enable_save_clear(self, enable: bool) -> None:
         self.enable_save_clear = enable
 
+    def set_fade_time(self, seconds: float) -> None:
+        self.fade_time = max(0.0, float(seconds))
+
     def restore_defaults(self) -> None:
         """Overwrite the active pickle with the defaults snapshot and reload."""
         if not self.enable_save_clear:
@@ -223,20 +256,44 @@ class PresetManager(object):
         with open(self.filename, "wb") as f:
             pickle.dump(self.stored_presets, f)
 
+    def reload(self) -> None:
+        """Full resync for a front end that just (re)connected."""
+        self.osc.forget_sent()
+        self.sync()
+
+    def params_for(self, addr: str) -> List[OSCParam]:
+        return self.params.get(addr, [])
+
     def sync(self):
-        for params in self.exposed_params.values():
+        for params in self.params.values():
             for param in params:
                 param.sync()
 
-        for cat in self.categories.all:
-            cat.master_param.sync()
+        self.sync_selection()
 
+    def sync_selection(self) -> None:
+        """Send the selected presets; param values sync as they change."""
         for category, category_preset in self.current_presets.items():
             self.osc.send_osc("/preset/selector/{}".format(category), category_preset)
 
         self.osc.send_osc("/enable_save", int(self.enable_save_clear))
+        self.osc.send_osc("/preset/fade_time", self.fade_time)
 
-    def select(self, category: str, category_preset: str, sync: bool = True) -> None:
+    def select(
+        self,
+        category: str,
+        category_preset: str,
+        sync: bool = True,
+        *,
+        fade: Optional[float] = None,
+        switch_at: float = 0.0,
+    ) -> None:
+        """Load a stored preset into a category's params.
+
+        `fade` seconds crossfades numeric params (default: the front end's
+        /preset/fade_time); non-numeric ones switch at `switch_at` of it.
+        When called inside another transaction, that one's fade applies.
+        """
         cat = self.categories.by_name(category)
         if cat not in self.exposed_params:
             # there are no valid exposed params in this category to control
@@ -247,34 +304,39 @@ class PresetManager(object):
             )
             return
 
-        self.current_presets[category] = category_preset
-
-        if self.session is not None:
-            self.session.save()
-
-        if category not in self.stored_presets:
-            # Someone is creating a new preset, nothing to load
-            return
-
-        if category_preset not in self.stored_presets[category]:
-            # Someone is creating a new preset, nothing to load
-            return
-
-        # Reset every param with a default to its default value. Silent:
-        # no OSC sync per-param — we issue one final sync at the end.
-        for param in self.exposed_params[cat]:
-            if param.has_default:
-                param.load(param.addr, param.default_value, sync=False)
-
-        # Apply the saved overrides on top of the defaults.
-        for param_preset in self.stored_presets[category][category_preset]:
-            addr, value = param_preset[0], param_preset[1]
-            for param in self.exposed_params[cat]:
-                if param.addr == addr:
+        with self.osc.transaction(
+            fade=self.fade_time if fade is None else fade, switch_at=switch_at
+        ) as transaction:
+            self.current_presets[category] = category_preset
+
+            if self.session is not None:
+                transaction.on_commit(self.session.save)
+
+            if category not in self.stored_presets:
+                # Someone is creating a new preset, nothing to load
+                return
+
+            if category_preset not in self.stored_presets[category]:
+                # Someone is creating a new preset, nothing to load
+                return
+
+            # Target state is every param with a default at its default,
+            # with the saved overrides staged on top (the last staged value
+            # wins). The transaction only writes, and syncs, the params
+            # whose value actually changes.
+            by_addr = self.params_by_category[cat]
+            for params in by_addr.values():
+                for param in params:
+                    if param.has_default:
+                        transaction.load(param, param.addr, param.default_value)
+
+            for param_preset in self.stored_presets[category][category_preset]:
+                addr, value = param_preset[0], param_preset[1]
+                for param in by_addr.get(addr, []):
                     if isinstance(value, (list, tuple)):
-                        param.load(addr, *value, sync=False)
+                        transaction.load(param, addr, *value)
                     else:
-                        param.load(addr, value, sync=False)
+                        transaction.load(param, addr, value)
 
-        if sync:
-            self.sync()
+            if sync:
+                transaction.on_commit(self.sync_selection)
@@ -7,7 +7,7 @@ import shutil
 from .category import Categories, Category
 from .dmx import DMXManager
 from .generators.chanmap import MixChannel
-from .osc import OSCManager
+from .osc import OSCManager, ParamTransaction
 from .preset_manager import PresetManager
 
 
@@ -22,6 +22,9 @@ class Scene:
     If preset_all is set, all categories are first set to that group.
     If presets_by_category is provided, those per-category overrides are
     applied on top of (or instead of) the base preset_all.
+
+    fade is the crossfade time in seconds; None uses the front end's
+    /preset/fade_time. Non-numeric params switch at switch_at (0..1).
     """
 
     def __init__(
@@ -37,6 +40,8 @@ class Scene:
         channel_offsets: Optional[Dict[MixChannel, float]] = None,
         disable_passthrough: bool = False,
         protect_save_clear: bool = False,
+        fade: Optional[float] = None,
+        switch_at: float = 0.0,
     ) -> None:
         self.name = name
         self.osc = osc
@@ -48,24 +53,63 @@ class Scene:
         self.channel_offsets = channel_offsets or {}
         self.disable_passthrough = disable_passthrough
         self.protect_save_clear = protect_save_clear
+        self.fade = fade
+        self.switch_at = switch_at
+
+    def fade_time(self) -> float:
+        return self.presets.fade_time if self.fade is None else self.fade
+
+    def activate(self, fade: Optional[float] = None) -> None:
+        # Everything below lands in one transaction: the fixtures see the
+        # whole scene in a single tick (or one fade) and only changed params
+        # are synced.
+        with self.osc.transaction(
+            fade=self.fade_time() if fade is None else fade,
+            switch_at=self.switch_at,
+        ) as transaction:
+            if self.disable_passthrough and self.dmx.passthrough:
+                self.stage(
+                    transaction, "/dmx/passthrough", self.dmx, "passthrough", False
+                )
 
-    def activate(self) -> None:
-        if self.disable_passthrough and self.dmx.passthrough:
-            self.dmx.passthrough = False
+            for channel, offset in self.channel_offsets.items():
+                self.stage(
+                    transaction,
+                    "/chan/{}/offset".format(channel.name),
+                    channel,
+                    "offset",
+                    offset,
+                )
 
-        for channel, offset in self.channel_offsets.items():
-            channel.offset = offset
+            for category, level in self.masters.items():
+                transaction.load(
+                    category.master_param, category.master_param.addr, level
+                )
 
-        for category, level in self.masters.items():
-            category.set_master(level)
+            if self.preset_all is not None:
+                self.presets.select_all(self.preset_all)
 
-        if self.preset_all is not None:
-            self.presets.select_all(self.preset_all)
+            if self.presets_by_category:
+                for category, preset_name in self.presets_by_category.items():
+                    self.presets.select(category.name, preset_name, sync=False)
 
-        if self.presets_by_category:
-            for category, preset_name in self.presets_by_category.items():
-                self.presets.select(category.name, preset_name, sync=False)
-            self.presets.sync()
+            transaction.on_commit(self.presets.sync_selection)
+
+    def stage(
+        self,
+        transaction: ParamTransaction,
+        addr: str,
+        obj: Any,
+        field: str,
+        value: Any,
+    ) -> None:
+        """Stage `obj.field = value` through its OSCParam when it has one."""
+        params = self.presets.params_for(addr)
+        for param in params:
+            transaction.load(param, addr, value)
+        if not params:
+            transaction.call(lambda: setattr(obj, field, value))
+            transaction.on_commit(self.presets.sync)
 
     def to_dict(self) -> Dict[str, Any]:
         """Serialize to a picklable dict (string keys, no object refs)."""
@@ -78,6 +122,8 @@ class Scene:
             data["presets"] = {
                 cat.name: preset for cat, preset in self.presets_by_category.items()
             }
+        if self.fade is not None:
+            data["fade"] = self.fade
         return data
 
     @classmethod
@@ -106,6 +152,7 @@ class Scene:
             masters=masters,
             preset_all=preset_all,
             presets_by_category=presets_by_cat,
+            fade=data.get("fade"),
         )
 
 
@@ -185,10 +232,19 @@ class SceneManager:
             # Lights re-raises sodium to full). Any scene that doesn't set a
             # channel -- including every user-created scene -- falls back to the
             # default, so non-House scenes always drop sodium to zero.
-            # activate()'s preset sync then pushes the new offset to the fader.
-            for channel, offset in self.default_channel_offsets.items():
-                channel.offset = offset
-            scene.activate()
+            # Both go into the scene's transaction, so they fade with it.
+            with self.osc.transaction(
+                fade=scene.fade_time(), switch_at=scene.switch_at
+            ) as transaction:
+                for channel, offset in self.default_channel_offsets.items():
+                    scene.stage(
+                        transaction,
+                        "/chan/{}/offset".format(channel.name),
+                        channel,
+                        "offset",
+                        offset,
+                    )
+                scene.activate()
 
     def capture_current_state(self) -> Scene:
         """Build a Scene from the current lighting state."""
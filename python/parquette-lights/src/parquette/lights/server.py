@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, cast
 
 import signal
 import sys
@@ -7,12 +7,13 @@ import time
 import click
 
 from .generators import Mixer
-from .audio_analysis import FFTManager, AudioCapture
+from .audio_analysis import AnalysisProcess, AudioCapture, FeatureSource, FFTManager
 
 from .category import Category
 from .coord_system_state import CoordSystemState
 from .osc import OSCManager, OSCParam
 from .dmx import DMXManager
+from .envelope import EnvelopeScheduler
 from .patching import Categories, create_builders
 from .preset_manager import PresetManager
 from .scene import Scene, SceneManager
@@ -175,6 +176,12 @@ from .util.session_store import SessionStore
     type=float,
     help="Seconds to hold dark while the moving-head color wheel mechanically settles.",
 )
+@click.option(
+    "--spot-move-in-dark/--no-spot-move-in-dark",
+    default=False,
+    show_default=True,
+    help="Dim moving heads through large pan/tilt jumps and move them ahead of time while dark.",
+)
 @click.option(
     "--session-file",
     default="session.pickle",
@@ -189,6 +196,26 @@ from .util.session_store import SessionStore
     type=str,
     help="Auto-connect to an audio input device by name (substring, case-insensitive) and start audio + FFT analysis on boot.",
 )
+@click.option(
+    "--audio-capture-mode",
+    default="callback",
+    show_default=True,
+    type=click.Choice(["callback", "blocking"]),
+    help="Capture audio from PortAudio's stream callback (ADC timestamps, overflow accounting) or a blocking read thread.",
+)
+@click.option(
+    "--analysis-rate",
+    default=22050,
+    show_default=True,
+    type=int,
+    help="Sample rate audio is resampled to for analysis, whatever the interface's (0 keeps the interface's rate).",
+)
+@click.option(
+    "--audio-process/--no-audio-process",
+    default=False,
+    show_default=True,
+    help="Run audio capture, FFT and beat tracking in a separate process, feeding the mixer through shared memory.",
+)
 @click.option(
     "--loop-max-samples",
     default=1000,
@@ -203,6 +230,19 @@ from .util.session_store import SessionStore
     type=int,
     help="Mixer tick interval in milliseconds. Controls history resolution, stutter timing, and loop sample rate.",
 )
+@click.option(
+    "--visualizer-ms",
+    default=50,
+    show_default=True,
+    type=int,
+    help="Minimum interval in milliseconds between visualizer frames, independent of --tick-ms.",
+)
+@click.option(
+    "--osc-batch/--no-osc-batch",
+    default=True,
+    show_default=True,
+    help="Queue outbound OSC and send it once per tick as MTU-sized bundles, skipping unchanged values.",
+)
 # pylint: disable-next=too-many-positional-arguments
 def run(
     local_ip: str,
@@ -227,10 +267,16 @@ def run(
     rms_window: float,
     spot_color_fade: float,
     spot_mechanical_time: float,
+    spot_move_in_dark: bool,
     session_file: str,
     audio_interface: Optional[str],
+    audio_capture_mode: str,
+    analysis_rate: int,
+    audio_process: bool,
     loop_max_samples: int,
     tick_ms: int,
+    visualizer_ms: int,
+    osc_batch: bool,
 ) -> None:
     print("Setup", flush=True)
 
@@ -244,6 +290,7 @@ def run(
     osc.set_target(target_ip, target_port)
     osc.set_local(local_ip, local_port)
     osc.set_debug(debug_osc_in, debug_osc_out)
+    osc.set_batching(osc_batch)
     dmx = DMXManager(osc, art_net_ip)
     dmx.auto_reconnect = dmx_auto_reconnect
     dmx.art_net_auto_send(art_net_auto)
@@ -267,15 +314,39 @@ def run(
     )
     categories = Categories(osc, session)
 
-    audio_capture = AudioCapture(osc, audio_window_secs=audio_window, debug=debug)
-    audio_capture.dmx = dmx
-    fft_manager = FFTManager(
-        osc,
-        audio_capture,
-        dmx,
-        rms_window_secs=rms_window,
-        debug=debug,
-    )
+    fft_manager: FeatureSource
+    analysis: Optional[AnalysisProcess] = None
+    audio_capture: Optional[AudioCapture] = None
+    if audio_process:
+        analysis = AnalysisProcess(
+            osc,
+            dmx,
+            audio_window_secs=audio_window,
+            rms_window_secs=rms_window,
+            capture_mode=audio_capture_mode,
+            analysis_rate=analysis_rate or None,
+            debug=debug,
+        )
+        fft_manager = analysis
+    else:
+        audio_capture = AudioCapture(
+            osc,
+            audio_window_secs=audio_window,
+            debug=debug,
+            capture_mode=audio_capture_mode,
+            analysis_rate=analysis_rate or None,
+        )
+        audio_capture.dmx = dmx
+        fft_manager = FFTManager(
+            osc,
+            audio_capture,
+            dmx,
+            rms_window_secs=rms_window,
+            debug=debug,
+        )
+
+    # Fixture envelopes (e.g. spot color swap fades), run once per tick
+    envelopes = EnvelopeScheduler()
 
     # Create all patching builders — fixtures and generators are instantiated
     # in their constructors.
@@ -289,6 +360,8 @@ def run(
         loop_max_samples=loop_max_samples,
         spot_color_fade=spot_color_fade,
         spot_mechanical_time=spot_mechanical_time,
+        spot_move_in_dark=spot_move_in_dark,
+        envelopes=envelopes,
         debug=debug,
         debug_hazer=debug_hazer,
     )
@@ -300,32 +373,7 @@ def run(
         generators.extend(b.generators())
 
     if audio_interface is not None:
-        needle = audio_interface.lower()
-        match_idx: Optional[int] = None
-        match_name: Optional[str] = None
-        for i, port in enumerate(audio_capture.list_audio_ports()):
-            if int(port["maxInputChannels"]) <= 0:
-                continue
-            name = str(port["name"])
-            if needle in name.lower():
-                match_idx = i
-                match_name = name
-                break
-        if match_idx is None:
-            print(
-                "No audio input device matched '{}'".format(audio_interface),
-                flush=True,
-            )
-        else:
-            print(
-                "Auto-connecting audio interface '{}' (index {})".format(
-                    match_name, match_idx
-                ),
-                flush=True,
-            )
-            audio_capture.setup_audio(match_idx)
-            audio_capture.start_audio()
-            fft_manager.start_fft()
+        fft_manager.connect_interface(audio_interface)
 
     mixer = Mixer(
         osc=osc,
@@ -334,6 +382,7 @@ def run(
         fixtures=all_fixtures,
         categories=categories,
         debug=debug,
+        visualizer_ms=visualizer_ms,
     )
 
     # Build all params from builders
@@ -471,6 +520,10 @@ def run(
 
     runnable_fixtures = [f for f in all_fixtures if f.runnable]
 
+    # From here on preset and scene loads arriving on the OSC thread are
+    # applied at the top of the next tick, never half-way through a mix.
+    osc.set_deferred_apply(True)
+
     tick_s = tick_ms / 1000
 
     def handle_sigterm(signum: int, frame: object) -> None:
@@ -490,6 +543,10 @@ def run(
         while True:
             compute_start = time.monotonic()
 
+            osc.apply_pending()
+            if analysis is not None:
+                analysis.poll()
+            envelopes.tick()
             dmx.tick_device()
 
             if dmx.passthrough:
@@ -500,6 +557,9 @@ def run(
                 for f in runnable_fixtures:
                     f.run()
                 mixer.updateDMX()
+                fft_manager.latency.output(fft_manager.bpms)
+
+            osc.flush()
 
             compute_ms = (time.monotonic() - compute_start) * 1000
             compute_ema = compute_ema * 0.95 + compute_ms * 0.05
@@ -528,10 +588,14 @@ def run(
             next_tick += tick_s
 
     except KeyboardInterrupt:
-        print("\nShutdown FFT", flush=True)
-        fft_manager.stop_fft()
-        print("Shutdown audio capture and pyaudio", flush=True)
-        audio_capture.terminate()
+        if analysis is not None:
+            print("\nShutdown audio analysis process", flush=True)
+            analysis.close()
+        else:
+            print("\nShutdown FFT", flush=True)
+            cast(FFTManager, fft_manager).stop_fft()
+            print("Shutdown audio capture and pyaudio", flush=True)
+            cast(AudioCapture, audio_capture).terminate()
         print("Close OSC server", flush=True)
         osc.close()
         print("Close DMX port", flush=True)
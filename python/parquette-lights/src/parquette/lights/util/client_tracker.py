@@ -1,9 +1,11 @@
 import time
-from threading import Thread
-from typing import Dict
+from threading import Thread, Lock
+from typing import Dict, Set, Tuple
 
 from ..osc import OSCManager
 
+Endpoint = Tuple[str, int]
+
 
 class ClientTracker:
     """Tracks connected open-stage-control UI sessions via /heartbeat OSC.
@@ -11,6 +13,12 @@ class ClientTracker:
     Each UI session's root onCreate sends /heartbeat <session_id> on a fixed
     interval. We record last-seen time per id, prune stale entries, and push
     the live count to the UI at /client_count whenever it changes.
+
+    The heartbeat's return address is registered with the OSCManager as a
+    target, so a second open-stage-control server (e.g. one per tablet) gets
+    state without extra config. The visualizer enable heartbeats of each
+    return address are tracked as subscriptions, and streams registered
+    with `OSCManager.route_stream` are only sent to the subscribed targets.
     """
 
     def __init__(
@@ -21,39 +29,92 @@ class ClientTracker:
         count_addr: str = "/client_count",
         timeout: float = 6.0,
         poll_interval: float = 1.0,
+        subscription_timeout: float = 2.0,
     ) -> None:
         self.osc = osc
         self.heartbeat_addr = heartbeat_addr
         self.count_addr = count_addr
         self.timeout = timeout
         self.poll_interval = poll_interval
+        self.subscription_timeout = subscription_timeout
 
         self._heartbeats: Dict[int, float] = {}
+        self._endpoints: Dict[int, Endpoint] = {}
+        # endpoint -> topic -> subscribed until
+        self._subscriptions: Dict[Endpoint, Dict[str, float]] = {}
+        self._known: Set[Endpoint] = set()
+        self._lock = Lock()
         self._last_count = -1
         self._thread: Thread | None = None
 
-        osc.dispatcher.map(heartbeat_addr, self._on_heartbeat)
+        osc.dispatcher.map(heartbeat_addr, self._on_heartbeat, needs_reply_address=True)
 
-    def _on_heartbeat(self, _addr: str, *args) -> None:
+    def _on_heartbeat(self, client_address: Endpoint, _addr: str, *args) -> None:
         if not args:
             return
         try:
             client_id = int(args[0])
         except (TypeError, ValueError):
             return
-        self._heartbeats[client_id] = time.time()
+        endpoint = (client_address[0], client_address[1])
+        with self._lock:
+            self._heartbeats[client_id] = time.time()
+            self._endpoints[client_id] = endpoint
+            is_new = endpoint not in self._known
+            self._known.add(endpoint)
+        if is_new:
+            self.osc.add_target(endpoint)
+
+    def _on_subscribe(self, client_address: Endpoint, addr: str, *args) -> None:
+        # Same multi-client semantics as the mixer gates: only "on" extends
+        # the subscription, it lapses on its own once the tab is left.
+        if not args or not bool(args[0]):
+            return
+        endpoint = (client_address[0], client_address[1])
+        with self._lock:
+            subs = self._subscriptions.setdefault(endpoint, {})
+            is_new = subs.get(addr, 0.0) < time.time()
+            subs[addr] = time.time() + self.subscription_timeout
+        if is_new:
+            self._publish(addr)
+
+    def subscribers(self, topic: str) -> Set[Endpoint]:
+        now = time.time()
+        with self._lock:
+            return {
+                endpoint
+                for endpoint, subs in self._subscriptions.items()
+                if subs.get(topic, 0.0) > now
+            }
+
+    def _publish(self, topic: str) -> None:
+        self.osc.set_subscribers(topic, self.subscribers(topic))
 
     def _prune_loop(self) -> None:
         while True:
             now = time.time()
-            stale = [
-                cid
-                for cid, seen in self._heartbeats.items()
-                if now - seen > self.timeout
-            ]
-            for cid in stale:
-                self._heartbeats.pop(cid, None)
-            count = len(self._heartbeats)
+            with self._lock:
+                stale = [
+                    cid
+                    for cid, seen in self._heartbeats.items()
+                    if now - seen > self.timeout
+                ]
+                for cid in stale:
+                    self._heartbeats.pop(cid, None)
+                    self._endpoints.pop(cid, None)
+                live = set(self._endpoints.values())
+                gone = self._known - live
+                self._known -= gone
+                for endpoint in list(self._subscriptions):
+                    if endpoint not in live:
+                        self._subscriptions.pop(endpoint, None)
+                count = len(self._heartbeats)
+
+            for endpoint in gone:
+                self.osc.remove_target(endpoint)
+            for topic in self.osc.stream_topics():
+                self._publish(topic)
+
             if count != self._last_count:
                 self.osc.send_osc(self.count_addr, count)
                 self._last_count = count
@@ -62,5 +123,10 @@ class ClientTracker:
     def start(self) -> None:
         if self._thread is not None:
             return
+        # Streams are registered by the mixer and FFT manager, so listen for
+        # their enable heartbeats only once everything has been built.
+        for topic in self.osc.stream_topics():
+            self.osc.dispatcher.map(topic, self._on_subscribe, needs_reply_address=True)
+            self._publish(topic)
         self._thread = Thread(target=self._prune_loop, daemon=True)
         self._thread.start()
@@ -4,7 +4,8 @@ A CoordSystem maps between mapping-space (the 16-bit coords the UI and
 mixer work in) and real pan/tilt 16-bit values that the fixture firmware
 expects. The mixer is coord-system-agnostic: all offsets and generator
 outputs accumulate in mapping-space; the conversion to real pan/tilt
-happens once per tick inside the spot fixture's post_map_output hook.
+happens once per tick for every spot at once, via mapping_to_real_batch
+(see YRXY200Spot.place_all).
 
 Implementations:
   - PanTiltCoordSystem: identity. Mapping-space IS real pan/tilt.
@@ -14,17 +15,20 @@ Implementations:
                         encoded over a fixed degree range.
 """
 
-from typing import Dict, List, Optional, Protocol
+from typing import Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
 
 from .coordinates import (
     SpotCoordFrame,
-    latlon_to_pan_tilt,
     pan_tilt_to_latlon,
 )
+from .latlon_table import LatLonTable
 from .math import constrain, value_map
 
 
 SIXTEEN_BIT_MAX = 65535
+SIXTEEN_BIT_RANGE = (0.0, float(SIXTEEN_BIT_MAX))
 LAT_DEG_RANGE = (-90.0, 90.0)
 # Longitude is clamped to +/-100 degrees so the slider only spans
 # directions reachable from a ceiling mount. Beyond ~+/-90 the beam points
@@ -33,11 +37,18 @@ LAT_DEG_RANGE = (-90.0, 90.0)
 LON_DEG_RANGE = (-100.0, 100.0)
 
 
+def _map_array(
+    values: np.ndarray, old: tuple[float, float], new: tuple[float, float]
+) -> np.ndarray:
+    """value_map over an array."""
+    return (values - old[0]) / (old[1] - old[0]) * (new[1] - new[0]) + new[0]
+
+
 class CoordSystem(Protocol):
     """Maps between mapping-space (UI / mixer) and real pan/tilt 16-bit.
 
-    Implementations are stateless; all per-spot context (frame, current
-    real pan/tilt) is passed in by the caller.
+    Implementations hold no per-spot state; all per-spot context (frame,
+    current real pan/tilt) is passed in by the caller.
     """
 
     name: str
@@ -56,6 +67,19 @@ class CoordSystem(Protocol):
         is unreachable inside the frame's pan/tilt ranges.
         """
 
+    def mapping_to_real_batch(
+        self,
+        xy: np.ndarray,
+        frames: Sequence[SpotCoordFrame],
+        current_real: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """mapping_to_real for N spots at once.
+
+        `xy` and `current_real` are (N, 2) arrays and `frames` holds each
+        row's frame. Returns an (N, 2) float array with NaN rows where the
+        point is unreachable.
+        """
+
     def real_to_mapping(
         self, pan_tilt: List[float], frame: SpotCoordFrame
     ) -> List[float]:
@@ -78,6 +102,14 @@ class PanTiltCoordSystem:
     ) -> Optional[List[float]]:
         return [float(xy[0]), float(xy[1])]
 
+    def mapping_to_real_batch(
+        self,
+        xy: np.ndarray,
+        frames: Sequence[SpotCoordFrame],
+        current_real: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        return np.array(xy, dtype=np.float64)
+
     def real_to_mapping(
         self, pan_tilt: List[float], frame: SpotCoordFrame
     ) -> List[float]:
@@ -99,6 +131,14 @@ class RawCoordSystem:
     ) -> Optional[List[float]]:
         return [float(xy[0]), float(xy[1])]
 
+    def mapping_to_real_batch(
+        self,
+        xy: np.ndarray,
+        frames: Sequence[SpotCoordFrame],
+        current_real: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        return np.array(xy, dtype=np.float64)
+
     def real_to_mapping(
         self, pan_tilt: List[float], frame: SpotCoordFrame
     ) -> List[float]:
@@ -120,10 +160,24 @@ class LatLonCoordSystem:
 
     Real pan/tilt is also 16-bit; converted to/from degrees via the
     frame's pan_range / tilt_range using value_map.
+
+    mapping_to_real answers from a LatLonTable built the first time each
+    frame is seen; the exact solver is only used for the table's
+    fallback cells.
     """
 
     name = "latlon"
 
+    def __init__(self) -> None:
+        self._tables: Dict[SpotCoordFrame, LatLonTable] = {}
+
+    def table(self, frame: SpotCoordFrame) -> LatLonTable:
+        table = self._tables.get(frame)
+        if table is None:
+            table = LatLonTable(frame, lat_range=LAT_DEG_RANGE, lon_range=LON_DEG_RANGE)
+            self._tables[frame] = table
+        return table
+
     def mapping_to_real(
         self,
         xy: List[float],
@@ -133,7 +187,7 @@ class LatLonCoordSystem:
         lon = value_map(xy[0], 0, SIXTEEN_BIT_MAX, *LON_DEG_RANGE)
         lat = value_map(xy[1], 0, SIXTEEN_BIT_MAX, *LAT_DEG_RANGE)
         current_deg = self._current_to_degrees(current_real, frame)
-        result = latlon_to_pan_tilt(lat, lon, frame, current=current_deg)
+        result = self.table(frame).lookup(lat, lon, current_deg)
         if result is None:
             return None
         pan_deg, tilt_deg = result
@@ -162,6 +216,37 @@ class LatLonCoordSystem:
             ),
         ]
 
+    def mapping_to_real_batch(
+        self,
+        xy: np.ndarray,
+        frames: Sequence[SpotCoordFrame],
+        current_real: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        xy = np.asarray(xy, dtype=np.float64)
+        lon = _map_array(xy[:, 0], SIXTEEN_BIT_RANGE, LON_DEG_RANGE)
+        lat = _map_array(xy[:, 1], SIXTEEN_BIT_RANGE, LAT_DEG_RANGE)
+        out = np.empty_like(xy)
+
+        # Spots usually share a frame, so this is normally one pass
+        rows: Dict[SpotCoordFrame, List[int]] = {}
+        for n, frame in enumerate(frames):
+            rows.setdefault(frame, []).append(n)
+        for frame, idx in rows.items():
+            sel = np.array(idx, dtype=np.intp)
+            # (min, max) of pan and of tilt, as columns
+            low = np.array((frame.pan_range[0], frame.tilt_range[0]))
+            span = np.array((frame.pan_range[1], frame.tilt_range[1])) - low
+            current_deg: Optional[np.ndarray] = None
+            if current_real is not None:
+                current = np.asarray(current_real, dtype=np.float64)[sel]
+                current_deg = current / SIXTEEN_BIT_MAX * span + low
+            deg = self.table(frame).lookup_batch(lat[sel], lon[sel], current_deg)
+            # NaN rows pass through untouched
+            out[sel] = np.minimum(
+                np.maximum((deg - low) / span * SIXTEEN_BIT_MAX, 0), SIXTEEN_BIT_MAX
+            )
+        return out
+
     def real_to_mapping(
         self, pan_tilt: List[float], frame: SpotCoordFrame
     ) -> List[float]:
@@ -211,8 +296,8 @@ class LatLonCoordSystem:
 def default_systems() -> Dict[str, CoordSystem]:
     """Build the default {name: CoordSystem} dict.
 
-    CoordSystems are stateless — they receive the per-spot frame on each
-    call, so a single instance is shared across all spots.
+    CoordSystems receive the per-spot frame on each call, so a single
+    instance is shared across all spots.
     """
     return {
         PanTiltCoordSystem.name: PanTiltCoordSystem(),
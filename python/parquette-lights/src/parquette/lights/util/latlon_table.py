@@ -0,0 +1,278 @@
+"""Tabulated lat/lon -> pan/tilt inverse for one SpotCoordFrame.
+
+latlon_to_pan_tilt() is exact but does a trig solve plus a candidate
+enumeration on every call, and the spot mixer calls it once per spot per
+tick. LatLonTable samples the two quantities the solver derives from a
+direction -- delta0 (lift off straight down) and p_off0 (pan azimuth) --
+on a regular lat/lon grid once per frame and stores each cell's bilinear
+coefficients. A lookup is then one cell index, two bilinear evaluations
+and the same mirror-base / k*360 continuity selection as the exact
+solver, all in plain float arithmetic: which bases are in tilt range and
+which pan copies are in pan range is fixed per cell and precomputed.
+lookup_batch() runs the same steps for many spots as numpy ops over the
+same tables.
+
+Cells where the blend would be inaccurate fall back to the exact solver:
+  - near the straight-down / straight-up singularities, where p_off0
+    swings quickly and a linear blend misplaces pan,
+  - where a mirror base or a pan copy enters or leaves the frame's
+    ranges, so reachability is decided exactly.
+"""
+
+from typing import Optional
+
+import math
+from array import array
+
+import numpy as np
+
+from .coordinates import SpotCoordFrame, latlon_to_pan_tilt
+
+# Grid spacing in degrees. Both delta0 and p_off0 are smooth away from the
+# singular cells, so one degree keeps the blend error in the hundredths of
+# a degree while the table stays ~36k nodes for the default ranges.
+DEFAULT_STEP_DEG = 1.0
+# A cell whose corner azimuths spread wider than this is treated as
+# singular and resolved exactly.
+MAX_AZIMUTH_SPREAD_DEG = 5.0
+
+
+class LatLonTable(object):
+    """Precomputed inverse mapping for one frame over a lat/lon window.
+
+    Frames are immutable, so a table never goes stale; callers cache one
+    per frame (see LatLonCoordSystem.table) and a new frame gets a new
+    table on first use.
+    """
+
+    def __init__(
+        self,
+        frame: SpotCoordFrame,
+        *,
+        lat_range: tuple[float, float],
+        lon_range: tuple[float, float],
+        step_deg: float = DEFAULT_STEP_DEG,
+    ) -> None:
+        self.frame = frame
+        self.step = step_deg
+        self.lat0 = lat_range[0]
+        self.lon0 = lon_range[0]
+        self.n_lat = int(math.ceil((lat_range[1] - lat_range[0]) / step_deg)) + 1
+        self.n_lon = int(math.ceil((lon_range[1] - lon_range[0]) / step_deg)) + 1
+
+        lat = np.radians(self.lat0 + step_deg * np.arange(self.n_lat))[:, None]
+        lon = np.radians(self.lon0 + step_deg * np.arange(self.n_lon))[None, :]
+        # latlon_to_direction, over the whole grid at once
+        dp_x = np.sin(lat)
+        dp_y = np.cos(lat) * np.sin(lon)
+        dp_z = -np.cos(lat) * np.cos(lon)
+        c = math.cos(frame.pole_azimuth_rad)
+        s = math.sin(frame.pole_azimuth_rad)
+        dx = c * dp_x - s * dp_y
+        dy = s * dp_x + c * dp_y
+
+        delta0 = np.degrees(np.arccos(np.clip(-dp_z, -1.0, 1.0)))
+        p_off0 = np.degrees(np.arctan2(dy, dx))
+
+        corners_d = self._corners(delta0)
+        corners_p = self._corners(p_off0)
+        # Unwrap the azimuth corners relative to the first one
+        rel = [(cp - corners_p[0] + 180.0) % 360.0 - 180.0 for cp in corners_p]
+        self.exact = self._exact_cells(corners_d, corners_p[0], rel)
+
+        # Per cell, row-major: bilinear coefficients of delta0 and of the
+        # first mirror base's pan (pan_down + p_off0), each evaluated as
+        #   v = a + tx * (b + ty * e) + ty * c
+        # and stored [a, b, c, e], followed by the in-range pan copies
+        # [k_lo1, k_hi1, k_lo2, k_hi2]. Scalar lookups index the array()
+        # copies, which is far faster than indexing numpy arrays;
+        # lookup_batch gathers rows from zero-copy numpy views of them.
+        base_pan = [frame.pan_down + corners_p[0] + r for r in rel]
+        coeffs = np.stack(self._coeffs(corners_d) + self._coeffs(base_pan), axis=-1)
+        k_ranges = self._pan_copies(corners_d[0], corners_p[0])
+        self._coeffs_flat = array("d")
+        self._coeffs_flat.frombytes(coeffs.astype(np.float64).tobytes())
+        self._k_flat = array("q")
+        self._k_flat.frombytes(k_ranges.astype(np.int64).tobytes())
+        self._exact_flat = bytes(self.exact.ravel().astype(np.uint8))
+        self._coeffs_np = np.frombuffer(self._coeffs_flat, dtype=np.float64).reshape(
+            -1, 8
+        )
+        self._k_np = np.frombuffer(self._k_flat, dtype=np.int64).reshape(-1, 4)
+        self._exact_np = np.frombuffer(self._exact_flat, dtype=np.bool_)
+
+    @staticmethod
+    def _corners(grid: np.ndarray) -> list[np.ndarray]:
+        return [grid[:-1, :-1], grid[:-1, 1:], grid[1:, :-1], grid[1:, 1:]]
+
+    @staticmethod
+    def _coeffs(corners: list[np.ndarray]) -> list[np.ndarray]:
+        v00, v01, v10, v11 = corners
+        return [v00, v01 - v00, v10 - v00, v11 - v01 - v10 + v00]
+
+    def _exact_cells(
+        self,
+        corners_d: list[np.ndarray],
+        p00: np.ndarray,
+        rel: list[np.ndarray],
+    ) -> np.ndarray:
+        """Flag the cells whose lookups must go to the exact solver."""
+        frame = self.frame
+        spread = np.max(rel, axis=0) - np.min(rel, axis=0)
+        exact = spread > MAX_AZIMUTH_SPREAD_DEG
+
+        tilt_min, tilt_max = frame.tilt_range
+        pan_min, pan_max = frame.pan_range
+        for sign, pan_shift in ((-1.0, 0.0), (1.0, 180.0)):
+            tilt = [frame.tilt_down + sign * cd for cd in corners_d]
+            ok = [(t >= tilt_min - 1e-9) & (t <= tilt_max + 1e-9) for t in tilt]
+            exact |= np.any(ok, axis=0) & ~np.all(ok, axis=0)
+
+            # Number of in-range pan copies must agree across the cell too
+            base = [frame.pan_down + p00 + pan_shift + r for r in rel]
+            copies = [
+                np.floor((pan_max - b) / 360.0) - np.ceil((pan_min - b) / 360.0)
+                for b in base
+            ]
+            lows = [np.ceil((pan_min - b) / 360.0) for b in base]
+            exact |= np.ptp(copies, axis=0) > 0
+            exact |= np.ptp(lows, axis=0) > 0
+        return exact
+
+    def _pan_copies(self, d00: np.ndarray, p00: np.ndarray) -> np.ndarray:
+        """Per cell, the in-range k of pan = base_pan + 360k for each base.
+
+        Evaluated at each cell's first corner; the cells where that
+        differs across the cell are flagged exact. An out-of-range base
+        gets an empty range (lo > hi).
+        """
+        frame = self.frame
+        tilt_min, tilt_max = frame.tilt_range
+        pan_min, pan_max = frame.pan_range
+        out: list[np.ndarray] = []
+        for sign, pan_shift in ((-1.0, 0.0), (1.0, 180.0)):
+            tilt = frame.tilt_down + sign * d00
+            ok = (tilt >= tilt_min - 1e-9) & (tilt <= tilt_max + 1e-9)
+            base = frame.pan_down + p00 + pan_shift
+            out.append(np.where(ok, np.ceil((pan_min - base) / 360.0), 1))
+            out.append(np.where(ok, np.floor((pan_max - base) / 360.0), 0))
+        return np.stack(out, axis=-1)
+
+    def lookup(
+        self,
+        lat_deg: float,
+        lon_deg: float,
+        current: Optional[tuple[float, float]] = None,
+    ) -> Optional[tuple[float, float]]:
+        """Same contract as latlon_to_pan_tilt, answered from the table."""
+        fy = (lat_deg - self.lat0) / self.step
+        fx = (lon_deg - self.lon0) / self.step
+        if not (0.0 <= fy <= self.n_lat - 1 and 0.0 <= fx <= self.n_lon - 1):
+            return latlon_to_pan_tilt(lat_deg, lon_deg, self.frame, current)
+        # The top/right edge belongs to the last cell
+        i = min(int(fy), self.n_lat - 2)
+        j = min(int(fx), self.n_lon - 2)
+        cell = i * (self.n_lon - 1) + j
+        if self._exact_flat[cell]:
+            return latlon_to_pan_tilt(lat_deg, lon_deg, self.frame, current)
+        ty = fy - i
+        tx = fx - j
+
+        c = self._coeffs_flat
+        n = cell * 8
+        delta0 = c[n] + tx * (c[n + 1] + ty * c[n + 3]) + ty * c[n + 2]
+        pan = c[n + 4] + tx * (c[n + 5] + ty * c[n + 7]) + ty * c[n + 6]
+        k = self._k_flat
+        n = cell * 4
+
+        frame = self.frame
+        target_pan, target_tilt = (
+            current if current is not None else frame.range_centre()
+        )
+        best: Optional[tuple[float, float]] = None
+        best_dist = math.inf
+        for tilt, base_pan, k_lo, k_hi in (
+            (frame.tilt_down - delta0, pan, k[n], k[n + 1]),
+            (frame.tilt_down + delta0, pan + 180.0, k[n + 2], k[n + 3]),
+        ):
+            if k_lo > k_hi:
+                continue
+            # Tilt is fixed per base, so the pan copy nearest the target
+            # is that base's best candidate.
+            copy = round((target_pan - base_pan) / 360.0)
+            if copy < k_lo:
+                copy = k_lo
+            elif copy > k_hi:
+                copy = k_hi
+            candidate = base_pan + 360.0 * copy
+            dist = (candidate - target_pan) ** 2 + (tilt - target_tilt) ** 2
+            if dist < best_dist:
+                best = (candidate, tilt)
+                best_dist = dist
+        return best
+
+    def lookup_batch(
+        self,
+        lat_deg: np.ndarray,
+        lon_deg: np.ndarray,
+        current: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """lookup() over arrays of points; `current` is (N, 2) pan/tilt.
+
+        Returns (N, 2) pan/tilt degrees with NaN rows where unreachable.
+        """
+        lat_deg = np.asarray(lat_deg, dtype=np.float64)
+        lon_deg = np.asarray(lon_deg, dtype=np.float64)
+        frame = self.frame
+        count = len(lat_deg)
+        if current is None:
+            target = np.empty((count, 2))
+            target[:] = frame.range_centre()
+        else:
+            target = np.asarray(current, dtype=np.float64)
+
+        fy = (lat_deg - self.lat0) / self.step
+        fx = (lon_deg - self.lon0) / self.step
+        # np.minimum/np.maximum rather than np.clip: at a dozen rows the
+        # ufunc call overhead is what this costs
+        fy_in = np.minimum(np.maximum(fy, 0.0), self.n_lat - 1)
+        fx_in = np.minimum(np.maximum(fx, 0.0), self.n_lon - 1)
+        i = np.minimum(fy_in.astype(np.intp), self.n_lat - 2)
+        j = np.minimum(fx_in.astype(np.intp), self.n_lon - 2)
+        cell = i * (self.n_lon - 1) + j
+        # Out of the grid (or NaN) and singular cells go to the exact solver
+        fallback = (fy_in != fy) | (fx_in != fx) | self._exact_np[cell]
+        ty = (fy_in - i)[:, None]
+        tx = (fx_in - j)[:, None]
+
+        # Columns 0 and 1 below are the two mirror bases
+        c = self._coeffs_np[cell]
+        v = c[:, 0::4] + tx * (c[:, 1::4] + ty * c[:, 3::4]) + ty * c[:, 2::4]
+        delta0 = v[:, 0:1]
+        base_pan = v[:, 1:2] + (0.0, 180.0)
+        tilt = frame.tilt_down + delta0 * (-1.0, 1.0)
+
+        ks = self._k_np[cell]
+        k_lo = ks[:, 0::2]
+        k_hi = ks[:, 1::2]
+        copy = np.minimum(
+            np.maximum(np.rint((target[:, 0:1] - base_pan) / 360.0), k_lo), k_hi
+        )
+        pan = base_pan + 360.0 * copy
+        dist = (pan - target[:, 0:1]) ** 2 + (tilt - target[:, 1:2]) ** 2
+        dist[k_lo > k_hi] = np.inf
+
+        rows = np.arange(count)
+        pick = np.argmin(dist, axis=1)
+        out = np.empty((count, 2))
+        out[:, 0] = pan[rows, pick]
+        out[:, 1] = tilt[rows, pick]
+        out[np.isinf(dist[rows, pick])] = np.nan
+
+        for n in np.flatnonzero(fallback).tolist():
+            hint = None if current is None else (target[n, 0], target[n, 1])
+            result = latlon_to_pan_tilt(
+                float(lat_deg[n]), float(lon_deg[n]), frame, hint
+            )
+            out[n] = np.nan if result is None else result
+        return out
@@ -0,0 +1,111 @@
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Any
+
+import struct
+
+import numpy as np
+
+
+class VisualizerFrame(object):
+    """Packs one visualizer update into a single OSC blob.
+
+    Replaces the per-fixture /visualizer/fixture/* messages and the full
+    history lists. The layout's visualizer_frame script unpacks it and sets
+    the same widgets those addresses used to drive. Fixture names are sent
+    separately (see Mixer.send_visualizer_frame) since they rarely change.
+
+    Layout, little-endian:
+        u8 version, u8 flags, u16 sequence
+        FLAG_DIMMING: u8 count, count x u8 level
+        FLAG_PANTILT: u8 count, count x (u16 pan, u16 tilt)
+        one block per history flag set, in HISTORIES order:
+            u8 count, count x u8 sample (oldest first, new samples only)
+    """
+
+    VERSION = 1
+
+    FLAG_DIMMING = 1
+    FLAG_PANTILT = 2
+
+    HISTORIES: List[Tuple[str, int]] = [
+        ("synth", 4),
+        ("fftgen_1", 8),
+        ("fftgen_2", 16),
+    ]
+
+    # per block counts are a single byte
+    MAX_ITEMS = 255
+
+    def __init__(self) -> None:
+        self.seq = 0
+
+    def encode(
+        self,
+        *,
+        dimming: Optional[Sequence[float]] = None,
+        pantilt: Optional[Sequence[Tuple[int, int]]] = None,
+        histories: Optional[Mapping[str, Sequence[float]]] = None,
+    ) -> bytes:
+        flags = 0
+        body = bytearray()
+
+        if dimming is not None:
+            flags |= self.FLAG_DIMMING
+            body += self._pack_u8_block(dimming)
+
+        if pantilt is not None:
+            flags |= self.FLAG_PANTILT
+            pairs = np.clip(
+                np.asarray(pantilt[: self.MAX_ITEMS], dtype=np.float64).reshape(-1, 2),
+                0,
+                0xFFFF,
+            )
+            body.append(len(pairs))
+            body += pairs.astype("<u2").tobytes()
+
+        if histories:
+            for name, flag in self.HISTORIES:
+                samples = histories.get(name)
+                if samples is None or len(samples) == 0:
+                    continue
+                flags |= flag
+                body += self._pack_u8_block(samples[-self.MAX_ITEMS :])
+
+        header = struct.pack("<BBH", self.VERSION, flags, self.seq)
+        self.seq = (self.seq + 1) & 0xFFFF
+        return header + bytes(body)
+
+    @classmethod
+    def _pack_u8_block(cls, values: Sequence[float]) -> bytes:
+        levels = np.clip(
+            np.rint(np.asarray(values[: cls.MAX_ITEMS], dtype=np.float64)), 0, 255
+        )
+        return bytes([len(levels)]) + levels.astype(np.uint8).tobytes()
+
+    @classmethod
+    def decode(cls, blob: bytes) -> Dict[str, Any]:
+        """Inverse of encode, mirrors the layout script. Used by tests."""
+        version, flags, seq = struct.unpack_from("<BBH", blob, 0)
+        if version != cls.VERSION:
+            raise ValueError("Unknown visualizer frame version {}".format(version))
+        result: Dict[str, Any] = {"seq": seq}
+        pos = 4
+
+        if flags & cls.FLAG_DIMMING:
+            count = blob[pos]
+            result["dimming"] = list(blob[pos + 1 : pos + 1 + count])
+            pos += 1 + count
+
+        if flags & cls.FLAG_PANTILT:
+            count = blob[pos]
+            flat = np.frombuffer(blob, dtype="<u2", count=count * 2, offset=pos + 1)
+            result["pantilt"] = [(int(p), int(t)) for p, t in flat.reshape(-1, 2)]
+            pos += 1 + count * 4
+
+        histories: Dict[str, List[int]] = {}
+        for name, flag in cls.HISTORIES:
+            if flags & flag:
+                count = blob[pos]
+                histories[name] = list(blob[pos + 1 : pos + 1 + count])
+                pos += 1 + count
+        result["histories"] = histories
+        return result
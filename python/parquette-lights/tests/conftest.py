@@ -21,6 +21,7 @@ from parquette.lights.audio_analysis import AudioCapture, FFTManager
 from parquette.lights.category import Categories
 from parquette.lights.coord_system_state import CoordSystemState
 from parquette.lights.dmx import DMXManager
+from parquette.lights.envelope import EnvelopeScheduler
 from parquette.lights.generators import Mixer
 from parquette.lights.osc import OSCManager, OSCParam
 from parquette.lights.patching import create_builders
@@ -184,6 +185,7 @@ def server_instance(
         debug=False,
     )
 
+    envelopes = EnvelopeScheduler()
     builders = create_builders(
         osc=osc,
         dmx=dmx,
@@ -194,6 +196,7 @@ def server_instance(
         loop_max_samples=500,
         spot_color_fade=0.1,
         spot_mechanical_time=0.45,
+        envelopes=envelopes,
         debug=False,
         debug_hazer=False,
     )
@@ -231,6 +234,7 @@ def server_instance(
     runnable_fixtures = [f for f in all_fixtures if f.runnable]
 
     def tick() -> None:
+        envelopes.tick()
         if dmx.passthrough:
             dmx.submit_passthrough()
             return
@@ -0,0 +1,104 @@
+"""Unit tests for the callback-mode audio capture."""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from parquette.lights.audio_analysis.audio import AudioCapture, pyaudio
+from parquette.lights.osc import OSCManager
+
+RATE = 44100
+CHUNK = 512
+
+
+class _DMX(object):
+    passthrough = False
+
+
+@pytest.fixture
+def capture() -> AudioCapture:
+    cap = AudioCapture(OSCManager(), chunk=CHUNK, analysis_rate=None)
+    cap.configure_rate(RATE)
+    cap.dmx = _DMX()  # type: ignore[assignment]
+    return cap
+
+
+def _data(value: int) -> bytes:
+    return np.full(CHUNK, value, dtype=np.int16).tobytes()
+
+
+def test_chunk_is_stamped_from_the_adc_time(capture: AudioCapture) -> None:
+    before = time.time()
+    result = capture._on_chunk(  # pylint: disable=protected-access
+        _data(7),
+        CHUNK,
+        {"input_buffer_adc_time": 10.0, "current_time": 10.02},
+        0,
+    )
+    after = time.time()
+    assert result == (None, pyaudio.paContinue)
+
+    assert capture.ring.chunks == 1
+    assert capture.ring.samples(1).tolist() == [7.0] * CHUNK
+    # Last sample: captured 20 ms before the callback, plus the chunk
+    stamp = float(capture.ring.timestamps(1)[0])
+    offset = -0.02 + CHUNK / RATE
+    assert before + offset <= stamp <= after + offset
+    assert capture.new_chunk_event.is_set()
+    assert capture.late_callbacks == 0
+
+
+def test_overflows_and_late_callbacks_are_counted(capture: AudioCapture) -> None:
+    late = {"input_buffer_adc_time": 10.0, "current_time": 10.1}
+    # pylint: disable=protected-access
+    capture._on_chunk(_data(1), CHUNK, late, pyaudio.paInputOverflow)
+    capture._on_chunk(_data(2), CHUNK, {}, pyaudio.paInputUnderflow)
+    assert capture.overflows == 1
+    assert capture.underflows == 1
+    assert capture.late_callbacks == 1
+    assert capture.uidb["audio_overflows"] == 1
+    assert capture.uidb["audio_late_callbacks"] == 1
+    # Both chunks kept, the overflowed one included
+    assert capture.ring.chunks == 2
+
+
+def test_passthrough_skips_the_ring(capture: AudioCapture) -> None:
+    capture.dmx.passthrough = True
+    capture._on_chunk(_data(1), CHUNK, {}, 0)  # pylint: disable=protected-access
+    assert capture.ring.chunks == 0
+
+
+def test_device_rate_is_resampled_into_whole_chunks() -> None:
+    cap = AudioCapture(OSCManager(), chunk=CHUNK, analysis_rate=22050)
+    cap.configure_rate(48000)
+    cap.dmx = _DMX()  # type: ignore[assignment]
+    assert cap.rate == 22050
+    assert cap.device_chunk == 1115
+    assert cap.window_len == int(5 * 22050 / CHUNK)
+
+    t = np.arange(48000) / 48000
+    y = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    end_ts = 0.0
+    for start in range(0, len(y) - cap.device_chunk + 1, cap.device_chunk):
+        end_ts = 100.0 + (start + cap.device_chunk - 1) / 48000
+        cap._write(  # pylint: disable=protected-access
+            y[start : start + cap.device_chunk], end_ts
+        )
+
+    n_out = cap.resampler.out_count  # type: ignore[union-attr]
+    assert cap.ring.chunks == n_out // CHUNK
+    stamps = cap.ring.timestamps(cap.ring.chunks - 1)
+    np.testing.assert_allclose(np.diff(stamps), CHUNK / 22050, atol=1e-9)
+    # The latest chunk lags the input by the filter delay and the samples
+    # still pending
+    assert stamps[-1] < end_ts
+
+    # Same tone, at the analysis rate, with its timestamps
+    last = cap.ring.samples(1)
+    times = stamps[-1] - np.arange(CHUNK)[::-1] / 22050 - 100.0
+    np.testing.assert_allclose(
+        last, 8000 * np.sin(2 * np.pi * 440 * times), atol=0.01 * 8000
+    )
@@ -0,0 +1,66 @@
+"""Unit tests for the streaming beat tracker."""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from parquette.lights.audio_analysis.beat_tracker import StreamingBeatTracker
+from parquette.lights.audio_analysis.spectral import SpectralFrontEnd
+
+RATE = 44100
+CHUNK = 512
+N_MELS = CHUNK // 8
+WINDOW = int(5 * RATE / CHUNK)
+
+
+def _click_track(
+    bpm: float, secs: float = 8.0, rate: int = RATE
+) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal(int(secs * rate)) * 50.0
+    width = rate // 100
+    click = np.hanning(width) * np.sin(2 * np.pi * 1000 * np.arange(width) / rate)
+    clicks = np.arange(0.1, secs - 0.1, 60.0 / bpm)
+    for t in clicks:
+        start = int(t * rate)
+        y[start : start + width] += 8000.0 * click
+    return y.astype(np.float32), clicks
+
+
+def _track(y: np.ndarray, rate: int = RATE) -> StreamingBeatTracker:
+    front_end = SpectralFrontEnd(CHUNK, rate, N_MELS)
+    tracker = StreamingBeatTracker(N_MELS, rate / CHUNK, int(5 * rate / CHUNK))
+    for i in range(len(y) // CHUNK):
+        front_end.forward(y[i * CHUNK : (i + 1) * CHUNK])
+        tracker.push(front_end.mel)
+    return tracker
+
+
+@pytest.mark.filterwarnings("ignore:divide by zero:RuntimeWarning")
+@pytest.mark.parametrize("rate", [RATE, 22050])
+@pytest.mark.parametrize("bpm", [90, 120, 140])
+def test_click_track_tempo_and_phase(bpm: float, rate: int) -> None:
+    y, clicks = _click_track(bpm, rate=rate)
+    estimate = _track(y, rate).estimate()
+    assert estimate.tempo == pytest.approx(bpm, rel=0.015)
+
+    frame_secs = CHUNK / rate
+    end_time = (len(y) // CHUNK) * frame_secs
+    beat_time = end_time - (estimate.beat_frames_ago + 0.5) * frame_secs
+    # Within a frame or so
+    assert np.min(np.abs(clicks - beat_time)) < 1.3 * frame_secs
+    assert len(estimate.envelope) == int(5 * rate / CHUNK)
+
+
+@pytest.mark.filterwarnings("ignore:divide by zero:RuntimeWarning")
+def test_running_autocorrelation_matches_a_full_recompute() -> None:
+    y, _ = _click_track(128, secs=7.3)
+    tracker = _track(y)
+    # Part way through a window, so the sums are all incremental updates
+    assert tracker.frames % WINDOW != 0
+    running = tracker._ac.copy()  # pylint: disable=protected-access
+    tracker._refresh()  # pylint: disable=protected-access
+    np.testing.assert_allclose(running, tracker._ac, rtol=1e-9, atol=1e-9)
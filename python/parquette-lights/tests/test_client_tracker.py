@@ -0,0 +1,128 @@
+"""Unit tests for ClientTracker target learning and stream subscriptions.
+
+Inbound OSC is fed through the dispatcher with a fake return address and
+UDP clients are swapped for recorders, so no sockets are opened.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from parquette.lights import osc as osc_mod
+from parquette.lights.osc import OSCManager
+from parquette.lights.util.client_tracker import ClientTracker
+
+TABLET_A = ("10.0.0.11", 5006)
+TABLET_B = ("10.0.0.12", 5006)
+
+
+class RecordingClient:
+    sent: Dict[Tuple[str, int], List[str]] = {}
+
+    def __init__(self, ip: str, port: int) -> None:
+        self.endpoint = (ip, port)
+        RecordingClient.sent.setdefault(self.endpoint, [])
+
+    def send(self, content: Any) -> None:
+        RecordingClient.sent[self.endpoint].append(content.address)
+
+
+@pytest.fixture(name="osc")
+def fixture_osc(monkeypatch: pytest.MonkeyPatch) -> OSCManager:
+    RecordingClient.sent = {}
+    monkeypatch.setattr(osc_mod, "SimpleUDPClient", RecordingClient)
+    osc = OSCManager()
+    osc.set_target("127.0.0.1", 5006)
+    osc.route_stream("/visualizer/synth_history", "/visualizer/enable_synth")
+    osc.route_stream("/visualizer/fixture/", "/visualizer/enable_fixture", prefix=True)
+    return osc
+
+
+def _inbound(osc: OSCManager, endpoint: Tuple[str, int], addr: str, *args: Any) -> None:
+    dgram = OSCManager.build_message(addr, list(args)).dgram
+    osc.dispatcher.call_handlers_for_packet(dgram, endpoint)
+
+
+def _tracker(osc: OSCManager) -> ClientTracker:
+    tracker = ClientTracker(osc)
+    # subscribe without spinning up the prune thread
+    for topic in osc.stream_topics():
+        osc.dispatcher.map(
+            topic,
+            tracker._on_subscribe,  # pylint: disable=protected-access
+            needs_reply_address=True,
+        )
+        osc.set_subscribers(topic, set())
+    return tracker
+
+
+def test_streams_go_everywhere_without_tracker(osc: OSCManager) -> None:
+    osc.send_osc("/visualizer/synth_history", [0.0])
+    assert RecordingClient.sent[("127.0.0.1", 5006)] == ["/visualizer/synth_history"]
+
+
+def test_heartbeat_learns_target(osc: OSCManager) -> None:
+    _tracker(osc)
+    _inbound(osc, TABLET_A, "/heartbeat", 1234)
+    osc.send_osc("/preset/selector/reds", "a")
+    assert RecordingClient.sent[TABLET_A] == ["/preset/selector/reds"]
+    assert RecordingClient.sent[("127.0.0.1", 5006)] == ["/preset/selector/reds"]
+
+
+def test_streams_only_reach_subscribers(osc: OSCManager) -> None:
+    _tracker(osc)
+    _inbound(osc, TABLET_A, "/heartbeat", 1)
+    _inbound(osc, TABLET_B, "/heartbeat", 2)
+    _inbound(osc, TABLET_A, "/visualizer/enable_fixture", 1)
+    _inbound(osc, TABLET_B, "/visualizer/enable_synth", 1)
+    _inbound(osc, TABLET_B, "/visualizer/enable_fixture", 0)
+
+    osc.send_osc("/visualizer/fixture/spot_1/pantilt", [1, 2])
+    osc.send_osc("/visualizer/synth_history", [0.0])
+    osc.send_osc("/client_count", 2)
+
+    assert RecordingClient.sent[TABLET_A] == [
+        "/visualizer/fixture/spot_1/pantilt",
+        "/client_count",
+    ]
+    assert RecordingClient.sent[TABLET_B] == [
+        "/visualizer/synth_history",
+        "/client_count",
+    ]
+    assert RecordingClient.sent[("127.0.0.1", 5006)] == ["/client_count"]
+
+
+def test_local_front_end_is_not_duplicated(osc: OSCManager) -> None:
+    _tracker(osc)
+    _inbound(osc, ("127.0.0.1", 5006), "/heartbeat", 1)
+    osc.send_osc("/client_count", 1)
+    assert RecordingClient.sent == {("127.0.0.1", 5006): ["/client_count"]}
+
+
+def test_batched_dedup_is_per_target(osc: OSCManager) -> None:
+    _tracker(osc)
+    osc.set_batching(True)
+    osc.send_osc("/client_count", 1)
+    osc.flush()
+
+    _inbound(osc, TABLET_A, "/heartbeat", 1)
+    osc.send_osc("/client_count", 1)
+    osc.flush()
+
+    assert RecordingClient.sent[("127.0.0.1", 5006)] == ["/client_count"]
+    assert RecordingClient.sent[TABLET_A] == ["/client_count"]
+
+
+def test_stream_with_several_topics(osc: OSCManager) -> None:
+    osc.route_stream("/visualizer/frame", "/visualizer/enable_synth")
+    osc.route_stream("/visualizer/frame", "/visualizer/enable_fixture")
+    _tracker(osc)
+    _inbound(osc, TABLET_A, "/heartbeat", 1)
+    _inbound(osc, TABLET_B, "/heartbeat", 2)
+    _inbound(osc, TABLET_B, "/visualizer/enable_synth", 1)
+
+    osc.send_osc("/visualizer/frame", b"\x01\x00\x00\x00")
+    assert RecordingClient.sent[TABLET_A] == []
+    assert RecordingClient.sent[TABLET_B] == ["/visualizer/frame"]
@@ -5,8 +5,10 @@ unreachable handling) and the CoordSystemState toggle wiring.
 """
 
 import pickle
+import random
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from parquette.lights.coord_system_state import CoordSystemState
@@ -17,7 +19,8 @@ from parquette.lights.util.coord_system import (
     RawCoordSystem,
     default_systems,
 )
-from parquette.lights.util.coordinates import SpotCoordFrame
+from parquette.lights.util.coordinates import SpotCoordFrame, latlon_to_pan_tilt
+from parquette.lights.util.latlon_table import LatLonTable
 from parquette.lights.util.session_store import SessionStore
 
 
@@ -123,6 +126,111 @@ def test_latlon_unreachable_returns_none():
     assert sys.mapping_to_real([32767.5, 65535.0], frame) is None
 
 
+# LatLonTable — tabulated solver checked against the exact one.
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        default_frame(),
+        SpotCoordFrame(
+            pan_down=37.0,
+            tilt_down=120.0,
+            pan_north=127.0,
+            tilt_north=30.0,
+            pan_range=(0.0, 540.0),
+            tilt_range=(20.0, 230.0),
+        ),
+    ],
+)
+def test_latlon_table_matches_exact_solver(frame: SpotCoordFrame):
+    table = LatLonTable(frame, lat_range=(-90.0, 90.0), lon_range=(-100.0, 100.0))
+    rng = random.Random(36)
+    for _ in range(5000):
+        lat = rng.uniform(-90.0, 90.0)
+        lon = rng.uniform(-100.0, 100.0)
+        current = (rng.uniform(*frame.pan_range), rng.uniform(*frame.tilt_range))
+        for hint in (current, None):
+            got = table.lookup(lat, lon, hint)
+            want = latlon_to_pan_tilt(lat, lon, frame, hint)
+            if want is None:
+                assert got is None
+                continue
+            # Same branch and pan copy, within the bilinear error bound
+            assert got is not None
+            assert got[0] == pytest.approx(want[0], abs=0.05)
+            assert got[1] == pytest.approx(want[1], abs=0.05)
+
+
+def test_latlon_table_falls_back_near_straight_down():
+    frame = default_frame()
+    table = LatLonTable(frame, lat_range=(-90.0, 90.0), lon_range=(-100.0, 100.0))
+    # The cell holding lat=0, lon=0 is singular; pan follows the hint
+    assert table.exact[90, 100]
+    assert table.lookup(0.2, 0.3, (123.0, 100.0)) == latlon_to_pan_tilt(
+        0.2, 0.3, frame, (123.0, 100.0)
+    )
+
+
+def test_latlon_system_caches_table_per_frame():
+    sys = LatLonCoordSystem()
+    frame = default_frame()
+    assert sys.table(frame) is sys.table(default_frame())
+    other = SpotCoordFrame(
+        pan_down=10.0,
+        tilt_down=100.0,
+        pan_north=10.0,
+        tilt_north=10.0,
+        pan_range=(0.0, 540.0),
+        tilt_range=(0.0, 200.0),
+    )
+    assert sys.table(other) is not sys.table(frame)
+    assert sys.table(other).frame == other
+
+
+# mapping_to_real_batch — one pass over every spot, same answers as scalar.
+
+
+def test_identity_systems_batch_passthrough():
+    xy = np.array([[1.0, 2.0], [65535.0, 0.0]])
+    frames = [default_frame(), default_frame()]
+    for sys in (PanTiltCoordSystem(), RawCoordSystem()):
+        out = sys.mapping_to_real_batch(xy, frames, xy[::-1])
+        assert out.tolist() == xy.tolist()
+        assert out is not xy
+
+
+def test_latlon_batch_matches_scalar():
+    sys = LatLonCoordSystem()
+    narrow = SpotCoordFrame(
+        pan_down=0.0,
+        tilt_down=100.0,
+        pan_north=0.0,
+        tilt_north=10.0,
+        pan_range=(0.0, 540.0),
+        tilt_range=(90.0, 110.0),
+    )
+    rng = random.Random(37)
+    xy = [[rng.uniform(0, 65535), rng.uniform(0, 65535)] for _ in range(200)]
+    current = [[rng.uniform(0, 65535), rng.uniform(0, 65535)] for _ in range(200)]
+    # Mixed frames, the centre (singular, exact fallback) and the pole on
+    # a narrow tilt range (unreachable)
+    xy += [[32767.5, 32767.5], [32767.5, 65535.0]]
+    current += [[100.0, 32767.5], [0.0, 0.0]]
+    frames = [default_frame() if n % 3 else narrow for n in range(len(xy))]
+    frames[-1] = narrow
+
+    out = sys.mapping_to_real_batch(np.array(xy), frames, np.array(current))
+    assert out.shape == (len(xy), 2)
+    for n, frame in enumerate(frames):
+        want = sys.mapping_to_real(xy[n], frame, current_real=current[n])
+        if want is None:
+            assert np.isnan(out[n]).all()
+        else:
+            assert out[n].tolist() == pytest.approx(want)
+    assert np.isnan(out[-1]).all()
+
+
 # default_systems factory
 
 
@@ -0,0 +1,82 @@
+"""Unit tests for the tick-driven Envelope scheduler."""
+
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from parquette.lights.envelope import Envelope, EnvelopeScheduler
+
+
+def test_fade_out_action_hold_fade_in() -> None:
+    scheduler = EnvelopeScheduler()
+    envelope = Envelope()
+    actions: List[str] = []
+
+    scheduler.start(
+        envelope,
+        fade_time=1.0,
+        hold=0.5,
+        action=lambda: actions.append("swap"),
+        now=0.0,
+    )
+
+    scheduler.tick(0.5)
+    assert envelope.level == pytest.approx(0.5)
+    assert not actions
+
+    scheduler.tick(1.2)
+    assert envelope.level == 0.0
+    assert actions == ["swap"]
+
+    scheduler.tick(2.0)
+    assert envelope.level == pytest.approx(0.5)
+
+    scheduler.tick(3.0)
+    assert envelope.level == 1.0
+    assert not envelope.active
+    assert len(scheduler) == 0
+    assert actions == ["swap"]
+
+
+def test_restart_from_current_level() -> None:
+    scheduler = EnvelopeScheduler()
+    envelope = Envelope()
+    actions: List[int] = []
+
+    scheduler.start(envelope, fade_time=1.0, action=lambda: actions.append(1), now=0)
+    scheduler.tick(0.8)
+    assert envelope.level == pytest.approx(0.2)
+
+    # the fade out is scaled to the level it restarts from
+    scheduler.start(envelope, fade_time=1.0, action=lambda: actions.append(2), now=0.8)
+    scheduler.tick(0.9)
+    assert envelope.level == pytest.approx(0.1)
+    scheduler.tick(1.0)
+    assert envelope.level == 0.0
+    assert actions == [2]
+
+
+def test_cancel_skips_action() -> None:
+    scheduler = EnvelopeScheduler()
+    envelope = Envelope()
+    actions: List[int] = []
+
+    scheduler.start(envelope, fade_time=1.0, action=lambda: actions.append(1), now=0)
+    scheduler.tick(0.5)
+    scheduler.cancel(envelope, level=1.0)
+    scheduler.tick(5.0)
+    assert envelope.level == 1.0
+    assert not actions
+
+
+def test_zero_fade_runs_action_immediately() -> None:
+    scheduler = EnvelopeScheduler()
+    envelope = Envelope()
+    actions: List[int] = []
+
+    scheduler.start(envelope, fade_time=0.0, action=lambda: actions.append(1))
+    assert actions == [1]
+    assert envelope.level == 1.0
+    assert len(scheduler) == 0
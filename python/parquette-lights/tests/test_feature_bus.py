@@ -0,0 +1,120 @@
+"""Unit tests for the shared-memory feature bus and the analysis process."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Iterator, List, Tuple
+
+import numpy as np
+import pytest
+
+from parquette.lights.audio_analysis.feature_bus import (
+    FRAME_BPM_VALID,
+    FRAME_FIELDS,
+    FRAME_MILLIS,
+    FRAME_ONSET,
+    FRAME_RMS,
+    FRAME_RMS_VALID,
+    FeatureBus,
+)
+from parquette.lights.audio_analysis.process import AnalysisProcess
+from parquette.lights.osc import OSCManager
+
+N_MELS = 8
+
+
+@pytest.fixture
+def bus() -> Iterator[FeatureBus]:
+    created = FeatureBus(N_MELS, frame_capacity=4, beat_capacity=2)
+    yield created
+    created.close()
+    created.unlink()
+
+
+def _frame(bus: FeatureBus, i: int) -> None:
+    bus.write_frame(
+        1000.0 + i,
+        np.full(N_MELS, i, dtype=np.float64),
+        rms=i * 10.0,
+        rms_valid=True,
+        bpm_valid=i % 2 == 0,
+        onset=i == 1,
+        visualizing=False,
+    )
+
+
+def test_frames_read_once_in_order(bus: FeatureBus) -> None:
+    for i in range(3):
+        _frame(bus, i)
+    rows = bus.read_frames()
+    assert [row[FRAME_MILLIS] for row in rows] == [1000.0, 1001.0, 1002.0]
+    assert rows[1][FRAME_RMS] == 10.0
+    assert rows[1][FRAME_RMS_VALID] == 1.0
+    assert rows[1][FRAME_BPM_VALID] == 0.0
+    assert [row[FRAME_ONSET] for row in rows] == [0.0, 1.0, 0.0]
+    assert rows[2][FRAME_FIELDS:].tolist() == [2.0] * N_MELS
+
+    assert bus.read_frames() == []
+    _frame(bus, 3)
+    assert [row[FRAME_MILLIS] for row in bus.read_frames()] == [1003.0]
+    assert bus.dropped == 0
+
+
+def test_overrun_drops_the_oldest_and_counts_them(bus: FeatureBus) -> None:
+    for i in range(7):
+        _frame(bus, i)
+    rows = bus.read_frames()
+    assert [row[FRAME_MILLIS] for row in rows] == [1004.0, 1005.0, 1006.0]
+    assert bus.dropped == 4
+
+    # Picks up where the writer is, not where the dropped rows left off
+    _frame(bus, 7)
+    assert [row[FRAME_MILLIS] for row in bus.read_frames()] == [1007.0]
+
+
+def test_attached_side_sees_beats_and_passthrough(bus: FeatureBus) -> None:
+    other = FeatureBus(N_MELS, frame_capacity=4, beat_capacity=2, name=bus.name)
+    try:
+        other.write_beat(128.0, 5000.0, 0.25)
+        rows = bus.read_beats()
+        assert [row.tolist() for row in rows] == [[128.0, 5000.0, 0.25]]
+
+        bus.passthrough = True
+        assert other.passthrough
+    finally:
+        other.close()
+
+
+class _DMX(object):
+    passthrough = False
+
+
+def test_analysis_process_relays_osc(monkeypatch: pytest.MonkeyPatch) -> None:
+    osc = OSCManager()
+    sent: List[Tuple[str, Any]] = []
+    monkeypatch.setattr(osc, "send_osc", lambda addr, args: sent.append((addr, args)))
+
+    analysis = AnalysisProcess(osc, _DMX())  # type: ignore[arg-type]
+    try:
+        assert "/audio_config/start_fft" in osc.registered_addresses()
+        params = {p.addr: p for p in analysis.config_params(osc)}
+        assert params["/audio_config/beat_mode"].value_lambda() == "streaming"
+        params["/audio_config/beat_mode"].dispatch_lambda(
+            "/audio_config/beat_mode", "librosa"
+        )
+        assert params["/audio_config/beat_mode"].value_lambda() == "librosa"
+
+        for handler in osc.dispatcher.handlers_for_address(
+            "/audio_config/port_refresh"
+        ):
+            handler.callback("/audio_config/port_refresh", 1)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            analysis.poll()
+            if any(addr == "/audio_config/port_name/values" for addr, _ in sent):
+                break
+            time.sleep(0.05)
+        assert any(addr == "/audio_config/port_name/values" for addr, _ in sent)
+    finally:
+        analysis.close()
+    assert not analysis.process.is_alive()
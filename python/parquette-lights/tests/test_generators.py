@@ -109,6 +109,32 @@ def test_fft():
         subdivisions=20,
         memory_length=20,
     )
+    assert fft.value(1000) == 0.5
+
+    fft.thres = 0.25
+    fft.set_bounds(0.25, 0.5)
+    for i in range(30):
+        fft.forward([i / 40 + j / 100 for j in range(20)], 1000 + i * 10)
+
+    def expected(i):
+        # bins 5..9 of frame i, less the threshold
+        band = [max(i / 40 + j / 100 - 0.25, 0) for j in range(5, 10)]
+        return sum(band) / len(band) + 0.5
+
+    # Each stored frame keeps its own bands, old ones included
+    assert math.isclose(fft.value(1290), expected(29))
+    assert math.isclose(fft.value(1204), expected(20))
+    assert math.isclose(fft.value(1206), expected(21))
+    assert math.isclose(fft.value(1105), expected(11))
+    # Older than memory_length: the oldest kept; past the newest: the newest
+    assert math.isclose(fft.value(0), expected(10))
+    assert math.isclose(fft.value(5000), expected(29))
+    assert fft.closest_frame(1205) == 21
+
+    # The last bin is past the top bound, as before
+    fft.set_bounds(0, 1)
+    band = [max(29 / 40 + j / 100 - 0.25, 0) for j in range(19)]
+    assert math.isclose(fft.value(1290), sum(band) / 19 + 0.5)
 
 
 def test_bpm_valid_gates_output():
@@ -125,3 +151,21 @@ def test_bpm_valid_gates_output():
     bpm.bpm_valid = True
     # At t=0 with phase_ref=0 and duty=500ms, t=0 is within the pulse window
     assert bpm.value(0) == 255
+
+
+def test_onset():
+    onset = OnsetGenerator(
+        name="onset",
+        category=TEST_CAT,
+        amp=2,
+        offset=0.5,
+        duty=40,
+        decay=100,
+    )
+    assert math.isclose(onset.value(5000), 0.5)
+    onset.punch()
+    assert math.isclose(onset.value(1000), 2.5)
+    assert math.isclose(onset.value(1039), 2.5)
+    assert math.isclose(onset.value(1140), 0.5 + 2 * math.exp(-1))
+    onset.decay = 0
+    assert math.isclose(onset.value(1140), 0.5)
@@ -0,0 +1,84 @@
+"""Unit tests for the streaming harmonic / percussive estimate."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from librosa.util import softmask
+from numpy.lib.stride_tricks import sliding_window_view
+
+from parquette.lights.audio_analysis.hpss import StreamingHPSS
+from parquette.lights.audio_analysis.spectral import SpectralFrontEnd
+
+RATE = 44100
+CHUNK = 512
+
+
+def _powers(y: np.ndarray) -> np.ndarray:
+    front_end = SpectralFrontEnd(CHUNK, RATE, CHUNK // 8)
+    frames = []
+    for i in range(len(y) // CHUNK):
+        front_end.forward(y[i * CHUNK : (i + 1) * CHUNK])
+        frames.append(front_end.power.copy())
+    return np.array(frames)
+
+
+def _median_filter(spec: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """Batch median along one axis with scipy's `reflect` edges."""
+    edge = [(0, 0), (0, 0)]
+    edge[axis] = (size // 2, size // 2)
+    padded = np.pad(spec, edge, mode="symmetric")
+    return np.median(sliding_window_view(padded, size, axis=axis), axis=-1)
+
+
+def _signal(click_amp: float, secs: float = 3.0) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(secs * RATE)) / RATE
+    y = np.zeros_like(t)
+    for freq in (220, 277, 330, 440):
+        y += 3000.0 * np.sin(2 * np.pi * freq * t)
+    width = RATE // 100
+    for start in np.arange(0.05, secs, 0.25):
+        i = int(start * RATE)
+        y[i : i + width] += click_amp * np.hanning(width) * rng.standard_normal(width)
+    return y.astype(np.float32)
+
+
+@pytest.mark.filterwarnings("ignore:divide by zero:RuntimeWarning")
+def test_matches_batch_median_filter_hpss() -> None:
+    powers = _powers(_signal(8000.0))
+    hpss = StreamingHPSS(CHUNK, RATE)
+    for frame in powers:
+        hpss.push(frame)
+
+    spec = powers[:, : hpss.bins]
+    harm = _median_filter(spec, hpss.time_kernel, axis=0)
+    perc = _median_filter(spec, hpss.freq_kernel, axis=1)
+    # Masks on magnitudes, as librosa's hpss takes them
+    mask_h = softmask(np.sqrt(harm), np.sqrt(perc), power=2, split_zeros=True)
+    mask_p = softmask(np.sqrt(perc), np.sqrt(harm), power=2, split_zeros=True)
+    energy_h = (spec * mask_h**2).sum(axis=1)
+    energy_p = (spec * mask_p**2).sum(axis=1)
+
+    # The tail's frames, all centred well away from the edges
+    # pylint: disable=protected-access
+    tail = len(hpss._energy_h)
+    done = hpss.frames - hpss.time_kernel // 2
+    frames = np.arange(done - tail, done)
+    slots = (frames + hpss.time_kernel // 2 + 1) % tail
+    np.testing.assert_allclose(hpss._energy_h[slots], energy_h[frames], rtol=1e-9)
+    np.testing.assert_allclose(hpss._energy_p[slots], energy_p[frames], rtol=1e-9)
+
+
+@pytest.mark.filterwarnings("ignore:divide by zero:RuntimeWarning")
+def test_ratio_rises_with_percussion() -> None:
+    ratios = []
+    for click_amp in (0.0, 4000.0, 20000.0):
+        hpss = StreamingHPSS(CHUNK, RATE)
+        for frame in _powers(_signal(click_amp)):
+            hpss.push(frame)
+        ratios.append(hpss.ratio())
+    assert ratios[0] < 0.2
+    assert ratios[0] < ratios[1] < ratios[2]
+
+    assert StreamingHPSS(CHUNK, RATE).ratio() == 1.0
@@ -0,0 +1,66 @@
+"""Unit tests for audio-to-light latency measurement and compensation."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, List, Tuple
+
+import pytest
+
+from parquette.lights.audio_analysis.latency import LatencyCompensation
+from parquette.lights.category import Category
+from parquette.lights.generators import BPMGenerator
+from parquette.lights.osc import OSCManager
+from parquette.lights.util.session_store import SessionStore
+
+_test_osc = OSCManager()
+TEST_CAT = Category("test", _test_osc, SessionStore("/tmp/test_session.pickle"))
+
+
+def _bpm() -> BPMGenerator:
+    bpm = BPMGenerator(name="bpm", category=TEST_CAT, bpm=120, duty=100)
+    bpm.rms_valid = True
+    bpm.bpm_valid = True
+    return bpm
+
+
+def test_measures_from_capture_time(monkeypatch: pytest.MonkeyPatch) -> None:
+    osc = OSCManager()
+    sent: List[Tuple[str, Any]] = []
+    monkeypatch.setattr(osc, "send_osc", lambda addr, args: sent.append((addr, args)))
+    latency = LatencyCompensation(osc, output_delay_ms=30.0, report_interval=0.0)
+
+    # Nothing captured yet: nothing to measure
+    latency.output([])
+    assert latency.dmx_ms == 0.0
+
+    now_ms = time.time() * 1000
+    latency.frame(now_ms - 40.0)
+    assert latency.analysis_ms == pytest.approx(40.0, abs=5.0)
+    latency.output([])
+    assert latency.dmx_ms == pytest.approx(40.0, abs=5.0)
+    # Smoothed, not replaced
+    latency.frame(time.time() * 1000 - 140.0)
+    assert 40.0 < latency.analysis_ms < 60.0
+
+    assert sent[-1][0] == "/debug/latency_frame"
+    assert "latency_total: 7" in sent[-1][1][0]
+
+
+def test_compensate_runs_the_beat_ahead() -> None:
+    latency = LatencyCompensation(OSCManager(), output_delay_ms=25.0)
+    bpm = _bpm()
+    latency.output([bpm])
+    assert bpm.lead_ms == 0.0
+    # Beat at 1000 ms, 500 ms period: without a lead the pulse starts on it
+    assert bpm.value(975.0) == 0.0
+    assert bpm.value(1000.0) == 1.0
+
+    latency.mode = "compensate"
+    bpm = _bpm()
+    latency.output([bpm])
+    assert bpm.lead_ms == 25.0
+    # Sent 25 ms early, so it lands on the beat
+    assert bpm.value(975.0) == 1.0
+    assert bpm.value(1074.0) == 1.0
+    assert bpm.value(1076.0) == 0.0
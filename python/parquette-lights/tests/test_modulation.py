@@ -0,0 +1,205 @@
+"""Unit tests for the generator modulation graph."""
+
+from __future__ import annotations
+
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from parquette.lights.category import Category
+from parquette.lights.generators import Generator, ModulationGraph, WaveGenerator
+from parquette.lights.osc import OSCManager
+from parquette.lights.util.session_store import SessionStore
+
+
+class Counter(Generator):
+    """Outputs amp + offset and counts how often it was evaluated."""
+
+    STANDARD_ATTRS = ["amp", "period"]
+
+    def __init__(self, name: str, category: Category, amp: float = 0.0) -> None:
+        super().__init__(name=name, category=category, amp=amp, offset=0.0)
+        self.calls = 0
+
+    def value(self, millis: float) -> float:
+        self.calls += 1
+        return self.amp + self.offset
+
+
+class Blocking(Counter):
+    """A Counter whose value() waits for `release`, holding a tick open."""
+
+    def __init__(self, name: str, category: Category, amp: float = 0.0) -> None:
+        super().__init__(name, category, amp=amp)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def value(self, millis: float) -> float:
+        self.entered.set()
+        self.release.wait(5)
+        return super().value(millis)
+
+
+@pytest.fixture(name="category")
+def fixture_category(tmp_path: Path) -> Category:
+    return Category("test", OSCManager(), SessionStore(str(tmp_path / "s")))
+
+
+def _gens(category: Category, *names: str) -> List[Counter]:
+    return [Counter(name, category) for name in names]
+
+
+def test_modulators_evaluate_before_their_targets(category: Category) -> None:
+    c, b, a = _gens(category, "c", "b", "a")
+    graph = ModulationGraph([c, b, a])
+    graph.connect(a, b, "amp", 1.0)
+    graph.connect(b, c, "amp", 2.0)
+    assert graph.order() == [a, b, c]
+
+    a.amp = 3.0
+    graph.set_sinks({c})
+    graph.tick(0)
+    # a = 3, b = 0 + 1 * 3, c = 0 + 2 * 3, all in the same tick
+    assert graph.outputs[c] == 6.0
+
+
+def test_cycles_are_rejected_and_leave_the_graph_unchanged(
+    category: Category,
+) -> None:
+    a, b, c = _gens(category, "a", "b", "c")
+    graph = ModulationGraph([a, b, c])
+    graph.connect(a, b, "amp", 1.0)
+    graph.connect(b, c, "period", 1.0)
+    with pytest.raises(ValueError, match="cycle"):
+        graph.connect(c, a, "amp", 1.0)
+    with pytest.raises(ValueError, match="cycle"):
+        graph.connect(a, a, "period", 1.0)
+    assert set(graph.routes) == {(a, b, "amp"), (b, c, "period")}
+
+    with pytest.raises(ValueError):
+        graph.connect(a, b, "shape", 1.0)
+
+
+def test_each_generator_computes_once_per_tick(category: Category) -> None:
+    source, target, idle = _gens(category, "source", "target", "idle")
+    graph = ModulationGraph([source, target, idle])
+    graph.connect(source, target, "amp", 1.0)
+    graph.set_sinks({source, target})
+    for ts in range(10):
+        graph.tick(ts)
+    assert (source.calls, target.calls, idle.calls) == (10, 10, 0)
+
+
+def test_outside_writes_become_the_base(category: Category) -> None:
+    source, target = _gens(category, "source", "target")
+    graph = ModulationGraph([source, target])
+    graph.set_sinks({target})
+    source.amp = 1.0
+    target.amp = 0.5
+    graph.connect(source, target, "amp", 0.25)
+
+    graph.tick(0)
+    assert target.amp == 0.75
+    graph.tick(1)
+    assert target.amp == 0.75
+
+    # e.g. a UI slider
+    target.amp = 0.1
+    graph.tick(2)
+    assert target.amp == pytest.approx(0.35)
+
+    graph.connect(source, target, "amp", 0)
+    assert target.amp == pytest.approx(0.1)
+
+
+def test_presets_round_trip_the_base_under_an_active_route(
+    category: Category, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    osc = OSCManager()
+    monkeypatch.setattr(osc, "send_osc", lambda *_args: None)
+    source = Counter("source", category, amp=1.0)
+    target = Counter("target", category, amp=0.5)
+    params = {p.addr: p for p in target.standard_params(osc)}
+    amp = params["/gen/Counter/target/amp"]
+    graph = ModulationGraph([source, target])
+    graph.set_sinks({target})
+    graph.connect(source, target, "amp", 0.25)
+    graph.tick(0)
+    assert target.amp == 0.75
+
+    # save while modulated, then reload: the route must not stack
+    saved = [(addr, p.value_lambda()) for addr, p in params.items()]
+    assert dict(saved)[amp.addr] == 0.5
+    for _ in range(3):
+        for addr, value in saved:
+            params[addr].load(addr, value)
+            assert params[addr].value_lambda() == value
+        graph.tick(1)
+    assert target.amp == 0.75
+
+    # a write is read back as written, before the next tick rebases
+    amp.load(amp.addr, 0.2)
+    assert amp.value_lambda() == 0.2
+    graph.tick(2)
+    assert (target.amp, amp.value_lambda()) == (pytest.approx(0.45), 0.2)
+
+    graph.connect(source, target, "amp", 0)
+    assert target.modulation_slots == {}
+    assert target.amp == pytest.approx(0.2)
+
+
+def test_removing_a_route_mid_tick_restores_the_base(category: Category) -> None:
+    source = Blocking("source", category, amp=1.5)
+    target = Counter("target", category, amp=1.0)
+    graph = ModulationGraph([source, target])
+    graph.set_sinks({target})
+    graph.connect(source, target, "amp", 10.0)
+
+    ticking = threading.Thread(target=graph.tick, args=(0,))
+    ticking.start()
+    assert source.entered.wait(5)
+    removing = threading.Thread(target=graph.disconnect, args=(source, target, "amp"))
+    removing.start()
+    removing.join(0.05)
+    # the tick in progress finishes before the route goes
+    assert removing.is_alive()
+    source.release.set()
+    ticking.join(5)
+    removing.join(5)
+
+    assert target.modulation_slots == {}
+    assert target.amp == 1.0
+    assert target.unmodulated("amp") == 1.0
+
+
+def test_modulated_period_is_clamped(category: Category) -> None:
+    source = Counter("source", category, amp=-1.0)
+    wave = WaveGenerator(name="wave", category=category, period=500)
+    graph = ModulationGraph([source, wave])
+    graph.connect(source, wave, "period", 10_000)
+    graph.set_sinks({wave})
+    graph.tick(0)
+    assert wave.period == 1.0
+
+
+def test_steady_state_tick_does_not_allocate(category: Category) -> None:
+    gens = _gens(category, "a", "b", "c", "d")
+    graph = ModulationGraph(gens)
+    graph.connect(gens[0], gens[1], "amp", 0.5)
+    graph.connect(gens[0], gens[2], "offset", 0.5)
+    graph.connect(gens[1], gens[3], "amp", 0.5)
+    graph.set_sinks({gens[2], gens[3]})
+    graph.tick(0)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for ts in range(1000):
+            graph.tick(ts)
+        grown = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert grown < 1024
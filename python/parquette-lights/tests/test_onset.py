@@ -0,0 +1,91 @@
+"""Unit tests for the streaming onset detector."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from parquette.lights.audio_analysis.onset import OnsetDetector
+from parquette.lights.audio_analysis.spectral import SpectralFrontEnd
+
+RATE = 22050
+CHUNK = 512
+SECS = 6.0
+KICKS = np.arange(0.2, SECS - 0.2, 60 / 124)
+
+
+def _kick() -> np.ndarray:
+    t = np.arange(int(0.15 * RATE)) / RATE
+    sweep = 2 * np.pi * (50 + 100 * np.exp(-t * 30)) * t
+    return 9000.0 * np.sin(sweep) * np.exp(-t * 20)
+
+
+def _signal(*, kicks: bool, pad: float, noise: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SECS * RATE)) / RATE
+    y = noise * rng.standard_normal(len(t))
+    for freq in (220, 277, 330):
+        y += (
+            pad * np.sin(2 * np.pi * freq * t) * (1 + 0.2 * np.sin(2 * np.pi * 0.3 * t))
+        )
+    if kicks:
+        kick = _kick()
+        for start in KICKS:
+            i = int(start * RATE)
+            y[i : i + len(kick)] += kick
+    return y.astype(np.float32)
+
+
+def _onsets(y: np.ndarray) -> np.ndarray:
+    """Times of the chunk ends the detector fires on."""
+    front_end = SpectralFrontEnd(CHUNK, RATE, CHUNK // 8)
+    detector = OnsetDetector()
+    detector.reset(RATE / CHUNK, front_end.frequencies)
+    fired = []
+    for i in range(len(y) // CHUNK):
+        front_end.forward(y[i * CHUNK : (i + 1) * CHUNK])
+        if detector.push(front_end.mel):
+            fired.append((i + 1) * CHUNK / RATE)
+    assert detector.count == len(fired)
+    return np.array(fired)
+
+
+def test_fires_once_per_kick_within_a_chunk() -> None:
+    fired = _onsets(_signal(kicks=True, pad=3000.0, noise=100.0))
+    # Each kick is seen by the chunk it starts in or the next
+    late = [fired[(fired >= k) & (fired < k + 2 * CHUNK / RATE)] for k in KICKS]
+    caught = sum(len(f) == 1 for f in late)
+    assert caught >= len(KICKS) - 2
+    assert len(fired) - caught <= 1
+
+
+def test_quiet_on_steady_material() -> None:
+    assert len(_onsets(_signal(kicks=False, pad=3000.0, noise=100.0))) == 0
+    assert len(_onsets(np.zeros(int(SECS * RATE), dtype=np.float32))) == 0
+
+
+def _mel(*db: float) -> np.ndarray:
+    return 10.0 ** (np.array(db) / 10.0)
+
+
+def test_threshold_follows_the_recent_flux() -> None:
+    detector = OnsetDetector(sensitivity=2.0, min_strength=1.0, history_secs=1.0)
+    detector.reset(10.0, np.array([100.0, 1000.0]))
+    detector.push(_mel(0.0, 0.0))
+    assert detector.push(_mel(5.0, 0.0))
+    # Held off for min_interval_secs, then steady flux raises the bar
+    # until the same rise no longer counts
+    fired = [detector.push(_mel(5.0 * (i % 2), 0.0)) for i in range(10)]
+    assert not fired[-1]
+    assert detector.threshold() > 5.0
+    assert detector.push(_mel(30.0, 0.0))
+    assert detector.strength == pytest.approx(25.0)
+
+    # Only bands below max_hz count, and nothing under range_db below the
+    # loudest band
+    detector.push(_mel(0.0, 50.0))
+    assert detector.strength == 0.0
+    detector.range_db = 20.0
+    detector.push(_mel(-80.0, 80.0))
+    detector.push(_mel(-40.0, 80.0))
+    assert detector.strength == 0.0
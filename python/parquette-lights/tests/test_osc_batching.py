@@ -0,0 +1,159 @@
+"""Unit tests for OSCManager outbound batching.
+
+A fake UDP client records what would have gone on the wire so we can check
+bundle packing, MTU splitting and per-address dedup without a socket.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List, Tuple, Union
+
+from pythonosc.osc_bundle import OscBundle
+from pythonosc.osc_message import OscMessage
+
+from parquette.lights import osc as osc_mod
+from parquette.lights.osc import OSCManager, OSCParam
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.datagrams: List[Union[OscMessage, OscBundle]] = []
+
+    def send(self, content: Union[OscMessage, OscBundle]) -> None:
+        self.datagrams.append(content)
+
+    def send_message(self, address: str, value: Any) -> None:
+        self.send(OSCManager.build_message(address, value))
+
+
+def _messages(content: Union[OscMessage, OscBundle]) -> List[Tuple[str, List]]:
+    if isinstance(content, OscMessage):
+        return [(content.address, list(content.params))]
+    result: List[Tuple[str, List]] = []
+    for item in content:
+        result.extend(_messages(item))
+    return result
+
+
+def _all_messages(client: FakeClient) -> List[Tuple[str, List]]:
+    result: List[Tuple[str, List]] = []
+    for content in client.datagrams:
+        result.extend(_messages(content))
+    return result
+
+
+def _batching_osc() -> Tuple[OSCManager, FakeClient]:
+    osc = OSCManager()
+    client = FakeClient()
+    osc.client = client  # type: ignore[assignment]
+    osc.set_batching(True)
+    return osc, client
+
+
+def test_unbatched_sends_immediately() -> None:
+    osc = OSCManager()
+    client = FakeClient()
+    osc.client = client  # type: ignore[assignment]
+
+    osc.send_osc("/a", 1)
+    osc.send_osc("/a", 1)
+    assert len(client.datagrams) == 2
+
+
+def test_batched_messages_wait_for_flush() -> None:
+    osc, client = _batching_osc()
+    osc.send_osc("/a", 1)
+    osc.send_osc("/b", [2.0, 3.0])
+    assert not client.datagrams
+
+    osc.flush()
+    assert len(client.datagrams) == 1
+    assert isinstance(client.datagrams[0], OscBundle)
+    assert _all_messages(client) == [("/a", [1]), ("/b", [2.0, 3.0])]
+
+
+def test_single_message_is_sent_bare() -> None:
+    osc, client = _batching_osc()
+    osc.send_osc("/a", "x")
+    osc.flush()
+    assert len(client.datagrams) == 1
+    assert isinstance(client.datagrams[0], OscMessage)
+
+
+def test_bundles_respect_mtu() -> None:
+    osc, client = _batching_osc()
+    for i in range(200):
+        osc.send_osc("/visualizer/fixture/{}/dimming".format(i), float(i))
+    osc.flush()
+
+    assert len(client.datagrams) > 1
+    for content in client.datagrams:
+        assert content.size <= osc_mod.OSC_BUNDLE_MAX_BYTES
+    assert len(_all_messages(client)) == 200
+
+
+def test_oversize_message_still_sent() -> None:
+    osc, client = _batching_osc()
+    osc.send_osc("/small", 1)
+    osc.send_osc("/big", [0.5] * 1000)
+    osc.flush()
+    assert [m[0] for m in _all_messages(client)] == ["/small", "/big"]
+
+
+def test_unchanged_values_are_deduped() -> None:
+    osc, client = _batching_osc()
+    osc.send_osc("/a", 1)
+    osc.flush()
+    osc.send_osc("/a", 1)
+    osc.send_osc("/b", 2)
+    osc.flush()
+    assert _all_messages(client) == [("/a", [1]), ("/b", [2])]
+
+
+def test_multiplexed_address_not_coalesced() -> None:
+    osc, client = _batching_osc()
+    osc.send_osc("/patch", ["gen_1", "ch_1", 1])
+    osc.send_osc("/patch", ["gen_2", "ch_1", 0])
+    osc.flush()
+    assert len(_all_messages(client)) == 2
+
+
+def test_payload_snapshotted_at_send() -> None:
+    osc, client = _batching_osc()
+    history = [0.0, 1.0]
+    osc.send_osc("/hist", history)
+    osc.flush()
+    history.append(2.0)
+    osc.send_osc("/hist", history)
+    osc.flush()
+    assert _all_messages(client) == [("/hist", [0.0, 1.0]), ("/hist", [0.0, 1.0, 2.0])]
+
+
+def test_forget_sent_forces_resend() -> None:
+    osc, client = _batching_osc()
+    osc.send_osc("/a", 1)
+    osc.flush()
+    osc.forget_sent()
+    osc.send_osc("/a", 1)
+    osc.flush()
+    assert len(_all_messages(client)) == 2
+
+
+def test_inbound_invalidates_address() -> None:
+    osc, client = _batching_osc()
+
+    class Target:
+        level = 0.5
+
+    target = Target()
+    param = OSCParam.bind(osc, "/level", target, "level")
+    param.sync()
+    osc.flush()
+
+    # the UI moves the fader, then a preset load puts it back
+    inbound = OSCManager.build_message("/level", 0.8)
+    osc.dispatcher.call_handlers_for_packet(inbound.dgram, ("127.0.0.1", 5006))
+    param.load("/level", 0.5)
+    osc.flush()
+
+    assert _all_messages(client) == [("/level", [0.5]), ("/level", [0.5])]
@@ -0,0 +1,90 @@
+"""The exact-match dispatch table must yield the same handlers, in the same
+order, as pythonosc's pattern-matching Dispatcher."""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+from pythonosc.dispatcher import Dispatcher
+
+from parquette.lights.osc import ExactMatchDispatcher
+
+REGISTRATIONS = [
+    "/gen/BPMGenerator/bpm_red/lpf_alpha",
+    "/preset/selector/*",
+    "/chan/reds/stutter_period",
+    "/gen/BPMGenerator/bpm_red/lpf_alpha",
+    "/chan/reds/stutter_period",
+    "/scene/*",
+    "/scene/create",
+    "/heartbeat",
+]
+
+INCOMING = [
+    "/gen/BPMGenerator/bpm_red/lpf_alpha",
+    "/chan/reds/stutter_period",
+    "/preset/selector/reds",
+    "/scene/create",
+    "/scene/Opening",
+    "/heartbeat",
+    "/not/mapped",
+    "/preset/selector/*",
+    "/gen/BPMGenerator/*/lpf_alpha",
+    "/scene/{create,Opening}",
+]
+
+
+def _noop(*_args: Any) -> None:
+    pass
+
+
+def _mapped(dispatcher: Dispatcher) -> List[Any]:
+    handlers = []
+    for i, addr in enumerate(REGISTRATIONS):
+        handlers.append(dispatcher.map(addr, _noop, i))
+    return handlers
+
+
+def _ids(dispatcher: Dispatcher, addr: str) -> List[Any]:
+    return [h.args[0] for h in dispatcher.handlers_for_address(addr)]
+
+
+def test_matches_pythonosc() -> None:
+    reference = Dispatcher()
+    fast = ExactMatchDispatcher()
+    _mapped(reference)
+    _mapped(fast)
+    for addr in INCOMING:
+        assert _ids(fast, addr) == _ids(reference, addr), addr
+        # second lookup comes from the cache
+        assert _ids(fast, addr) == _ids(reference, addr), addr
+
+
+def test_catch_all_debug_handler() -> None:
+    reference = Dispatcher()
+    fast = ExactMatchDispatcher()
+    for dispatcher in (reference, fast):
+        _mapped(dispatcher)
+        dispatcher.map("*", _noop, "debug")
+    for addr in INCOMING:
+        assert _ids(fast, addr) == _ids(reference, addr), addr
+
+
+def test_map_and_unmap_invalidate() -> None:
+    fast = ExactMatchDispatcher()
+    handlers = _mapped(fast)
+    assert _ids(fast, "/heartbeat") == [7]
+
+    fast.map("/heartbeat", _noop, "late")
+    assert _ids(fast, "/heartbeat") == [7, "late"]
+
+    fast.unmap("/heartbeat", handlers[7])
+    assert _ids(fast, "/heartbeat") == ["late"]
+
+
+def test_default_handler() -> None:
+    fast = ExactMatchDispatcher()
+    _mapped(fast)
+    fast.set_default_handler(_noop)
+    assert len(list(fast.handlers_for_address("/not/mapped"))) == 1
+    assert _ids(fast, "/heartbeat") == [7]
@@ -0,0 +1,171 @@
+"""Unit tests for ParamFader crossfades driven through OSCManager.transaction."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from parquette.lights.category import Category
+from parquette.lights.dmx import DMXManager
+from parquette.lights.fixtures import YRXY200Spot
+from parquette.lights.osc import OSCManager, OSCParam
+from parquette.lights.util.session_store import SessionStore
+
+
+class Target:
+    def __init__(self) -> None:
+        self.level = 0.0
+        self.color = [0.0, 0.0, 0.0]
+        self.mode = "a"
+
+
+@pytest.fixture(name="osc")
+def fixture_osc(monkeypatch: pytest.MonkeyPatch) -> OSCManager:
+    osc = OSCManager()
+    monkeypatch.setattr(osc, "send_osc", lambda *_args: None)
+    return osc
+
+
+def _fade(osc: OSCManager, *loads: Any, switch_at: float = 0.0) -> None:
+    with osc.transaction(fade=1.0, switch_at=switch_at) as transaction:
+        for param, value in loads:
+            if isinstance(value, list):
+                transaction.load(param, param.addr, *value)
+            else:
+                transaction.load(param, param.addr, value)
+
+
+def _begin(osc: OSCManager) -> float:
+    """Start time of the running fades, to tick them deterministically."""
+    # pylint: disable-next=protected-access
+    return next(iter(osc.fader._fades.values())).start_time
+
+
+def test_numeric_params_interpolate(osc: OSCManager) -> None:
+    target = Target()
+    level = OSCParam.bind(osc, "/t/level", target, "level")
+    color = OSCParam.bind(osc, "/t/color", target, "color")
+
+    _fade(osc, (level, 10.0), (color, [255.0, 0.0, 100.0]))
+    assert target.level == 0.0
+
+    begin = _begin(osc)
+    osc.fader.tick(begin + 0.5)
+    assert target.level == pytest.approx(5.0)
+    assert target.color == pytest.approx([127.5, 0.0, 50.0])
+
+    osc.fader.tick(begin + 1.5)
+    assert target.level == 10.0
+    assert target.color == [255.0, 0.0, 100.0]
+    assert len(osc.fader) == 0
+
+
+def test_non_numeric_switches_at_point(osc: OSCManager) -> None:
+    target = Target()
+    mode = OSCParam.bind(osc, "/t/mode", target, "mode")
+    level = OSCParam.bind(osc, "/t/level", target, "level")
+
+    _fade(osc, (mode, "b"), (level, 1.0), switch_at=0.5)
+    begin = _begin(osc)
+
+    osc.fader.tick(begin + 0.4)
+    assert target.mode == "a"
+    osc.fader.tick(begin + 0.6)
+    assert target.mode == "b"
+
+
+def test_non_numeric_switch_at_zero_is_immediate(osc: OSCManager) -> None:
+    target = Target()
+    mode = OSCParam.bind(osc, "/t/mode", target, "mode")
+    _fade(osc, (mode, "b"))
+    assert target.mode == "b"
+    assert len(osc.fader) == 0
+
+
+def test_hooks_run_once_when_fade_lands(osc: OSCManager) -> None:
+    target = Target()
+    calls: List[str] = []
+    level = OSCParam.bind(
+        osc, "/t/level", target, "level", on_change=lambda: calls.append("x")
+    )
+
+    _fade(osc, (level, 4.0))
+    begin = _begin(osc)
+    osc.fader.tick(begin + 0.5)
+    assert not calls
+    osc.fader.tick(begin + 1.0)
+    osc.fader.tick(begin + 2.0)
+    assert calls == ["x"]
+
+
+def test_live_write_cancels_fade(osc: OSCManager) -> None:
+    target = Target()
+    level = OSCParam.bind(osc, "/t/level", target, "level")
+
+    _fade(osc, (level, 10.0))
+    begin = _begin(osc)
+    osc.fader.tick(begin + 0.5)
+
+    level.dispatch_lambda(level.addr, 2.0)
+    osc.fader.tick(begin + 1.5)
+    assert target.level == 2.0
+
+
+def test_new_fade_restarts_from_current_value(osc: OSCManager) -> None:
+    target = Target()
+    level = OSCParam.bind(osc, "/t/level", target, "level")
+
+    _fade(osc, (level, 10.0))
+    begin = _begin(osc)
+    osc.fader.tick(begin + 0.5)
+
+    _fade(osc, (level, 0.0))
+    osc.fader.tick(_begin(osc) + 0.5)
+    assert target.level == pytest.approx(2.5)
+
+
+def test_int_params_switch(osc: OSCManager) -> None:
+    target = Target()
+    target.level = 0
+    level = OSCParam.bind(osc, "/t/level", target, "level")
+    _fade(osc, (level, 4), switch_at=0.5)
+    # pylint: disable-next=protected-access
+    begin = next(iter(osc.fader._switches.values()))[0] - 0.5
+    osc.fader.tick(begin + 0.25)
+    assert target.level == 0
+    osc.fader.tick(begin + 0.6)
+    assert target.level == 4
+
+
+def test_wheel_index_never_passes_intermediate_slots(
+    osc: OSCManager, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    session = SessionStore(str(tmp_path / "session.pickle"))
+    spot = YRXY200Spot(
+        name="spot_1",
+        category=Category("spots_light", osc, session),
+        position_category=Category("spots_position", osc, session),
+        dmx=DMXManager(osc, art_net_ip="127.0.0.1"),
+        addr=1,
+    )
+    written: List[int] = []
+    color = spot.color
+
+    def record(index: int) -> None:
+        written.append(index)
+        color(index)
+
+    monkeypatch.setattr(spot, "color", record)
+    params = {p.addr: p for p in spot.standard_params(osc)}
+    index = params["/fixture/YRXY200Spot/spot_1/color_index"]
+
+    # A float from the front end still steps: the param is discrete
+    _fade(osc, (index, 5.0), switch_at=0.5)
+    # pylint: disable-next=protected-access
+    when = next(iter(osc.fader._switches.values()))[0]
+    for dt in (-0.4, -0.3, -0.2, -0.1, 0.0, 0.1, 0.5):
+        osc.fader.tick(when + dt)
+    assert written == [5]
+    assert spot.color_index == 5
@@ -0,0 +1,162 @@
+"""Unit tests for ParamTransaction: staged param writes applied together."""
+
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from parquette.lights.osc import OSCManager, OSCParam
+
+
+class Target:
+    def __init__(self) -> None:
+        self.a = 0.0
+        self.b = 0.0
+
+
+@pytest.fixture(name="osc")
+def fixture_osc() -> OSCManager:
+    return OSCManager()
+
+
+def _params(osc: OSCManager, target: Target, calls: List[str]) -> List[OSCParam]:
+    def changed() -> None:
+        calls.append("on_change")
+
+    return [
+        OSCParam.bind(osc, "/t/a", target, "a", on_change=changed),
+        OSCParam.bind(osc, "/t/b", target, "b", on_change=changed),
+    ]
+
+
+def test_on_change_and_commit_run_once(osc: OSCManager) -> None:
+    target = Target()
+    calls: List[str] = []
+    a, b = _params(osc, target, calls)
+
+    with osc.transaction() as transaction:
+        transaction.load(a, a.addr, 1.0)
+        transaction.load(b, b.addr, 2.0)
+        transaction.on_commit(lambda: calls.append("sync"))
+        assert target.a == 0.0
+
+    assert (target.a, target.b) == (1.0, 2.0)
+    assert calls == ["on_change", "sync"]
+
+
+def test_last_write_wins(osc: OSCManager) -> None:
+    target = Target()
+    writes: List[float] = []
+    param = OSCParam(
+        osc,
+        "/t/a",
+        lambda: target.a,
+        lambda _addr, value: writes.append(value),
+    )
+
+    with osc.transaction() as transaction:
+        transaction.load(param, param.addr, 0.0)
+        transaction.load(param, param.addr, 0.5)
+
+    assert writes == [0.5]
+
+
+def test_nested_transactions_join(osc: OSCManager) -> None:
+    target = Target()
+    calls: List[str] = []
+    a, b = _params(osc, target, calls)
+
+    def sync() -> None:
+        calls.append("sync")
+
+    with osc.transaction() as outer:
+        with osc.transaction() as inner:
+            assert inner is outer
+            inner.load(a, a.addr, 1.0)
+            inner.on_commit(sync)
+        assert target.a == 0.0
+        outer.load(b, b.addr, 2.0)
+        outer.on_commit(sync)
+
+    assert (target.a, target.b) == (1.0, 2.0)
+    assert calls == ["on_change", "sync"]
+
+
+def test_deferred_apply_waits_for_tick(osc: OSCManager) -> None:
+    target = Target()
+    a, _b = _params(osc, target, [])
+    osc.set_deferred_apply(True)
+
+    with osc.transaction() as transaction:
+        transaction.load(a, a.addr, 1.0)
+
+    assert target.a == 0.0
+    osc.apply_pending()
+    assert target.a == 1.0
+
+
+def test_nothing_applied_when_block_raises(osc: OSCManager) -> None:
+    target = Target()
+    a, _b = _params(osc, target, [])
+
+    with pytest.raises(RuntimeError):
+        with osc.transaction() as transaction:
+            transaction.load(a, a.addr, 1.0)
+            raise RuntimeError("bad preset")
+
+    osc.apply_pending()
+    assert target.a == 0.0
+
+    # the failed transaction does not leak into the next one
+    with osc.transaction() as transaction:
+        assert len(transaction._ops) == 0  # pylint: disable=protected-access
+
+
+def test_only_changed_params_are_written_and_synced(
+    osc: OSCManager, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    target = Target()
+    calls: List[str] = []
+    a, b = _params(osc, target, calls)
+    sent: List[str] = []
+    monkeypatch.setattr(osc, "send_osc", lambda addr, *_args: sent.append(addr))
+
+    with osc.transaction() as transaction:
+        transaction.load(a, a.addr, 0.0)
+        transaction.load(b, b.addr, 2.0)
+
+    assert transaction.changed == [b]
+    assert sent == ["/t/b"]
+    assert calls == ["on_change"]
+
+    with osc.transaction() as transaction:
+        transaction.load(a, a.addr, 0.0)
+        transaction.load(b, b.addr, 2.0)
+
+    assert not transaction.changed
+    assert sent == ["/t/b"]
+    assert calls == ["on_change"]
+
+
+def test_bad_value_skips_only_its_param(osc: OSCManager) -> None:
+    target = Target()
+    calls: List[str] = []
+    _, b = _params(osc, target, calls)
+    a = OSCParam(
+        osc,
+        "/t/float_a",
+        lambda: target.a,
+        lambda _addr, value: setattr(target, "a", float(value)),
+    )
+    osc.set_deferred_apply(True)
+
+    with osc.transaction() as transaction:
+        transaction.load(a, a.addr, "abc")
+        transaction.load(b, b.addr, 2.0)
+        transaction.on_commit(lambda: calls.append("sync"))
+    # Runs on the compute thread: must not raise
+    osc.apply_pending()
+
+    assert (target.a, target.b) == (0.0, 2.0)
+    assert calls == ["on_change", "sync"]
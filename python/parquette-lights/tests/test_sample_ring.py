@@ -0,0 +1,56 @@
+"""Unit tests for the audio capture ring buffer."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from parquette.lights.audio_analysis.ring_buffer import SampleRing
+
+
+def _chunk(i: int, size: int = 4) -> np.ndarray:
+    return np.arange(i * size, (i + 1) * size, dtype=np.int16)
+
+
+def test_latest_chunks_are_contiguous_across_the_wrap() -> None:
+    ring = SampleRing(4, 5)
+    for i in range(13):
+        ring.write(_chunk(i), float(i))
+
+    window = ring.samples(3)
+    assert window.tolist() == list(range(40, 52))
+    assert window.dtype == np.float32
+    # a view into the ring, not a copy
+    assert window.base is not None
+    assert ring.timestamps(3).tolist() == [10.0, 11.0, 12.0]
+    assert ring.samples(5).tolist() == list(range(32, 52))
+    assert len(ring) == 5
+
+
+def test_snapshot_reads_stay_put_and_report_overwrites() -> None:
+    ring = SampleRing(4, 5)
+    for i in range(6):
+        ring.write(_chunk(i), float(i))
+    end = ring.chunks
+    view = ring.samples(2, end)
+    assert view.tolist() == list(range(16, 24))
+
+    ring.write(_chunk(6), 6.0)
+    ring.write(_chunk(7), 7.0)
+    assert ring.intact(end, 2)
+    assert view.tolist() == list(range(16, 24))
+    assert ring.samples(2, end).tolist() == list(range(16, 24))
+
+    ring.write(_chunk(8), 8.0)
+    assert not ring.intact(end, 2)
+
+
+def test_rejects_partial_chunks_and_oversized_reads() -> None:
+    ring = SampleRing(4, 5)
+    with pytest.raises(ValueError):
+        ring.write(np.zeros(3), 0.0)
+    with pytest.raises(ValueError):
+        ring.samples(6)
+    # not yet written slots read as silence
+    assert ring.samples(2).tolist() == [0.0] * 8
+    assert len(ring) == 0
@@ -0,0 +1,196 @@
+"""Unit tests for the delay mappers (StutterMapper, SpatialMapper) and the
+spatial fields."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+from parquette.lights.category import Category
+from parquette.lights.fixtures.basics import MixTarget
+from parquette.lights.generators.chanmap import (
+    MixChannel,
+    SpatialMapper,
+    StutterMapper,
+    delay_curve,
+)
+from parquette.lights.generators.spatial import (
+    PlaneSweep,
+    RadialRipple,
+    RotatingBeam,
+)
+from parquette.lights.osc import OSCManager
+from parquette.lights.util.session_store import SessionStore
+
+REDS: Dict[str, Tuple[float, float, float]] = {
+    "front_1": (-1.0, 0.0, 2.5),
+    "front_2": (1.0, 0.0, 2.5),
+    "left_1": (-3.0, 1.0, 2.5),
+    "right_1": (3.0, 1.0, 2.5),
+    "left_2": (-3.0, 2.0, 2.5),
+    "right_2": (3.0, 2.0, 2.5),
+}
+
+# one stutter step per tick
+TICK = 20
+
+
+class Channel:
+    """Just the history a mapper reads; 0 is now, 1 is a tick ago, ..."""
+
+    def __init__(self, history: List[float]) -> None:
+        self.history = np.array(history, dtype=np.float64)
+
+    def values(self, timeslices: np.ndarray) -> np.ndarray:
+        return self.history[timeslices]
+
+
+@pytest.fixture(name="targets")
+def fixture_targets(tmp_path: Path) -> Dict[str, MixTarget]:
+    category = Category("reds", OSCManager(), SessionStore(str(tmp_path / "s")))
+    return {name: MixTarget(lambda _v: None, name, category) for name in REDS}
+
+
+def _levels(targets: Dict[str, MixTarget]) -> Dict[str, float]:
+    return {name: t.accumulator for name, t in targets.items()}
+
+
+def _reset(targets: Dict[str, MixTarget]) -> None:
+    for t in targets.values():
+        t(0)
+
+
+def test_plane_sweep_matches_front_to_back_stutter(
+    targets: Dict[str, MixTarget],
+) -> None:
+    spatial = SpatialMapper(
+        list(targets.values()), list(REDS.values()), PlaneSweep((0.0, 1.0, 0.0))
+    )
+    stutter = StutterMapper(
+        [
+            [targets["front_1"], targets["front_2"]],
+            [targets["left_1"], targets["right_1"]],
+            [targets["left_2"], targets["right_2"]],
+        ]
+    )
+    assert spatial.required_history_ticks() == stutter.required_history_ticks()
+
+    channel = Channel([float(i * 3) for i in range(spatial.required_history_ticks())])
+    for period in (0, 100, 500, 2000):
+        spatial.stutter_period = stutter.stutter_period = period
+        _reset(targets)
+        stutter.map_output(0, channel)  # type: ignore[arg-type]
+        want = _levels(targets)
+        _reset(targets)
+        spatial.map_output(0, channel)  # type: ignore[arg-type]
+        assert _levels(targets) == want
+
+
+def test_radial_ripple_fires_the_centre_first() -> None:
+    positions = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, -3.0, 0.0)]
+    delay, gain = RadialRipple(centre=(0.0, 0.0, 0.0), falloff=1.0).evaluate(
+        np.array(positions)
+    )
+    assert delay.tolist() == pytest.approx([0.0, 1.0, 3.0])
+    assert gain.tolist() == pytest.approx([1.0, 2.0 / 3.0, 0.0])
+
+
+def test_rotating_beam_delays_by_azimuth() -> None:
+    # front, right, back, left of the centre; the turn starts at the front
+    positions = np.array(
+        [(0.0, -1.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (-1.0, 0.0, 0.0)]
+    )
+    delay, _gain = RotatingBeam(revolution=4.0).evaluate(positions)
+    assert delay.tolist() == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+    delay, _gain = RotatingBeam(revolution=4.0, clockwise=True).evaluate(positions)
+    assert delay.tolist() == pytest.approx([0.0, 3.0, 2.0, 1.0])
+
+
+def test_gain_scales_the_delayed_value(targets: Dict[str, MixTarget]) -> None:
+    mapper = SpatialMapper(
+        list(targets.values()),
+        list(REDS.values()),
+        RadialRipple(centre=(0.0, 0.0, 2.5), falloff=1.0),
+        stutter_period=0,
+    )
+    mapper.map_output(0, Channel([200.0]))  # type: ignore[arg-type]
+    levels = _levels(targets)
+    assert levels["front_1"] > levels["right_2"]
+    assert max(levels.values()) <= 200
+
+
+@pytest.mark.parametrize("shape", ["linear", "exponential", "random", "mirrored"])
+def test_delay_curves_stay_within_the_linear_span(shape: str) -> None:
+    delays = delay_curve(5, shape)
+    assert len(delays) == 5
+    assert delays.min() == 0.0
+    assert delays.max() <= 4.0
+
+
+def test_delay_curve_shapes() -> None:
+    assert delay_curve(5, "linear").tolist() == [0, 1, 2, 3, 4]
+    assert delay_curve(5, "mirrored").tolist() == [0, 1, 2, 1, 0]
+    assert sorted(delay_curve(5, "random").tolist()) == [0, 1, 2, 3, 4]
+    assert delay_curve(5, "random").tolist() == delay_curve(5, "random").tolist()
+    steps = np.diff(delay_curve(5, "exponential"))
+    assert (np.diff(steps) > 0).all()
+    assert delay_curve(1, "exponential").tolist() == [0.0]
+    with pytest.raises(ValueError):
+        delay_curve(3, "sideways")
+
+
+def test_stutter_curve_reshapes_the_chase(targets: Dict[str, MixTarget]) -> None:
+    groups = [[targets[name]] for name in REDS]
+    mapper = StutterMapper(groups, stutter_period=TICK)
+    channel = Channel([float(i * 10) for i in range(mapper.required_history_ticks())])
+
+    mapper.map_output(0, channel)  # type: ignore[arg-type]
+    assert list(_levels(targets).values()) == [0, 10, 20, 30, 40, 50]
+
+    mapper.curve = "mirrored"
+    _reset(targets)
+    mapper.map_output(0, channel)  # type: ignore[arg-type]
+    assert list(_levels(targets).values()) == [0, 10, 20, 20, 10, 0]
+
+    mapper.curve = "sideways"
+    assert mapper.curve == "mirrored"
+
+
+def test_stutter_history_covers_a_later_linear_curve(
+    targets: Dict[str, MixTarget],
+) -> None:
+    groups = [[targets[name]] for name in REDS]
+    linear = StutterMapper(groups)
+    mirrored = StutterMapper(groups, curve="mirrored")
+    assert mirrored.required_history_ticks() == linear.required_history_ticks()
+
+    mirrored.stutter_period = TICK * 100
+    mirrored.curve = "linear"
+    size = mirrored.required_history_ticks()
+    channel = Channel([i / 2 for i in range(size)])
+    mirrored.map_output(0, channel)  # type: ignore[arg-type]
+    # the last group reads 5 steps of 2 s back, not clamped to the history
+    assert list(_levels(targets).values())[-1] == 250
+
+
+def test_mix_channel_history_reads_back_in_order(tmp_path: Path) -> None:
+    category = Category("reds", OSCManager(), SessionStore(str(tmp_path / "s")))
+    groups = [[MixTarget(lambda _v: None, name, category)] for name in ("a", "b")]
+    channel = MixChannel("reds_zig", category, 0, mapper=StutterMapper(groups))
+    size = len(channel.history)
+    assert size > 3
+    for i in range(size + 3):
+        channel.offset = i
+        channel.tick(0)
+    newest = size + 2
+    assert channel.value(0) == newest
+    assert channel.value(size - 1) == newest - (size - 1)
+    assert channel.values(np.array([0, 2, 1])).tolist() == [
+        newest,
+        newest - 2,
+        newest - 1,
+    ]
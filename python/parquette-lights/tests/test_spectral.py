@@ -0,0 +1,42 @@
+"""The streaming spectral front end against the librosa calls it replaces."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from librosa import A_weighting, db_to_amplitude, mel_frequencies, stft
+from librosa.feature import melspectrogram
+
+from parquette.lights.audio_analysis.spectral import SpectralFrontEnd
+
+
+@pytest.mark.filterwarnings("ignore:divide by zero:RuntimeWarning")
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_matches_librosa_mel_spectrogram(rate: int) -> None:
+    chunk, n_mels = 512, 64
+    weighting = db_to_amplitude(
+        A_weighting(mel_frequencies(n_mels, fmin=0, fmax=rate / 2))
+    )
+    front_end = SpectralFrontEnd(chunk, rate, n_mels)
+
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        samples = (rng.standard_normal(chunk) * 3000).astype(np.float32)
+        power = np.abs(stft(y=samples, n_fft=chunk, center=False)) ** 2
+        want = (
+            melspectrogram(
+                y=samples, S=power, sr=rate, n_fft=chunk, center=False, n_mels=n_mels
+            )[:, 0]
+            * weighting
+        )
+        got = front_end.forward(samples, scale=0.5)
+        np.testing.assert_allclose(got, want * 0.5, rtol=1e-4, atol=want.max() * 1e-6)
+
+
+@pytest.mark.filterwarnings("ignore:divide by zero:RuntimeWarning")
+def test_reuses_its_output_buffer() -> None:
+    front_end = SpectralFrontEnd(512, 44100, 64)
+    first = front_end.forward(np.ones(512, dtype=np.float32))
+    second = front_end.forward(np.zeros(512, dtype=np.float32))
+    assert first is second
+    assert not second.any()
@@ -0,0 +1,217 @@
+"""Unit tests for spot color swap fades, wheel pre-positioning and
+move-in-dark pan/tilt."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from parquette.lights.category import Category
+from parquette.lights.coord_system_state import CoordSystemState
+from parquette.lights.dmx import DMXManager
+from parquette.lights.envelope import EnvelopeScheduler
+from parquette.lights.fixtures import YRXY200Spot
+from parquette.lights.osc import OSCManager, OSCParam
+from parquette.lights.util.coord_system import PanTiltCoordSystem
+from parquette.lights.util.session_store import SessionStore
+
+
+@pytest.fixture(name="spot")
+def fixture_spot(tmp_path: Path) -> YRXY200Spot:
+    osc = OSCManager()
+    session = SessionStore(str(tmp_path / "session.pickle"))
+    spot = YRXY200Spot(
+        name="spot_1",
+        category=Category("spots_light", osc, session),
+        position_category=Category("spots_position", osc, session),
+        dmx=DMXManager(osc, art_net_ip="127.0.0.1"),
+        addr=1,
+        osc=osc,
+    )
+    spot.envelopes = EnvelopeScheduler()
+    spot.color_swap_fade_time = 0.3
+    spot.color_swap_mechanical_time = 0.0
+    spot.dimming(255)
+    # as if a generator were driving the dimming channel
+    assert spot.dimming_target is not None
+    spot.dimming_target.idle = False
+    return spot
+
+
+def test_color_already_in_place_skips_fade(spot: YRXY200Spot) -> None:
+    spot.color(0)
+    assert not spot.color_swap_envelope.active
+    assert spot.color_swap_fade_multiplier == 1.0
+
+
+def test_lit_color_change_fades(spot: YRXY200Spot) -> None:
+    spot.color(3)
+    assert spot.color_swap_envelope.active
+    assert spot.color_index_value == 0
+
+    spot.color(3)  # repeats don't restart the swap
+    assert spot.envelopes is not None
+    spot.envelopes.tick(time.monotonic() + 0.35)
+    assert spot.color_index_value == 3
+
+
+def test_dark_color_change_skips_fade_out(spot: YRXY200Spot) -> None:
+    spot.dimming(0)
+    spot.color(3)
+    assert spot.color_swap_fade_multiplier == 0.0
+    assert spot.envelopes is not None
+    spot.envelopes.tick()
+    assert spot.color_index_value == 3
+
+
+def test_cued_wheels_move_while_dark(spot: YRXY200Spot) -> None:
+    spot.cue(color=4, pattern=2)
+    spot.post_map_output()
+    assert spot.color_index_value == 0
+    assert spot.pattern_index_value == 0
+
+    spot.dimming(0)
+    spot.post_map_output()
+    assert spot.color_index_value == 4
+    assert spot.pattern_index_value == 2
+
+    spot.dimming(255)
+    spot.color(4)
+    assert not spot.color_swap_envelope.active
+
+
+def test_crossfade_targets_cue_the_wheels(
+    spot: YRXY200Spot, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    assert spot.osc is not None
+    monkeypatch.setattr(spot.osc, "send_osc", lambda *_args: None)
+    color, pattern = spot.standard_params(spot.osc)[:2]
+    now = time.monotonic()
+    spot.osc.fader.start(color, color.addr, (4,), 2.0, switch_at=0.5, now=now)
+    spot.osc.fader.start(pattern, pattern.addr, (2,), 2.0, switch_at=0.5, now=now)
+
+    # dark mid-fade: the wheels go to the slots the fade switches to
+    spot.dimming(0)
+    spot.post_map_output()
+    assert spot.color_index_value == 4
+    assert spot.pattern_index_value == 2
+
+    spot.dimming(255)
+    spot.osc.fader.tick(now + 1.5)
+    assert spot.color_index_value == 4
+    assert not spot.color_swap_envelope.active
+
+
+def test_cued_color_still_settling_is_hidden(spot: YRXY200Spot) -> None:
+    spot.color_swap_mechanical_time = 10.0
+    spot.cue(color=4)
+    spot.dimming(0)
+    spot.post_map_output()
+    assert spot.color_index_value == 4
+
+    spot.color(4)
+    assert spot.color_swap_envelope.active
+    assert spot.color_swap_fade_multiplier == 0.0
+
+
+def test_move_in_dark_dims_through_a_jump(spot: YRXY200Spot) -> None:
+    spot.move_in_dark = True
+    spot.place_head(1000, 1000)
+    spot.place_head(40000, 1000)
+    # the head stays put while the dimming fades out
+    assert (spot.get_pan(), spot.get_tilt()) == (1000, 1000)
+    assert spot.position_envelope.active
+
+    assert spot.envelopes is not None
+    now = time.monotonic()
+    spot.envelopes.tick(now + spot.move_fade_time)
+    assert spot.get_pan() == 40000
+    assert spot.output_level == 0.0
+
+    travel = spot.travel_time(1000, 1000)
+    spot.envelopes.tick(now + spot.move_fade_time + travel + 1.0)
+    assert spot.output_level == 1.0
+
+
+def test_small_moves_are_written_directly(spot: YRXY200Spot) -> None:
+    spot.move_in_dark = True
+    spot.place_head(1000, 1000)
+    spot.place_head(1200, 900)
+    assert (spot.get_pan(), spot.get_tilt()) == (1200, 900)
+    assert not spot.position_envelope.active
+
+
+def test_dark_head_moves_to_cue_ahead_of_time(spot: YRXY200Spot) -> None:
+    spot.move_in_dark = True
+    spot.place_head(1000, 1000)
+    spot.cue_pantilt(50000, 20000)
+
+    spot.dimming(0)
+    spot.place_head(1000, 1000)
+    assert (spot.get_pan(), spot.get_tilt()) == (50000, 20000)
+
+    # lit again at the cued position while it may still be travelling
+    spot.dimming(255)
+    spot.place_head(50000, 20000)
+    assert spot.position_envelope.active
+    assert spot.output_level == 0.0
+
+    spot.position_settle_until = 0.0
+    assert spot.envelopes is not None
+    spot.envelopes.tick(time.monotonic() + 10.0)
+    spot.place_head(50000, 20000)
+    assert spot.output_level == 1.0
+    assert not spot.position_envelope.active
+
+
+def test_dark_head_moves_to_crossfade_target(
+    spot: YRXY200Spot, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    osc = spot.osc
+    assert osc is not None
+    monkeypatch.setattr(osc, "send_osc", lambda *_args: None)
+    spot.coord_state = CoordSystemState(
+        {"pantilt": PanTiltCoordSystem()},
+        osc,
+        SessionStore(str(tmp_path / "coords.pickle")),
+    )
+    channel = SimpleNamespace(offset=[1000.0, 1000.0])
+    spot.pantilt_param = OSCParam.bind(
+        osc, "/chan/spot_1/pantilt/offset", channel, "offset"
+    )
+    spot.move_in_dark = True
+    spot.place_head(1000, 1000)
+
+    osc.fader.start(spot.pantilt_param, spot.pantilt_param.addr, (50000, 20000), 2.0)
+    spot.dimming(0)
+    spot.post_map_output()
+    spot.place_head(1000, 1000)
+    assert (spot.get_pan(), spot.get_tilt()) == (50000, 20000)
+
+
+def test_cue_pantilt_address_takes_mapping_space(
+    spot: YRXY200Spot, tmp_path: Path
+) -> None:
+    assert spot.osc is not None
+    spot.coord_state = CoordSystemState(
+        {"pantilt": PanTiltCoordSystem()},
+        spot.osc,
+        SessionStore(str(tmp_path / "coords.pickle")),
+    )
+    addr = "/fixture/YRXY200Spot/spot_1/cue_pantilt"
+    for handler in spot.osc.dispatcher.handlers_for_address(addr):
+        handler.callback(addr, 30000.0, 9000.0)
+    assert spot.cued_pantilt == (30000, 9000)
+
+
+def test_travel_time_scales_with_movement_speed(spot: YRXY200Spot) -> None:
+    spot.place_head(0, 0)
+    spot.movement_speed(0)
+    fast = spot.travel_time(65535, 0)
+    spot.movement_speed(255)
+    slow = spot.travel_time(65535, 0)
+    assert fast == pytest.approx(spot.PANTILT_FULL_TRAVEL_S)
+    assert slow == pytest.approx(fast * spot.PANTILT_SLOWEST_FACTOR)
@@ -0,0 +1,66 @@
+"""Unit tests for the packed visualizer frame."""
+
+from __future__ import annotations
+
+import pytest
+
+from parquette.lights.visualizer import VisualizerFrame
+
+
+def test_round_trip() -> None:
+    frame = VisualizerFrame()
+    blob = frame.encode(
+        dimming=[0, 127.6, 255],
+        pantilt=[(0, 65535), (1234, 40000)],
+        histories={"synth": [1, 2, 3], "fftgen_2": [200.2]},
+    )
+    decoded = VisualizerFrame.decode(blob)
+    assert decoded["seq"] == 0
+    assert decoded["dimming"] == [0, 128, 255]
+    assert decoded["pantilt"] == [(0, 65535), (1234, 40000)]
+    assert decoded["histories"] == {"synth": [1, 2, 3], "fftgen_2": [200]}
+
+
+def test_values_are_clipped() -> None:
+    blob = VisualizerFrame().encode(dimming=[-5, 300], pantilt=[(-1, 70000)])
+    decoded = VisualizerFrame.decode(blob)
+    assert decoded["dimming"] == [0, 255]
+    assert decoded["pantilt"] == [(0, 65535)]
+
+
+def test_empty_sections_are_omitted() -> None:
+    blob = VisualizerFrame().encode(histories={"synth": []})
+    assert len(blob) == 4
+    assert VisualizerFrame.decode(blob) == {"seq": 0, "histories": {}}
+
+
+def test_history_keeps_newest_samples() -> None:
+    samples = [i % 256 for i in range(300)]
+    decoded = VisualizerFrame.decode(
+        VisualizerFrame().encode(histories={"fftgen_1": samples})
+    )
+    assert decoded["histories"]["fftgen_1"] == samples[-VisualizerFrame.MAX_ITEMS :]
+
+
+def test_sequence_wraps() -> None:
+    frame = VisualizerFrame()
+    frame.seq = 0xFFFF
+    assert VisualizerFrame.decode(frame.encode())["seq"] == 0xFFFF
+    assert VisualizerFrame.decode(frame.encode())["seq"] == 0
+
+
+def test_unknown_version_rejected() -> None:
+    with pytest.raises(ValueError):
+        VisualizerFrame.decode(b"\x09\x00\x00\x00")
+
+
+def test_frame_is_much_smaller_than_messages() -> None:
+    # 30 fixtures + 2 spots + one tick of each history, vs. the old per
+    # fixture messages plus three 200 sample float lists
+    blob = VisualizerFrame().encode(
+        dimming=[100] * 30,
+        pantilt=[(1, 2), (3, 4)],
+        histories={"synth": [1], "fftgen_1": [2], "fftgen_2": [3]},
+    )
+    old_bytes = 30 * 40 + 2 * 44 + 3 * (36 + 200 * 5)
+    assert len(blob) * 10 < old_bytes
@@ -252,3 +252,45 @@ def test_scene_update_captures_new_preset_selection(
     assert (
         scene.presets_by_category[reds] == "UpdatePresetTwo"
     ), "re-saving an existing scene did not capture the new preset selection"
+
+
+def test_modulation_routes_round_trip_through_presets(
+    server_instance: ServerContext,
+    osc_client: SimpleUDPClient,
+    flush: Callable[..., None],
+) -> None:
+    """A route set over /modulation/route is saved with the target's
+    category preset and comes back when the preset is reloaded."""
+
+    graph = server_instance.mixer.modulation
+    sq_1 = graph.generator("sq_1")
+    sin_plants = graph.generator("sin_plants")
+    assert sq_1 is not None and sin_plants is not None
+    route = (sq_1, sin_plants, "period")
+    preset_name = "UITestModulationProbe"
+
+    osc_client.send_message("/preset/selector/plants", preset_name)
+    flush()
+    osc_client.send_message(
+        "/modulation/route", ["sq_1", "sin_plants", "period", 200.0]
+    )
+    flush()
+    assert graph.routes.get(route) == 200.0
+
+    # A cycle back onto the modulator is rejected
+    osc_client.send_message("/modulation/route", ["sin_plants", "sq_1", "amp", 1.0])
+    flush()
+    assert (sin_plants, sq_1, "amp") not in graph.routes
+
+    osc_client.send_message("/preset/save/plants", 1)
+    flush()
+    osc_client.send_message("/modulation/plants", [])
+    flush()
+    assert route not in graph.routes
+
+    osc_client.send_message("/preset/selector/plants", preset_name)
+    flush()
+    try:
+        assert graph.routes.get(route) == 200.0
+    finally:
+        graph.clear()